@@ -0,0 +1,104 @@
+"""Scaling of a counter shared between threads, from 1 to 32 threads.
+
+Every thread increments the same counter; the total work is fixed, so a
+counter that scales keeps the ns/increment flat or falling as threads are
+added. Compares:
+
+- `plain`: `eg.counter()`, an unsynchronized `+=` (may lose updates)
+- `locked`: `eg.counter()` with a `threading.Lock` around every `+=`
+- `sharded`: `eg.counter(sharded=True)`, one shard per thread
+
+The `lost` column is the number of increments missing from the final value.
+On a free-threaded build (`python3.13t`) the plain counter loses updates and
+the locked one serializes the workers.
+
+Run with:
+    uv run python benchmarks/bench_counter.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import sysconfig
+import threading
+from time import perf_counter_ns
+from typing import Callable
+
+os.environ.setdefault('ERGOLOG_NO_AUTO_SETUP', '1')
+
+from ergolog import eg  # noqa: E402
+
+TOTAL = 800_000
+THREADS = (1, 2, 4, 8, 16, 32)
+
+
+def plain() -> tuple[object, Callable[[], None]]:
+    counter = eg.counter()
+
+    def step():
+        nonlocal counter
+        counter += 1
+
+    return counter, step
+
+
+def locked() -> tuple[object, Callable[[], None]]:
+    counter = eg.counter()
+    lock = threading.Lock()
+
+    def step():
+        nonlocal counter
+        with lock:
+            counter += 1
+
+    return counter, step
+
+
+def sharded() -> tuple[object, Callable[[], None]]:
+    counter = eg.counter(sharded=True)
+
+    def step():
+        nonlocal counter
+        counter += 1
+
+    return counter, step
+
+
+def run(make: Callable[[], tuple[object, Callable[[], None]]], threads: int) -> tuple[float, int]:
+    """Return (ns per increment, lost increments) for `threads` workers."""
+    counter, step = make()
+    per_thread = TOTAL // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            step()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = perf_counter_ns()
+    for thread in pool:
+        thread.join()
+    elapsed = perf_counter_ns() - start
+    return elapsed / (per_thread * threads), per_thread * threads - int(str(counter))
+
+
+def main() -> None:
+    gil = 'free-threaded' if sysconfig.get_config_var('Py_GIL_DISABLED') else 'GIL'
+    print(f'Python {sys.version.split()[0]} ({gil})\n')
+    modes = {'plain': plain, 'locked': locked, 'sharded': sharded}
+    print(f'{"threads":>7}' + ''.join(f'{name:>12}{"lost":>8}' for name in modes))
+    for threads in THREADS:
+        row = f'{threads:>7}'
+        for make in modes.values():
+            ns, lost = run(make, threads)
+            row += f'{ns:>9.1f} ns{lost:>8}'
+        print(row)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Before/after cost of ErgoFormatter.format for one record.
+
+Compares three formatters on the same record:
+
+- `per-record`: the previous ErgoFormatter, which built a `logging.Formatter`
+  for every record
+- `ErgoFormatter`: the current formatter, with one precompiled style per level
+  and the asctime string cached per wall-clock second
+- `stdlib`: a bare `logging.Formatter` using the same format string, as a floor
+
+Run with:
+    uv run python benchmarks/bench_formatter.py
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from time import perf_counter_ns
+
+os.environ.setdefault('ERGOLOG_NO_AUTO_SETUP', '1')
+
+from ergolog import ErgoFormatter  # noqa: E402
+
+ITERATIONS = 100_000
+
+
+class PerRecordFormatter(ErgoFormatter):
+    """The formatter as it was before per-level styles were precompiled."""
+
+    def format(self, record):
+        log_fmt = self.FORMATS.get(record.levelno, '')
+        formatter = logging.Formatter(log_fmt)
+        return formatter.format(record)
+
+
+def make_record() -> logging.LogRecord:
+    record = logging.LogRecord('ergo', logging.INFO, __file__, 42, 'hello %s', ('world',), None)
+    record.tags = '[svc, region=eu] '  # type: ignore[attr-defined]
+    return record
+
+
+def ns_per_record(formatter: logging.Formatter, iterations: int = ITERATIONS) -> float:
+    record = make_record()
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        formatter.format(record)
+    return (perf_counter_ns() - start) / iterations
+
+
+def main() -> None:
+    formatters = {
+        'per-record': PerRecordFormatter(),
+        'ErgoFormatter': ErgoFormatter(),
+        'stdlib': logging.Formatter(ErgoFormatter.FORMATS[logging.INFO]),
+    }
+    for name, formatter in formatters.items():
+        print(f'{name:>14}  {ns_per_record(formatter):>8.0f} ns/record')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Throughput of ErgoJSONFormatter against the previous implementation.
+
+The previous formatter imported `json` and `datetime` inside every call,
+built a timezone-aware datetime for the timestamp and called `json.dumps`
+with custom separators, which constructs a new encoder per record. The
+current formatter pre-encodes the level and logger name, renders the
+timestamp prefix once per second and escapes strings with the C encoder,
+so only the nested tag/event values (`record.tag_dict`, `record.event`) go
+through a JSON encoder: orjson when it is installed, otherwise (or with
+`ERGOLOG_NO_ORJSON` set) the stdlib path, which writes flat dicts itself
+with cached key fragments. Only the stdlib path is byte-compatible with
+the previous formatter; orjson writes NaN and infinities as null, may
+format float exponents differently (1e-7 for 1e-07), leaves non-ASCII
+text in tags, fields and events unescaped while the message stays
+escaped, writes datetimes in ISO format instead of str(), and encodes
+enums and dataclasses natively instead of as str().
+
+Three records are measured: a plain message, a message with tags, and a
+wide event. The script also checks that both formatters produce the same
+bytes when the stdlib encoder is used.
+
+Run with:
+    uv run python benchmarks/bench_json.py
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from time import perf_counter_ns
+from typing import Any
+
+os.environ.setdefault('ERGOLOG_NO_AUTO_SETUP', '1')
+
+from ergolog import ErgoJSONFormatter  # noqa: E402
+from ergolog import ergolog as ergolog_module  # noqa: E402
+
+ITERATIONS = 50_000
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    """ErgoJSONFormatter.format as it was before the rewrite."""
+
+    def format(self, record):
+        import json
+        from datetime import datetime, timezone
+
+        obj: dict[str, Any] = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'name': record.name,
+            'message': record.getMessage(),
+        }
+        tag_list = getattr(record, 'tag_list', None)
+        if tag_list:
+            tags_dict = {}
+            for tag in tag_list:
+                if '=' in tag:
+                    key, val = tag.split('=', 1)
+                    tags_dict[key] = val
+                else:
+                    tags_dict[tag] = True
+            obj['tags'] = tags_dict
+        event = getattr(record, 'event', None)
+        if event:
+            obj['event'] = event
+        duration = getattr(record, 'duration', None)
+        if duration is not None:
+            obj['duration_s'] = round(duration, 6)
+        if record.exc_info:
+            obj['error'] = self.formatException(record.exc_info)
+        obj['location'] = {'file': record.filename, 'line': record.lineno, 'function': record.funcName}
+        return json.dumps(obj, separators=(',', ':'))
+
+
+def make_records() -> dict[str, logging.LogRecord]:
+    plain = logging.LogRecord('ergo', logging.INFO, __file__, 42, 'hello %s', ('world',), None)
+    plain.funcName = 'handler'
+
+    tagged = logging.makeLogRecord(plain.__dict__)
+    tagged.tag_list = ['svc', 'region=eu', 'user=alice', 'request_id=abc123']  # type: ignore[attr-defined]
+    tagged.tag_dict = {'svc': True, 'region': 'eu', 'user': 'alice', 'request_id': 'abc123'}  # type: ignore[attr-defined]
+
+    context = {'user': 'alice', 'action': 'checkout', 'cart': {'items': 3, 'total': 9999}, 'duration_s': 0.234}
+    event = logging.makeLogRecord(tagged.__dict__)
+    event.msg = ergolog_module.ErgoEventMessage(context, 0.234)
+    event.args = None
+    event.event = context  # type: ignore[attr-defined]
+    event.duration = 0.2341  # type: ignore[attr-defined]
+
+    return {'plain': plain, 'tagged': tagged, 'event': event}
+
+
+def ns_per_record(formatter: logging.Formatter, record: logging.LogRecord, iterations: int = ITERATIONS) -> float:
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        formatter.format(record)
+    return (perf_counter_ns() - start) / iterations
+
+
+def main() -> None:
+    legacy, current = LegacyJSONFormatter(), ErgoJSONFormatter()
+    encoder = 'orjson' if ergolog_module._json_dumps is ergolog_module._orjson_dumps else 'json'
+    print(f'nested values encoded with: {encoder}\n')
+    print(f'{"record":>8}  {"legacy":>10}  {"current":>10}  {"speedup":>8}')
+    for name, record in make_records().items():
+        before, after = ns_per_record(legacy, record), ns_per_record(current, record)
+        print(f'{name:>8}  {before:>7.0f} ns  {after:>7.0f} ns  {before / after:>7.1f}x')
+
+    # byte-for-byte check against the previous output with the stdlib encoder
+    ergolog_module._json_dumps = ergolog_module._stdlib_json_dumps
+    for name, record in make_records().items():
+        assert current.format(record) == legacy.format(record), name
+    print('\noutput is byte-identical to the previous formatter (stdlib encoder)')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Cost of entering and exiting a tag scope as the tag stack grows deeper.
+
+Nests `eg.tag` scopes 1..1000 deep and reports the time for one enter/exit pair
+at selected depths, plus the memory held by the whole stack at full depth,
+once after a record has been logged at the top of it and once after a record
+has been logged at every level (a recursive function that logs). With a
+structurally shared stack the enter/exit cost should stay flat as the depth
+grows, and the memory should grow linearly rather than quadratically; the run
+fails if either case goes over `MAX_BYTES_PER_LEVEL`.
+
+Run with:
+    uv run python benchmarks/bench_tag_depth.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tracemalloc
+from contextlib import ExitStack
+from time import perf_counter_ns
+
+os.environ.setdefault('ERGOLOG_NO_AUTO_SETUP', '1')
+
+from ergolog import eg  # noqa: E402
+from ergolog.ergolog import ErgoTagger  # noqa: E402
+
+MAX_DEPTH = 1000
+SAMPLE_DEPTHS = (1, 10, 100, 250, 500, 1000)
+ITERATIONS = 20_000
+# a tagger, its node and its share of one rendering at the top take under 1 KiB;
+# a rendering cached on every node would be tens of KiB per level at this depth
+MAX_BYTES_PER_LEVEL = 2048
+
+
+def enter_exit_ns(iterations: int = ITERATIONS) -> float:
+    """Time one enter/exit pair of a tag scope at the current depth."""
+    tagger = eg.tag('leaf')
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        with tagger:
+            pass
+    return (perf_counter_ns() - start) / iterations
+
+
+def held_bytes(log_every_level: bool) -> int:
+    """Memory held by a MAX_DEPTH-deep stack once records have been logged under it."""
+    tracemalloc.start()
+    with ExitStack() as stack:
+        before = tracemalloc.get_traced_memory()[0]
+        for depth in range(1, MAX_DEPTH + 1):
+            stack.enter_context(eg.tag(f'tag{depth}', depth=depth))
+            if log_every_level:
+                # what ErgoTagFilter does for a record logged here
+                ErgoTagger._tag_stack_var.get().render()
+        ErgoTagger._tag_stack_var.get().render()
+        after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before
+
+
+def main() -> int:
+    print(f'{"depth":>6}  {"enter+exit":>12}')
+    with ExitStack() as stack:
+        for depth in range(1, MAX_DEPTH + 1):
+            stack.enter_context(eg.tag(f'tag{depth}', depth=depth))
+            if depth in SAMPLE_DEPTHS:
+                print(f'{depth:>6}  {enter_exit_ns():>9.0f} ns')
+
+    failed = False
+    for case, log_every_level in (('logged at the top', False), ('logged at every level', True)):
+        held = held_bytes(log_every_level)
+        print(f'\nmemory held by a {MAX_DEPTH}-deep stack {case}: '
+              f'{held / 1024:.1f} KiB ({held / MAX_DEPTH:.0f} bytes per level)')
+        if held > MAX_DEPTH * MAX_BYTES_PER_LEVEL:
+            print(f'more than {MAX_BYTES_PER_LEVEL} bytes per level: the stack is no longer linear in memory')
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Benchmark suite for the ergolog hot paths.
+
+Measures the cost of one log call, end to end through a real output, for:
+
+- plain `eg.info`
+- tags at depths 1, 10 and 100
+- counters and timers as tag values
+- `eg.event` with and without laps
+- each format (`default`, `plain`, `json`)
+- the memory-mapped `ring` output
+- caller location `full` (stdlib stack walk), `cached` and `off`
+- plain `eg.info` from 1, 4 and 16 threads
+
+Output goes to a file handler on os.devnull, so the numbers measure ergolog
+and the logging module rather than the terminal. Each case is run several
+times and the fastest run is kept.
+
+Usage:
+    uv run python benchmarks/suite.py                          # run and print
+    uv run python benchmarks/suite.py -k tags                  # only cases matching 'tags'
+    uv run python benchmarks/suite.py --save results.json      # also write results as JSON
+    uv run python benchmarks/suite.py --compare benchmarks/baseline.json --threshold 0.25
+
+With --compare, the exit status is 1 if any case is slower than the
+baseline by more than the threshold (a fraction, 0.25 = 25% slower).
+Baselines are machine-specific: regenerate `benchmarks/baseline.json` with
+--save on the machine you compare on.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+from contextlib import ExitStack
+from time import perf_counter_ns
+from typing import Callable
+
+os.environ.setdefault('ERGOLOG_NO_AUTO_SETUP', '1')
+
+from ergolog import eg  # noqa: E402
+
+ITERATIONS = 20_000
+REPEATS = 5
+DEFAULT_THRESHOLD = 0.25
+
+# a case returns (step, teardown): step() performs one log call
+Case = Callable[[], 'tuple[Callable[[], None], Callable[[], None]]']
+CASES: dict[str, Case] = {}
+THREADED: dict[str, int] = {}
+
+
+def case(name: str, threads: int = 1):
+    def register(fn: Case) -> Case:
+        CASES[name] = fn
+        if threads > 1:
+            THREADED[name] = threads
+        return fn
+
+    return register
+
+
+def use_output(format: str) -> None:
+    eg.config.remove_output('file', path=os.devnull)
+    eg.config.add_output('file', path=os.devnull, format=format)
+
+
+def nested_tags(depth: int) -> tuple[Callable[[], None], Callable[[], None]]:
+    stack = ExitStack()
+    for i in range(depth):
+        stack.enter_context(eg.tag(f'tag{i}', depth=i))
+    return (lambda: eg.info('hello')), stack.close
+
+
+def no_teardown() -> None:
+    pass
+
+
+# --------------------------------------------------------------------------- #
+
+
+@case('info')
+def info_plain():
+    return (lambda: eg.info('hello')), no_teardown
+
+
+@case('info_args')
+def info_args():
+    return (lambda: eg.info('hello %s', 'world')), no_teardown
+
+
+@case('tags_depth_1')
+def tags_depth_1():
+    return nested_tags(1)
+
+
+@case('tags_depth_10')
+def tags_depth_10():
+    return nested_tags(10)
+
+
+@case('tags_depth_100')
+def tags_depth_100():
+    return nested_tags(100)
+
+
+@case('tag_counter')
+def tag_counter():
+    counter = eg.counter()
+    scope = eg.tag('svc', step=counter)
+    scope.__enter__()
+
+    def step():
+        nonlocal counter
+        counter += 1
+        eg.info('hello')
+
+    return step, lambda: scope.__exit__(None, None, None)
+
+
+@case('tag_timer')
+def tag_timer():
+    scope = eg.tag('svc', elapsed=eg.timer())
+    scope.__enter__()
+    return (lambda: eg.info('hello')), lambda: scope.__exit__(None, None, None)
+
+
+@case('event')
+def event_plain():
+    def step():
+        with eg.event(user='alice', action='checkout') as e:
+            e.set(items=3)
+
+    return step, no_teardown
+
+
+@case('event_laps')
+def event_laps():
+    def step():
+        with eg.event(user='alice', action='checkout') as e:
+            t = eg.timer()
+            e.set(duration=t)
+            t.lap('fetch')
+            t.lap('process')
+            t.lap('save')
+
+    return step, no_teardown
+
+
+@case('event_disabled')
+def event_disabled():
+    import logging
+
+    previous = eg._logger.level
+    eg._logger.setLevel(logging.WARNING)
+
+    def step():
+        with eg.event(user='alice') as e:
+            e.set(items=3)
+
+    return step, lambda: eg._logger.setLevel(previous)
+
+
+def format_case(format: str) -> Case:
+    def setup():
+        use_output(format)
+        scope = eg.tag('svc', region='eu')
+        scope.__enter__()
+
+        def teardown():
+            scope.__exit__(None, None, None)
+            use_output('default')
+
+        return (lambda: eg.info('hello %s', 'world')), teardown
+
+    return setup
+
+
+for _format in ('default', 'plain', 'json'):
+    case(f'format_{_format}')(format_case(_format))
+
+
+@case('output_ring')
+def output_ring():
+    # the ring replaces the devnull file output, so this is the cost of a memory-mapped write
+    path = os.path.join(tempfile.mkdtemp(), 'bench.ring')
+    eg.config.remove_output('file', path=os.devnull)
+    eg.config.add_output('ring', path=path, ring_bytes=4 * 1024 * 1024)
+
+    def teardown():
+        eg.config.remove_output('ring', path=path)
+        os.remove(path)
+        use_output('default')
+
+    return (lambda: eg.info('hello %s', 'world')), teardown
+
+
+def location_case(location: str) -> Case:
+    def setup():
+        eg.config.remove_output('file', path=os.devnull)
+        eg.config.add_output('file', path=os.devnull, location=location)
+        return (lambda: eg.info('hello %s', 'world')), lambda: use_output('default')
+
+    return setup
+
+
+for _location in ('cached', 'off'):
+    case(f'location_{_location}')(location_case(_location))
+
+for _threads in (1, 4, 16):
+    case(f'threads_{_threads}', threads=_threads)(info_plain)
+
+
+# --------------------------------------------------------------------------- #
+
+
+def run_case(name: str, iterations: int, repeats: int) -> float:
+    """Return the best ns/record over `repeats` runs of `iterations` records."""
+    step, teardown = CASES[name]()
+    threads = THREADED.get(name, 1)
+    best = float('inf')
+    try:
+        step()  # warm caches
+        for _ in range(repeats):
+            best = min(best, timed_run(step, iterations, threads))
+    finally:
+        teardown()
+    return best
+
+
+def timed_run(step: Callable[[], None], iterations: int, threads: int) -> float:
+    per_thread = iterations // threads
+
+    def worker(barrier: threading.Barrier | None):
+        if barrier is not None:
+            barrier.wait()
+        for _ in range(per_thread):
+            step()
+
+    if threads == 1:
+        start = perf_counter_ns()
+        worker(None)
+        return (perf_counter_ns() - start) / per_thread
+
+    barrier = threading.Barrier(threads + 1)
+    pool = [threading.Thread(target=worker, args=(barrier,)) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = perf_counter_ns()
+    for thread in pool:
+        thread.join()
+    return (perf_counter_ns() - start) / (per_thread * threads)
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Return a line for each case that regressed past the threshold."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['ns_per_record'], result['ns_per_record']
+        change = (after - before) / before
+        if change > threshold:
+            regressions.append(f'{name}: {before:.0f} -> {after:.0f} ns/record ({change:+.0%})')
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', help='only run cases whose name contains this')
+    parser.add_argument('-n', '--iterations', type=int, default=ITERATIONS)
+    parser.add_argument('-r', '--repeats', type=int, default=REPEATS)
+    parser.add_argument('--save', metavar='PATH', help='write results as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown as a fraction (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    use_output('default')
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    results: dict[str, dict] = {}
+    print(f'{"case":<16}{"ns/record":>12}{"records/sec":>14}{"baseline":>12}')
+    for name in CASES:
+        if args.pattern and args.pattern not in name:
+            continue
+        ns = run_case(name, args.iterations, args.repeats)
+        results[name] = {'ns_per_record': round(ns, 1), 'records_per_sec': round(1e9 / ns)}
+        reference = f'{(ns - baseline[name]["ns_per_record"]) / baseline[name]["ns_per_record"]:+.0%}' \
+            if name in baseline else ''
+        print(f'{name:<16}{ns:>12.0f}{1e9 / ns:>14,.0f}{reference:>12}')
+
+    eg.config.remove_output('file', path=os.devnull)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            meta = {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                    'platform': platform.platform(), 'iterations': args.iterations, 'repeats': args.repeats}
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+            f.write('\n')
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f'\nregressions beyond {args.threshold:.0%}:')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,7 @@
-from .ergolog import eg, ErgoConfig, ErgoCounter, ErgoEvent, ErgoFormatter, ErgoJSONFormatter
+from .ergolog import (
+    eg, ErgoConfig, ErgoCounter, ErgoEvent, ErgoFormatter, ErgoHistogram, ErgoJSONFormatter, ErgoMetrics,
+    ErgoShardedCounter,
+)
 
 
-__all__ = ['eg', 'ErgoConfig', 'ErgoCounter', 'ErgoEvent', 'ErgoFormatter', 'ErgoJSONFormatter']
\ No newline at end of file
+__all__ = ['eg', 'ErgoConfig', 'ErgoCounter', 'ErgoEvent', 'ErgoFormatter', 'ErgoHistogram', 'ErgoJSONFormatter', 'ErgoMetrics', 'ErgoShardedCounter']
\ No newline at end of file
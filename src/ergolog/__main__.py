@@ -0,0 +1,40 @@
+"""Command-line tools for ergolog outputs.
+
+Usage:
+    python -m ergolog ring dump app.ring          # print the records in a ring output, oldest first
+    python -m ergolog ring dump --seq app.ring    # prefix each record with its sequence number
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from .ergolog import ErgoRingHandler
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m ergolog', description='Command-line tools for ergolog outputs.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ring = commands.add_parser('ring', help="inspect 'ring' outputs")
+    ring_commands = ring.add_subparsers(dest='ring_command', required=True)
+    dump = ring_commands.add_parser('dump', help='print the records in a ring file, oldest first')
+    dump.add_argument('file')
+    dump.add_argument('--seq', action='store_true', help='prefix each record with its sequence number')
+
+    args = parser.parse_args(argv)
+
+    try:
+        records = ErgoRingHandler.read(args.file)
+    except (OSError, ValueError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+
+    for seq, text in records:
+        sys.stdout.write(f'{seq}\t{text}\n' if args.seq else f'{text}\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,43 @@
 from __future__ import annotations
 
+import atexit
+import functools
+import gzip
+import inspect
+import json
 import logging
+import mmap
 import os
+import pickle
+import queue
+import reprlib
+import shutil
+import struct
 import sys
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
 from contextvars import ContextVar
-from time import time
+from itertools import count
+from json import JSONEncoder
+from json.encoder import encode_basestring_ascii as _json_str
+from math import ceil
+from random import random
+from time import gmtime, monotonic_ns, perf_counter_ns, sleep, strftime, time_ns
 from typing import Any, Callable
 from uuid import uuid4
+from weakref import WeakSet, finalize, ref
+from zlib import crc32
+
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import lzma
+except ImportError:  # pragma: no cover - Python built without liblzma
+    lzma = None  # type: ignore[assignment]
 
 # --------------------------------------------------------------------------- #
 
@@ -15,11 +46,107 @@ NO_COLORS = os.environ.get('ERGOLOG_NO_COLORS', None)
 NO_TIME = os.environ.get('ERGOLOG_NO_TIME', None)
 DEFAULT_LOGGER = os.environ.get('ERGOLOG_DEFAULT_LOGGER', 'ergo')
 NO_AUTO_SETUP = os.environ.get('ERGOLOG_NO_AUTO_SETUP', None)
+NO_ORJSON = os.environ.get('ERGOLOG_NO_ORJSON', None)
+
+
+# --------------------------------------------------------------------------- #
+
+
+# values kept as they are in tag_dict and across processes; anything else is passed as str()
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+# encoded '"key":' fragments for dict keys; tag and event keys repeat across records
+_JSON_KEYS: dict[str, str] = {}
+_JSON_KEYS_SIZE = 1024
+
+
+def _stdlib_json_dumps(obj: Any) -> str:
+    """Encode `obj` exactly as json.dumps(obj, separators=(',', ':'), default=str) would.
+
+    Dicts with string keys (tag_dict, event context, fields) are written
+    here, with cached key fragments, the C string escaper and plain scalars
+    encoded inline; everything else goes through the shared stdlib encoder.
+    """
+    if type(obj) is not dict:
+        return _JSON_ENCODER.encode(obj)
+
+    parts: list[str] = []
+    append = parts.append
+    for key, value in obj.items():
+        try:
+            fragment = _JSON_KEYS[key]
+        except KeyError:
+            if type(key) is not str:  # the encoder converts int, float, bool and None keys
+                return _JSON_ENCODER.encode(obj)
+            if len(_JSON_KEYS) >= _JSON_KEYS_SIZE:
+                _JSON_KEYS.clear()
+            fragment = _JSON_KEYS[key] = _json_str(key) + ':'
+
+        cls = type(value)
+        if cls is str:
+            append(fragment + _json_str(value))
+        elif cls is int:
+            append(fragment + repr(value))
+        elif cls is bool:
+            append(fragment + ('true' if value else 'false'))
+        elif value is None:
+            append(fragment + 'null')
+        elif cls is float and value - value == 0:  # finite; NaN and infinities go through the encoder
+            append(fragment + repr(value))
+        elif cls is dict:
+            append(fragment + _stdlib_json_dumps(value))
+        else:
+            append(fragment + _JSON_ENCODER.encode(value))
+    return '{' + ','.join(parts) + '}'
+
+
+def _orjson_dumps(obj: Any) -> str:
+    try:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:  # orjson.JSONEncodeError, e.g. ints beyond 64 bits: the stdlib encoder writes them
+        return _stdlib_json_dumps(obj)
+
+
+# reused across records, unlike json.dumps(obj, separators=...) which builds a new encoder per call;
+# values JSON can't represent (paths, decimals, user objects in fields or events) are written as str()
+_JSON_ENCODER = JSONEncoder(separators=(',', ':'), default=str)
+
+# orjson encodes nested values (tags, event context) when it is installed; its output differs from
+# json.dumps (NaN, float exponents, non-ASCII text, datetimes, enums, dataclasses), so only the
+# stdlib encoder's lines are byte-identical
+_json_dumps = _orjson_dumps if orjson is not None and not NO_ORJSON else _stdlib_json_dumps
 
 
 # --------------------------------------------------------------------------- #
 
 
+# type -> (__ergo_value__, __ergo_display__ or None) for live value types, None for plain types
+_LIVE_TYPES: dict[type, tuple[Callable[[Any], Any], Callable[[Any, Any], str] | None] | None] = {}
+_LIVE_TYPES_SIZE = 1024
+
+
+def _live(value: Any) -> tuple[Callable[[Any], Any], Callable[[Any, Any], str] | None] | None:
+    """Return the live-value hooks for the type of `value`, or None for a plain value.
+
+    Any object whose type defines `__ergo_value__()` is a live value: tags call
+    it for every record and events call it at emit time. The optional
+    `__ergo_display__(value)` returns the text shown in tags (default
+    `str(value)`). The hooks are looked up once per type.
+    """
+    cls = type(value)
+    try:
+        return _LIVE_TYPES[cls]
+    except KeyError:
+        pass
+    resolve = getattr(cls, '__ergo_value__', None)
+    hooks = (resolve, getattr(cls, '__ergo_display__', None)) if resolve is not None else None
+    if len(_LIVE_TYPES) >= _LIVE_TYPES_SIZE:
+        _LIVE_TYPES.clear()
+    _LIVE_TYPES[cls] = hooks
+    return hooks
+
+
 class ErgoCounter:
     """A mutable counter/accumulator that can be used as a tag value.
 
@@ -44,6 +171,9 @@ class ErgoCounter:
     def __str__(self):
         return str(self._value)
 
+    def __ergo_value__(self):
+        return self._value
+
     def __eq__(self, other):
         if isinstance(other, ErgoCounter):
             return self._value == other._value
@@ -56,50 +186,469 @@ class ErgoCounter:
             yield item
 
 
+class _ShardSentinel:
+    """Lives in one thread's local storage; its finalizer folds that thread's shard into the base."""
+
+    __slots__ = ('__weakref__',)
+
+
+class ErgoShardedCounter(ErgoCounter):
+    """An ErgoCounter that is safe and contention-free to share between threads.
+
+    Each thread increments its own shard, a one-item list registered on first
+    use, so `+=` never races and never takes a lock after the first call from
+    a thread. Reads (tag rendering, event resolution, `str()`) sum the shards.
+    When a thread exits, its shard is folded into a base total, so short-lived
+    threads neither lose their increments nor make reads slower.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # (base total of finished threads, shards of live threads), replaced as a whole so reads
+        # never see a shard both folded into the base and still in the tuple
+        self._state: tuple[int, tuple[list[int], ...]] = (0, ())
+        self._register = threading.Lock()
+
+    def _shard(self) -> list[int]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = [0]
+            # thread-local values are dropped when their thread exits, and the sentinel with them
+            self._local.sentinel = sentinel = _ShardSentinel()
+            finalize(sentinel, ErgoShardedCounter._retire, ref(self), shard)
+            with self._register:
+                base, shards = self._state
+                self._state = (base, (*shards, shard))
+            return shard
+
+    @staticmethod
+    def _retire(counter_ref: ref, shard: list[int]) -> None:
+        counter = counter_ref()
+        if counter is None:
+            return
+        with counter._register:
+            base, shards = counter._state
+            counter._state = (base + shard[0], tuple(s for s in shards if s is not shard))
+
+    @property
+    def _value(self) -> int:  # type: ignore[override]
+        base, shards = self._state
+        return base + sum([shard[0] for shard in shards])
+
+    def __iadd__(self, other):
+        self._shard()[0] += other
+        return self
+
+    def __isub__(self, other):
+        self._shard()[0] -= other
+        return self
+
+    def count(self, iterable):
+        """Iterate over an iterable, incrementing this thread's shard each iteration."""
+        shard = self._shard()
+        for item in iterable:
+            shard[0] += 1
+            yield item
+
+
+class ErgoTagStack:
+    """An immutable, structurally shared stack of applied tags.
+
+    Each node holds the tags applied by one ErgoTagger scope and points at the
+    node below it, so pushing a scope is O(1) regardless of how deep the stack
+    already is, and sibling scopes share everything beneath them. Iterating
+    yields the individual tags from the bottom of the stack to the top.
+    """
+
+    __slots__ = ('parent', 'tags', 'size', 'owner', 'flight', '_prefix')
+
+    def __init__(self, parent: ErgoTagStack | None = None, tags: tuple = ()) -> None:
+        self.parent = parent
+        self.tags = tags
+        # the ErgoTagger whose `with` block pushed this node, and the flight recorder scope it opened
+        self.owner: ErgoTagger | None = None
+        self.flight: tuple[ErgoFlightBuffer, Any] | None = None
+        self.size: int = len(tags) + (parent.size if parent is not None else 0)
+        # (base, tag_list, live slots, display, tag_dict), rendered when a record is logged under
+        # this node; see _rendered_prefix()
+        self._prefix: tuple[ErgoTagStack | None, tuple[str, ...], tuple, str, dict[str, Any]] | None = (
+            None if tags or parent else (None, (), (), '', {})
+        )
+
+    def push(self, tags: tuple) -> ErgoTagStack:
+        """Return a new stack with `tags` on top of this one."""
+        return ErgoTagStack(self, tags)
+
+    def nodes(self) -> list[ErgoTagStack]:
+        """Return the non-empty nodes of this stack, bottom first."""
+        nodes = []
+        node: ErgoTagStack | None = self
+        while node is not None:
+            if node.tags:
+                nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+    # stacks up to this many tags cache their whole rendering; deeper ones cache only their own segment
+    FLAT_PREFIX_SIZE = 32
+
+    def _rendered_prefix(self) -> tuple[ErgoTagStack | None, tuple[str, ...], tuple, str, dict[str, Any]]:
+        """Return the static rendering of this node's segment of the stack, cached on this node.
+
+        Static tags are rendered once, both as display strings and as a typed
+        `tag_dict` (positional tags map to True). Live values (see `_live`)
+        leave a placeholder plus an `(index, key, value, in_dict, hooks)` slot
+        that is filled in per record; `in_dict` is False when a later tag
+        in the segment with the same key shadows it.
+
+        Only nodes that records are logged under keep a rendering. A stack of
+        up to `FLAT_PREFIX_SIZE` tags renders all of it, with `base` None and
+        the display string cached when there are no live values. A deeper
+        node renders only the tags above `base`, the nearest node below that
+        has a rendering, so a recursive function that logs at every level
+        still holds O(depth) memory, not O(depth²).
+        """
+        if self._prefix is not None:
+            return self._prefix
+
+        flat = self.size <= self.FLAT_PREFIX_SIZE
+        pending = []
+        node: ErgoTagStack | None = self
+        while node is not None and (flat or node._prefix is None):
+            pending.append(node)
+            node = node.parent
+        base = node if node is not None and node.size else None
+
+        rendered: list[str] = []
+        slots: list[tuple] = []
+        static: dict[str, Any] = {}
+        for node in reversed(pending):
+            for tag in node.tags:
+                key, value = tag if isinstance(tag, tuple) else (tag, True)
+                # a later tag with the same key wins in tag_dict
+                slots = [(*slot[:3], False, slot[4]) if slot[1] == key else slot for slot in slots]
+                hooks = _live(value)
+                if hooks is not None:
+                    slots.append((len(rendered), key, value, True, hooks))
+                    rendered.append('')
+                    static[key] = None
+                else:
+                    rendered.append(tag if value is True and tag is key else f'{key}={value}')
+                    static[key] = value if isinstance(value, _JSON_SCALARS) else str(value)
+
+        display = f'[{", ".join(rendered)}] ' if rendered and not slots and base is None else ''
+        self._prefix = (base, tuple(rendered), tuple(slots), display, static)
+        return self._prefix
+
+    def render(self) -> tuple[list[str], str, dict[str, Any]]:
+        """Render the stack as `(tag_list, display, tag_dict)` with live values evaluated now."""
+        prefix = self._rendered_prefix()
+        base, tag_list, live, display, static = prefix
+        if base is None and not live:
+            return list(tag_list), display, dict(static)
+
+        segments = [prefix]
+        while base is not None:
+            segments.append(base._rendered_prefix())
+            base = segments[-1][0]
+
+        rendered: list[str] = []
+        tag_dict: dict[str, Any] = {}
+        for _, tag_list, live, _, static in reversed(segments):
+            offset = len(rendered)
+            rendered += tag_list
+            tag_dict.update(static)
+            for index, key, value, in_dict, (resolve, show) in live:
+                native = resolve(value)
+                rendered[offset + index] = f'{key}={native}' if show is None else f'{key}={show(value, native)}'
+                if in_dict:
+                    tag_dict[key] = native if isinstance(native, _JSON_SCALARS) else str(native)
+        return rendered, f'[{", ".join(rendered)}] ', tag_dict
+
+    def __iter__(self):
+        for node in self.nodes():
+            yield from node.tags
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __eq__(self, other):
+        if isinstance(other, (ErgoTagStack, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)!r})'
+
+
+_EMPTY_TAG_STACK = ErgoTagStack()
+
+
+# timer and event scopes entered with `with` / `async with`, innermost first, as linked
+# (owner, scope, outer) nodes. They are kept per context rather than on the instance, so a timer or
+# event shared between threads or tasks can be entered by several of them at once and exited in any
+# order. Tag scopes live on their ErgoTagStack node instead.
+_with_scopes: ContextVar[tuple | None] = ContextVar('ergo_with_scopes', default=None)
+
+
+def _enter_scope(owner: Any, scope: Any) -> None:
+    _with_scopes.set((owner, scope, _with_scopes.get()))
+
+
+def _exit_scope(owner: Any) -> Any:
+    """Remove and return the innermost scope `owner` entered in the current context."""
+    node = _with_scopes.get()
+    if node is not None and node[0] is owner:
+        _with_scopes.set(node[2])
+        return node[1]
+
+    # scopes entered without a matching exit (e.g. a bare __enter__()) stay on the stack
+    skipped = []
+    while node is not None and node[0] is not owner:
+        skipped.append(node)
+        node = node[2]
+    if node is None:
+        raise RuntimeError(f'{type(owner).__name__} exited without being entered in this context')
+    outer = node[2]
+    for other, scope, _ in reversed(skipped):
+        outer = (other, scope, outer)
+    _with_scopes.set(outer)
+    return node[1]
+
+
+def _scoped(wrapped: Callable, push: Callable[..., Any], pop: Callable[[Any, bool], None], per_step: bool = True,
+            prepare: Callable[[], Any] | None = None, finish: Callable[[Any, bool], None] | None = None):
+    """Wrap `wrapped` so that every call runs between `push()` and `pop(scope, failed)`.
+
+    Coroutine functions are awaited inside the scope, so it ends when the
+    coroutine finishes rather than when it is created. Async generators are
+    driven one step at a time: with `per_step` the scope is entered around
+    each resumption only, so context variables never leak into the consumer
+    across a `yield`; otherwise one scope spans the generator's whole life.
+    With `prepare`, each step calls `push(prepare())`, with `prepare()`
+    evaluated once per call, so every step of one generator enters the same
+    scope; `finish(prepare(), failed)` then runs once the generator is done.
+    """
+    if inspect.isasyncgenfunction(wrapped):
+
+        @functools.wraps(wrapped)
+        async def agen_wrapper(*args, **kwargs):
+            agen = wrapped(*args, **kwargs)
+            prepared = None
+            if prepare is not None:
+                prepared = prepare()
+                push_step = functools.partial(push, prepared)
+            else:
+                push_step = push
+            outer = None if per_step else push_step()
+            failed = True
+            sent = thrown = None
+            try:
+                while True:
+                    scope = push_step() if per_step else None
+                    step_failed = True
+                    try:
+                        item = await (agen.athrow(thrown) if thrown is not None else agen.asend(sent))
+                        step_failed = False
+                    except StopAsyncIteration:
+                        step_failed = failed = False
+                        return
+                    finally:
+                        if per_step:
+                            pop(scope, step_failed)
+                    sent = thrown = None
+                    try:
+                        sent = yield item
+                    except GeneratorExit:
+                        # closed early by the consumer: let the generator clean up inside the scope
+                        scope = push_step() if per_step else None
+                        try:
+                            await agen.aclose()
+                        finally:
+                            if per_step:
+                                pop(scope, False)
+                        failed = False
+                        raise
+                    except BaseException as exc:
+                        thrown = exc
+            finally:
+                if not per_step:
+                    pop(outer, failed)
+                if finish is not None:
+                    finish(prepared, failed)
+
+        return agen_wrapper
+
+    if inspect.iscoroutinefunction(wrapped):
+
+        @functools.wraps(wrapped)
+        async def async_wrapper(*args, **kwargs):
+            scope = push()
+            failed = True
+            try:
+                result = await wrapped(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                pop(scope, failed)
+
+        return async_wrapper
+
+    @functools.wraps(wrapped)
+    def wrapper(*args, **kwargs):
+        scope = push()
+        failed = True
+        try:
+            result = wrapped(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            pop(scope, failed)
+
+    return wrapper
+
+
 class ErgoTagger:
-    _tag_stack_var: ContextVar[list] = ContextVar('tag_stack', default=[])
+    _tag_stack_var: ContextVar[ErgoTagStack] = ContextVar('tag_stack', default=_EMPTY_TAG_STACK)
 
     def __init__(self, *tags: str, **kwtags: str | Callable[[], str] | ErgoCounter | ErgoTimer) -> None:
         self._tags = [*tags]
         self._kwtags = kwtags
 
-        self.applied_tags: list[str | tuple[str, Any]] = []
+        # with only scalar and live values every scope applies the same tags, so build them once;
+        # callables and other values (lists, dicts, ...) are evaluated each time a scope is entered
+        dynamic = any(not isinstance(v, _JSON_SCALARS) and _live(v) is None for v in kwtags.values())
+        self._static_tags = None if dynamic else self._apply()
+
+        self.applied_tags: tuple[str | tuple[str, Any], ...] = ()
 
     def __call__(self, wrapped):
-        """decorator"""
+        """decorator, for plain functions, coroutine functions and async generators"""
+        return _scoped(wrapped, self._push, self._pop, prepare=self._tags_for_scope)
 
-        def wrapper(*args, **kwargs):
-            with self:
-                return wrapped(*args, **kwargs)
+    def _apply(self) -> tuple[str | tuple[str, Any], ...]:
+        """Evaluate callable tag values and build the tags for one scope."""
+        applied: list[str | tuple[str, Any]] = [*self._tags]
 
-        return wrapper
+        for k, v in self._kwtags.items():
+            if callable(v) and _live(v) is None:
+                v = v()
+            # other values are rendered now, so a mutable value shows its state at scope entry
+            if not isinstance(v, _JSON_SCALARS) and _live(v) is None:
+                v = str(v)
+            applied.append((k, v))
 
-    def __enter__(self, *_):
-        self.applied_tags = [*self._tags]
+        return tuple(applied)
 
-        for k, v in self._kwtags.items():
-            if isinstance(v, (ErgoCounter, ErgoTimer)):
-                self.applied_tags.append((k, v))
-            else:
-                self.applied_tags.append(f'{k}={v()}' if callable(v) else f'{k}={v}')
+    def _tags_for_scope(self) -> tuple[str | tuple[str, Any], ...]:
+        return self._static_tags if self._static_tags is not None else self._apply()
+
+    def _push(self, applied: tuple[str | tuple[str, Any], ...] | None = None):
+        self.applied_tags = applied if applied is not None else self._tags_for_scope()
+        token = self._tag_stack_var.set(self._tag_stack_var.get().push(self.applied_tags))
+        return token, ErgoFlightRecorder.open_scope() if ErgoFlightRecorder.active else None
 
-        current = self._tag_stack_var.get()
-        new_stack = current + self.applied_tags
-        self._token = self._tag_stack_var.set(new_stack)
+    def _pop(self, scope, failed: bool) -> None:
+        token, flight = scope
+        self._tag_stack_var.reset(token)
+        if flight is not None:
+            ErgoFlightRecorder.close_scope(flight, failed)
 
+    def __enter__(self, *_):
+        # the scope lives on the pushed node, not on the tagger, so the same tagger can be
+        # entered re-entrantly and by several threads or tasks at once
+        self.applied_tags = tags = self._tags_for_scope()
+        node = self._tag_stack_var.get().push(tags)
+        node.owner = self
+        if ErgoFlightRecorder.active:
+            node.flight = ErgoFlightRecorder.open_scope()
+        self._tag_stack_var.set(node)
         return self
 
-    def __exit__(self, *_):
-        self._tag_stack_var.reset(self._token)
-        self.applied_tags = []
+    def __exit__(self, exc_type, *_):
+        # `with` blocks nest within a context, so the top node is nearly always the one this block pushed
+        node = self._tag_stack_var.get()
+        if node.owner is self:
+            self._tag_stack_var.set(node.parent)  # type: ignore[arg-type]
+        else:
+            node = self._exit_out_of_order(node)
+        if node.flight is not None:
+            ErgoFlightRecorder.close_scope(node.flight, exc_type is not None)
+        self.applied_tags = ()
+
+    def _exit_out_of_order(self, top: ErgoTagStack) -> ErgoTagStack:
+        """Take this tagger's innermost node out from under the scopes entered after it and return it.
+
+        Happens for a bare `__exit__()` called out of order, or a `with` in a
+        generator that yielded inside it; the later scopes stay open.
+        """
+        skipped = []
+        node: ErgoTagStack | None = top
+        while node is not None and node.owner is not self:
+            skipped.append(node)
+            node = node.parent
+        if node is None:
+            raise RuntimeError(f'{type(self).__name__} exited without being entered in this context')
+
+        stack = node.parent
+        for other in reversed(skipped):
+            moved = stack.push(other.tags)  # type: ignore[union-attr]
+            moved.owner, moved.flight = other.owner, other.flight
+            stack = moved
+        self._tag_stack_var.set(stack)  # type: ignore[arg-type]
+        return node
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, *_):
+        self.__exit__(exc_type)
+
+
+if sys.platform == 'linux':
+    from time import clock_gettime_ns
+
+    # CLOCK_MONOTONIC_COARSE from <linux/time.h>; the time module doesn't export it
+    _CLOCK_MONOTONIC_COARSE = 6
+    _coarse_clock_ns: Callable[[], int] = functools.partial(clock_gettime_ns, _CLOCK_MONOTONIC_COARSE)
+else:
+    _coarse_clock_ns = monotonic_ns
+
+
+# Monotonic nanosecond clocks for durations. 'coarse' trades resolution (a few ms)
+# for a cheaper read on Linux and falls back to 'monotonic' elsewhere.
+CLOCKS: dict[str, Callable[[], int]] = {
+    'perf': perf_counter_ns,
+    'monotonic': monotonic_ns,
+    'coarse': _coarse_clock_ns,
+}
+
+# wall-clock time at each clock's zero, taken once, so timestamps never re-read the wall clock
+_CLOCK_ANCHORS_NS = {name: time_ns() - clock() for name, clock in CLOCKS.items()}
 
 
 class ErgoTimer:
-    """A timer that tracks elapsed wall-clock time.
+    """A timer that tracks elapsed time on a monotonic nanosecond clock.
 
     Supports named laps for marking stages of an operation.
     Can be used as a context manager, decorator, tag value, or event value.
 
+    Durations are stored as integer nanoseconds from `perf_counter_ns` by
+    default, so they never go negative or jump when the wall clock is
+    adjusted. Pass `clock='monotonic'` or `clock='coarse'` (cheaper, a few ms
+    of resolution) to pick another clock, or change the default for all
+    timers and events with `eg.set_clock()`.
+
+    With `metric='name'`, the total time of each `with` block and the time
+    between named laps (tagged `lap=<name>`) are recorded in `eg.metrics`.
+
     Usage:
         # Context manager with laps
         with eg.timer() as t:
@@ -126,19 +675,37 @@ class ErgoTimer:
             t.lap('process')
     """
 
-    def __init__(self, cb: Callable[[str], None] | None = None) -> None:
-        self.start = time()
+    default_clock = 'perf'
+
+    def __init__(self, cb: Callable[[str], None] | None = None, clock: str | None = None,
+                 metric: str | None = None) -> None:
+        self.clock = clock or self.default_clock
+        if self.clock not in CLOCKS:
+            raise ValueError(f"Invalid clock '{self.clock}'. Must be one of: {tuple(CLOCKS)}")
+        self._now_ns = CLOCKS[self.clock]
+        self._start_ns = self._now_ns()
         self.cb = cb
-        self._laps: dict[str, float] = {}
+        self.metric = metric
+        self._laps: dict[str, int] = {}
+        self._last_lap_ns = 0
 
     def __call__(self, wrapped):
-        """decorator"""
-
-        def wrapper(*args, **kwargs):
-            with self:
-                return wrapped(*args, **kwargs)
+        """decorator, for plain functions, coroutine functions and async generators"""
+        return _scoped(wrapped, self._begin, self._end, per_step=False)
 
-        return wrapper
+    def _begin(self) -> int:
+        self._start_ns = self._now_ns()
+        self._laps = {}
+        self._last_lap_ns = 0
+        return self._start_ns
+
+    def _end(self, start_ns: int, failed: bool = False) -> None:
+        # overlapping calls (concurrent tasks) each report their own duration
+        self._start_ns = start_ns
+        if self.metric is not None:
+            _METRICS.record_ns(self.metric, self._now_ns() - start_ns)
+        if self.cb is not None:
+            self.cb(f'{self.elapsed:.3f}')
 
     def __repr__(self):
         return f'{self.elapsed:.3f}'
@@ -149,19 +716,46 @@ class ErgoTimer:
     def __float__(self):
         return self.elapsed
 
+    def __ergo_value__(self) -> float:
+        return round(self.elapsed, 6)
+
+    def __ergo_display__(self, value: float) -> str:
+        # sub-millisecond spans in microseconds, rather than all showing as 0.000s
+        if value < 0.001:
+            return f'{value * 1e6:.0f}us'
+        return f'{value:.3f}s'
+
     def __enter__(self, *_):
-        self.start = time()
-        self._laps = {}
+        _enter_scope(self, self._begin())
         return self
 
     def __exit__(self, *_):
-        if self.cb is not None:
-            self.cb(f'{self.elapsed:.3f}')
+        self._end(_exit_scope(self))
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *_):
+        self.__exit__()
+
+    @property
+    def start(self) -> float:
+        """Wall-clock time (epoch seconds) at which the timer started."""
+        return (_CLOCK_ANCHORS_NS[self.clock] + self._start_ns) / 1e9
+
+    @start.setter
+    def start(self, value: float) -> None:
+        self._start_ns = round(value * 1e9) - _CLOCK_ANCHORS_NS[self.clock]
+
+    @property
+    def elapsed_ns(self) -> int:
+        """Current elapsed time in integer nanoseconds (always fresh)."""
+        return self._now_ns() - self._start_ns
 
     @property
     def elapsed(self) -> float:
         """Current elapsed time in seconds (always fresh)."""
-        return time() - self.start
+        return (self._now_ns() - self._start_ns) / 1e9
 
     def lap(self, name: str | None = None) -> float:
         """Return current elapsed time without stopping the timer.
@@ -175,17 +769,304 @@ class ErgoTimer:
         Returns:
             Elapsed time in seconds as a float.
         """
-        elapsed = self.elapsed
+        elapsed_ns = self._now_ns() - self._start_ns
         if name is not None:
-            self._laps[name] = elapsed
-        return elapsed
+            self._laps[name] = elapsed_ns
+            if self.metric is not None:
+                # a stage is the time since the previous named lap
+                _METRICS.record_ns(self.metric, elapsed_ns - self._last_lap_ns, lap=name)
+                self._last_lap_ns = elapsed_ns
+        return elapsed_ns / 1e9
 
     @property
     def laps(self) -> dict[str, float]:
         """Dictionary of named lap times (elapsed seconds from start)."""
+        return {name: elapsed_ns / 1e9 for name, elapsed_ns in self._laps.items()}
+
+    @property
+    def laps_ns(self) -> dict[str, int]:
+        """Dictionary of named lap times in integer nanoseconds from start."""
         return dict(self._laps)
 
 
+class ErgoHistogram:
+    """A log-linear (HDR-style) histogram of durations in integer nanoseconds.
+
+    Values below `2**PRECISION` ns get a bucket each; above that every power
+    of two is split into `2**(PRECISION - 1)` equal buckets, so a percentile
+    is within about 1.6% of the true value at any magnitude. Buckets are kept
+    sparsely, recording is O(1), and histograms merge by adding bucket
+    counts, across threads with `merge()` or across processes through
+    `to_dict()` / `from_dict()`.
+    """
+
+    PRECISION = 6
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max', '_lock')
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _bucket(cls, value: int) -> int:
+        shift = value.bit_length() - cls.PRECISION
+        if shift <= 0:
+            return value
+        return (shift << (cls.PRECISION - 1)) + (value >> shift)
+
+    @classmethod
+    def _bounds(cls, bucket: int) -> tuple[int, int]:
+        """Return the lowest and highest value that fall into `bucket`."""
+        if bucket < 1 << cls.PRECISION:
+            return bucket, bucket
+        shift = (bucket >> (cls.PRECISION - 1)) - 1
+        mantissa = bucket - (shift << (cls.PRECISION - 1))
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record_ns(self, value: int) -> None:
+        if type(value) is not int:
+            value = int(value)
+        if value < 0:
+            value = 0
+        shift = value.bit_length() - self.PRECISION
+        bucket = value if shift <= 0 else (shift << (self.PRECISION - 1)) + (value >> shift)
+        with self._lock:
+            self.counts[bucket] = self.counts.get(bucket, 0) + 1
+            if not self.count or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+            self.count += 1
+            self.total += value
+
+    def record(self, seconds: float) -> None:
+        self.record_ns(int(seconds * 1e9))
+
+    def merge(self, other: ErgoHistogram) -> ErgoHistogram:
+        """Add the counts of `other` to this histogram. Returns self."""
+        with other._lock:
+            counts, count, total, low, high = dict(other.counts), other.count, other.total, other.min, other.max
+        if not count:
+            return self
+        with self._lock:
+            for bucket, n in counts.items():
+                self.counts[bucket] = self.counts.get(bucket, 0) + n
+            self.min = low if not self.count else min(self.min, low)
+            self.max = max(self.max, high)
+            self.count += count
+            self.total += total
+        return self
+
+    def percentile_ns(self, q: float) -> int:
+        """Return the value at percentile `q` (0-100), by nearest rank."""
+        with self._lock:
+            if not self.count:
+                return 0
+            rank = max(1, ceil(self.count * q / 100))
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                if seen >= rank:
+                    low, high = self._bounds(bucket)
+                    return min(max((low + high) // 2, self.min), self.max)
+            return self.max
+
+    def summary(self, percentiles: tuple[float, ...] = (50, 90, 99, 99.9)) -> dict[str, Any]:
+        """Return count, min/mean/max and the given percentiles, in seconds."""
+        result: dict[str, Any] = {
+            'count': self.count,
+            'min_s': self.min / 1e9,
+            'mean_s': round(self.total / self.count / 1e9, 9) if self.count else 0.0,
+            'max_s': self.max / 1e9,
+        }
+        for q in percentiles:
+            result[f'p{q:g}_s'] = self.percentile_ns(q) / 1e9
+        return result
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable copy, for merging in another process."""
+        with self._lock:
+            return {'counts': sorted(self.counts.items()), 'count': self.count, 'total_ns': self.total,
+                    'min_ns': self.min, 'max_ns': self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ErgoHistogram:
+        histogram = cls()
+        histogram.counts = {int(bucket): n for bucket, n in data['counts']}
+        histogram.count = data['count']
+        histogram.total = data['total_ns']
+        histogram.min = data['min_ns']
+        histogram.max = data['max_ns']
+        return histogram
+
+
+class ErgoMetrics:
+    """A registry of latency histograms keyed by name and tags, available as `eg.metrics`.
+
+    Timers with `metric=`, events with `histogram=` and `eg.trace` record into
+    it; anything else can call `record()` directly.
+
+    Usage:
+        eg.metrics.record('db.query', 0.0123, table='users')
+        with eg.timer(metric='request') as t:
+            t.lap('fetch')       # also recorded as request[lap=fetch]
+        eg.metrics.snapshot()    # {'db.query[table=users]': {'count': 1, 'p99_s': ...}, ...}
+    """
+
+    PERCENTILES = (50, 90, 99, 99.9)
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple, ErgoHistogram] = {}
+        self._lock = threading.Lock()
+        # bumped by reset(), so callers holding a histogram know to look it up again
+        self._resets = 0
+
+    def histogram(self, name: str, **tags: Any) -> ErgoHistogram:
+        """Return the histogram for `name` and `tags`, creating it on first use."""
+        key = (name, *sorted((k, str(v)) for k, v in tags.items())) if tags else (name,)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, ErgoHistogram())
+        return histogram
+
+    def record(self, name: str, seconds: float, **tags: Any) -> None:
+        self.histogram(name, **tags).record_ns(int(seconds * 1e9))
+
+    def record_ns(self, name: str, value: int, **tags: Any) -> None:
+        self.histogram(name, **tags).record_ns(value)
+
+    @staticmethod
+    def _series(key: tuple) -> str:
+        name, *tags = key
+        return f'{name}[{", ".join(f"{k}={v}" for k, v in tags)}]' if tags else name
+
+    def snapshot(self, percentiles: tuple[float, ...] = PERCENTILES) -> dict[str, dict[str, Any]]:
+        """Return a summary (count, min/mean/max, percentiles in seconds) of every series."""
+        with self._lock:
+            items = list(self._histograms.items())
+        return {self._series(key): histogram.summary(percentiles) for key, histogram in sorted(items)}
+
+    def export(self) -> list[dict[str, Any]]:
+        """Return every series as JSON-serializable data, for `merge()` in another process."""
+        with self._lock:
+            items = list(self._histograms.items())
+        return [{'name': key[0], 'tags': dict(key[1:]), **histogram.to_dict()} for key, histogram in items]
+
+    def merge(self, other: ErgoMetrics | list[dict[str, Any]]) -> None:
+        """Add the histograms of another registry, or of its `export()`, to this one."""
+        if isinstance(other, ErgoMetrics):
+            with other._lock:
+                pairs = [(key[0], dict(key[1:]), histogram) for key, histogram in other._histograms.items()]
+        else:
+            pairs = [(series['name'], series['tags'], ErgoHistogram.from_dict(series)) for series in other]
+        for name, tags, histogram in pairs:
+            self.histogram(name, **tags).merge(histogram)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._resets += 1
+
+
+_METRICS = ErgoMetrics()
+
+
+def _level_number(name: str) -> int:
+    """Return the numeric level for a level name like 'error', rejecting unknown names."""
+    level = logging.getLevelName(name.upper())
+    if not isinstance(level, int):
+        names = tuple(n for n, _ in sorted(logging._nameToLevel.items(), key=lambda item: item[1]))
+        raise ValueError(f"Invalid level '{name}'. Must be one of: {names}")
+    return level
+
+
+def _will_handle(logger: logging.Logger, level: int) -> bool:
+    """Return True if a record at `level` from `logger` would reach at least one handler."""
+    if not logger.isEnabledFor(level):
+        return False
+
+    found = False
+    current: logging.Logger | None = logger
+    while current is not None:
+        for handler in current.handlers:
+            found = True
+            if level >= handler.level:
+                return True
+        current = current.parent if current.propagate else None  # type: ignore[assignment]
+
+    # with no handlers at all, stdlib logging falls back to logging.lastResort
+    return not found and logging.lastResort is not None and level >= logging.lastResort.level
+
+
+class ErgoEventMessage:
+    """The human-readable line for a wide event, rendered on first use.
+
+    Used as the record's `msg`, so `record.getMessage()` builds the
+    `' | '`-joined string only when a formatter needs it, and records that
+    every output filters out never pay for it.
+    """
+
+    __slots__ = ('context', 'duration', 'error', '_message')
+
+    def __init__(self, context: dict, duration: float, error: Exception | None = None) -> None:
+        self.context = context
+        self.duration = duration
+        self.error = error
+        self._message: str | None = None
+
+    def __str__(self):
+        if self._message is None:
+            parts = []
+            if self.error:
+                parts.append(f'{self.error.__class__.__name__}: {self.error}')
+
+            # Tags are already shown by the formatter, duration goes at the end
+            context_parts = [f'{k}={v}' for k, v in self.context.items() if k != 'tags' and k != 'duration_s']
+            if context_parts:
+                parts.append(' '.join(context_parts))
+
+            parts.append(f'duration={self.duration:.3f}s')
+            self._message = ' | '.join(parts)
+        return self._message
+
+    def __repr__(self):
+        return repr(str(self))
+
+
+class ErgoFormatMessage:
+    """The message of an `eg.debugf()`-style call, rendered on first use.
+
+    `msg` is a `str.format` template filled from `fields`, or a callable
+    returning the text. Either way nothing is rendered unless a formatter
+    calls `record.getMessage()`.
+    """
+
+    __slots__ = ('msg', 'fields', '_message')
+
+    def __init__(self, msg: str | Callable[[], str], fields: dict[str, Any]) -> None:
+        self.msg = msg
+        self.fields = fields
+        self._message: str | None = None
+
+    def __str__(self):
+        if self._message is None:
+            msg = self.msg
+            if callable(msg):
+                self._message = str(msg())
+            else:
+                self._message = msg.format(**self.fields)
+        return self._message
+
+    def __repr__(self):
+        return repr(str(self))
+
+
 class ErgoEvent:
     """Accumulate context for a wide event log.
 
@@ -212,33 +1093,87 @@ class ErgoEvent:
             # Event includes: pages=<final count>, duration=<final elapsed>,
             #                  page_1=<lap1>, page_2=<lap2>, ...
 
+    Usage with sampling (keep 1% of requests, but every slow or failed one):
+        with eg.event(sample_rate=0.01, sample_key=request_id, keep_slower_than=0.5) as e:
+            ...
+            # Dropped events skip context resolution and message building
+
+    Pools from `eg.executor()` add the queue-wait and run time of the tasks
+    submitted inside the event under the pool's name.
+
     After emit(), further calls to set() or emit() are ignored.
     """
 
-    def __init__(self, logger: 'ErgoLog', **initial_context) -> None:
+    # the innermost event entered as a context manager, for eg.executor() tasks
+    _current_var: ContextVar[ErgoEvent | None] = ContextVar('current_event', default=None)
+
+    def __init__(self, logger: 'ErgoLog', *, sample_rate: float | None = None, sample_key: Any = None,
+                 keep_slower_than: float | None = None, rollup: str | None = None, window: float = 10.0,
+                 histogram: str | None = None, **initial_context) -> None:
+        if rollup is not None and sample_rate is not None:
+            raise ValueError('rollup events are all counted, so they cannot also be sampled')
+        if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f'sample_rate must be between 0 and 1, got {sample_rate}')
         self._logger = logger
         self._context = dict(initial_context)
-        self._start = time()
+        self._now_ns = CLOCKS[ErgoTimer.default_clock]
+        self._start_ns = self._now_ns()
         self._emitted = False
         self._error: Exception | None = None
         self._level: int = logging.INFO
 
+        self._sample_rate = sample_rate
+        self._keep_slower_than = keep_slower_than
+        self._sampled = sample_rate is None or self._head_sample(sample_rate, sample_key)
+
+        # the initial context is the group key of a rollup, so it is kept as given
+        self._rollup = rollup
+        self._window = window
+        self._rollup_fields = initial_context if rollup is not None else None
+        self._histogram = histogram
+
+    @staticmethod
+    def _head_sample(rate: float, key: Any = None) -> bool:
+        """Decide whether to keep an event. With a key, the same key always gets the same answer."""
+        if key is None:
+            return random() < rate
+        return crc32(str(key).encode()) < rate * 0x1_0000_0000
+
+    @property
+    def sampled(self) -> bool:
+        """Whether the head sample kept this event (tail rules may still keep it at emit)."""
+        return self._sampled
+
     def __enter__(self):
+        flight = ErgoFlightRecorder.open_scope() if ErgoFlightRecorder.active else None
+        _enter_scope(self, (self._current_var.set(self), flight))
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type is not None and not self._emitted:
             self._error = exc_val
             self._level = logging.ERROR
-        if not self._emitted:
-            self.emit()
+        try:
+            if not self._emitted:
+                self.emit()
+        finally:
+            token, flight = _exit_scope(self)
+            self._current_var.reset(token)
+            if flight is not None:
+                ErgoFlightRecorder.close_scope(flight, exc_type is not None)
         return False  # Don't suppress exceptions
 
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
     def set(self, **context) -> 'ErgoEvent':
         """Add context to the event. Merges with existing context.
 
-        ErgoCounter and ErgoTimer values are stored by reference and
-        evaluated at emit time (showing their current/live values).
+        Live values (ErgoCounter, ErgoTimer, or anything defining
+        `__ergo_value__`) are stored by reference and evaluated at emit time.
 
         Named laps on timers are auto-collected into the event at emit time.
 
@@ -278,12 +1213,9 @@ class ErgoEvent:
 
     @staticmethod
     def _resolve_value(value):
-        """Resolve a value at emit time. Counters and timers evaluate live."""
-        if isinstance(value, ErgoCounter):
-            return value._value
-        if isinstance(value, ErgoTimer):
-            return value.elapsed
-        return value
+        """Resolve a value at emit time. Live values (counters, timers, gauges) evaluate now."""
+        hooks = _live(value)
+        return value if hooks is None else hooks[0](value)
 
     def _resolve_context(self) -> dict:
         """Build the final context dict, resolving live values and collecting laps."""
@@ -291,15 +1223,14 @@ class ErgoEvent:
         timer_laps = {}
 
         for key, value in self._context.items():
-            if isinstance(value, ErgoTimer):
-                resolved[key] = round(value.elapsed, 6)
-                # Auto-collect named laps from this timer
-                if value._laps:
-                    timer_laps.update(value._laps)
-            elif isinstance(value, ErgoCounter):
-                resolved[key] = value._value
-            else:
+            hooks = _live(value)
+            if hooks is None:
                 resolved[key] = value
+                continue
+            resolved[key] = hooks[0](value)
+            # Auto-collect named laps from timers
+            if isinstance(value, ErgoTimer) and value._laps:
+                timer_laps.update(value.laps)
 
         # Merge named laps into context (timer laps take precedence if collision)
         for lap_name, lap_time in timer_laps.items():
@@ -314,7 +1245,31 @@ class ErgoEvent:
             return
 
         self._emitted = True
-        duration_s = time() - self._start
+        duration_ns = self._now_ns() - self._start_ns
+        duration_s = duration_ns / 1e9
+
+        # Metrics see every event, before rollup and sampling
+        if self._histogram is not None:
+            _METRICS.record_ns(self._histogram, duration_ns)
+
+        # Rolled-up events are merged into their group's window summary instead of logged
+        if self._rollup is not None:
+            ErgoRollup.add(self._logger, self._rollup, self._rollup_fields, self._window,  # type: ignore[arg-type]
+                           duration_s, self._level >= logging.ERROR)
+            return
+
+        # Tail rules: warnings, errors and slow events are always kept
+        sample_rate = self._sample_rate
+        if sample_rate is not None:
+            slow = self._keep_slower_than is not None and duration_s > self._keep_slower_than
+            if self._level >= logging.WARNING or slow:
+                sample_rate = 1.0
+            elif not self._sampled:
+                return
+
+        # Skip resolving context entirely if nothing would accept the record
+        if not _will_handle(self._logger._logger, self._level):
+            return
 
         # Resolve live values (counters, timers) and collect laps
         final_context = self._resolve_context()
@@ -326,49 +1281,24 @@ class ErgoEvent:
         # Capture current tag stack if present
         tag_stack = ErgoTagger._tag_stack_var.get()
         if tag_stack:
-            tags_dict: dict[str, Any] = {}
-            for tag in tag_stack:
-                if isinstance(tag, tuple):
-                    key, value = tag
-                    if isinstance(value, ErgoTimer):
-                        tags_dict[key] = f'{value.elapsed:.3f}s'
-                    else:
-                        tags_dict[key] = str(value)
-                elif '=' in tag:
-                    key, val = tag.split('=', 1)
-                    tags_dict[key] = val
-                else:
-                    tags_dict[tag] = True
-            final_context['tags'] = tags_dict
+            final_context['tags'] = tag_stack.render()[2]
 
         # Include duration in the event context
         final_context['duration_s'] = round(duration_s, 6)
 
-        # Build message for default formatter
-        parts = []
-        if self._error:
-            parts.append(f'{self._error.__class__.__name__}: {self._error}')
-
-        # Format context for message
-        context_parts = []
-        for key, value in final_context.items():
-            if key == 'tags' or key == 'duration_s':
-                continue  # Tags already shown by formatter, duration at end
-            context_parts.append(f'{key}={value}')
-
-        if context_parts:
-            parts.append(' '.join(context_parts))
-
-        parts.append(f'duration={duration_s:.3f}s')
-
-        message = ' | '.join(parts)
-
         # Attach context to the log record
         extra = {
             'event': final_context,
             'duration': duration_s,
         }
 
+        # Downstream counts are re-weighted by 1 / sample_rate
+        if sample_rate is not None:
+            final_context['sample_rate'] = sample_rate
+            extra['sample_rate'] = sample_rate
+
+        # The message is only rendered if a formatter asks for it
+        message = ErgoEventMessage(final_context, duration_s, self._error)
         self._logger.log(self._level, message, extra=extra)
 
     @property
@@ -379,7 +1309,161 @@ class ErgoEvent:
     @property
     def duration(self) -> float:
         """Get elapsed time in seconds since event creation."""
-        return time() - self._start
+        return (self._now_ns() - self._start_ns) / 1e9
+
+
+class ErgoRollupGroup:
+    """Running statistics for one rollup group in the current window."""
+
+    __slots__ = ('logger', 'rollup', 'fields', 'window', 'start', 'count', 'errors', 'total', 'min', 'max', 'samples')
+
+    def __init__(self, logger: 'ErgoLog', rollup: str, fields: dict, window: float, start: float) -> None:
+        self.logger = logger
+        self.rollup = rollup
+        self.fields = fields
+        self.window = window
+        self.start = start
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.samples: list[float] = []
+
+    def add(self, duration: float, failed: bool) -> None:
+        self.count += 1
+        self.errors += failed
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        # reservoir sampling keeps a uniform sample of durations for the percentiles
+        if len(self.samples) < ErgoRollup.RESERVOIR_SIZE:
+            self.samples.append(duration)
+        else:
+            slot = int(random() * self.count)
+            if slot < ErgoRollup.RESERVOIR_SIZE:
+                self.samples[slot] = duration
+
+    def summary(self, now: float) -> dict[str, Any]:
+        samples = sorted(self.samples)
+
+        def percentile(q: float) -> float:
+            return round(samples[max(0, ceil(len(samples) * q) - 1)], 6)  # nearest rank
+
+        return {
+            'rollup': self.rollup,
+            **self.fields,
+            'count': self.count,
+            'errors': self.errors,
+            'duration_min': round(self.min, 6),
+            'duration_mean': round(self.total / self.count, 6),
+            'duration_p50': percentile(0.50),
+            'duration_p95': percentile(0.95),
+            'duration_max': round(self.max, 6),
+            'window_s': round(now - self.start, 3),
+        }
+
+
+class ErgoRollup:
+    """Merge high-frequency events into one summary event per group per window.
+
+    Events created with `eg.event(..., rollup='name', window=10)` are not
+    logged one by one. Events with the same logger, rollup name and initial
+    context form a group that tracks count, error count and duration
+    min/mean/p50/p95/max (percentiles from a fixed-size reservoir sample).
+    When a group's window has passed, one summary event goes through the
+    normal outputs. Windows are closed by the next event of the group or by
+    a daemon thread, and every open window is flushed at exit. At most
+    `MAX_GROUPS` groups are open; events beyond that are merged into one
+    `overflow=True` group per rollup name.
+    """
+
+    MAX_GROUPS = 1000
+    RESERVOIR_SIZE = 256
+    TICK = 1.0
+
+    _groups: dict[tuple, ErgoRollupGroup] = {}
+    _lock = threading.Lock()
+    _thread: threading.Thread | None = None
+
+    @classmethod
+    def add(cls, logger: 'ErgoLog', rollup: str, fields: dict, window: float, duration: float, failed: bool) -> None:
+        try:
+            key: tuple = (logger._name, rollup, *fields.items())
+            hash(key)
+        except TypeError:
+            key = (logger._name, rollup, *((k, repr(v)) for k, v in fields.items()))
+
+        now = monotonic_ns() / 1e9  # monotonic: a wall-clock step must not close or stretch a window
+        finished = None
+        with cls._lock:
+            group = cls._groups.get(key)
+            if group is not None and now - group.start >= group.window:
+                finished = cls._groups.pop(key)
+                group = None
+            if group is None:
+                if len(cls._groups) >= cls.MAX_GROUPS:
+                    key, fields = (logger._name, rollup, ('overflow', True)), {'overflow': True}
+                    group = cls._groups.get(key)
+                if group is None:
+                    group = cls._groups[key] = ErgoRollupGroup(logger, rollup, fields, window, now)
+            group.add(duration, failed)
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._run, name='ergolog-rollup', daemon=True)
+                cls._thread.start()
+
+        if finished is not None:
+            cls._emit(finished, now)
+
+    @classmethod
+    def flush(cls, logger_name: str | None = None, due_only: bool = False) -> None:
+        """Emit the summary of every open window (or only those that are due).
+
+        With `logger_name`, only windows of that logger and its child loggers are flushed.
+        """
+        now = monotonic_ns() / 1e9
+        with cls._lock:
+            finished = [
+                key for key, group in cls._groups.items()
+                if (logger_name is None or group.logger._name == logger_name
+                    or group.logger._name.startswith(f'{logger_name}.'))
+                and (not due_only or now - group.start >= group.window)
+            ]
+            groups = [cls._groups.pop(key) for key in finished]
+        for group in groups:
+            cls._emit(group, now)
+
+    @staticmethod
+    def _emit(group: ErgoRollupGroup, now: float) -> None:
+        logger = group.logger
+        if not _will_handle(logger._logger, logging.INFO):
+            return
+        context = group.summary(now)
+        window_s = context['window_s']
+        # a summary belongs to no request: don't pick up the tags of whichever thread closed the window
+        token = ErgoTagger._tag_stack_var.set(_EMPTY_TAG_STACK)
+        try:
+            logger.log(logging.INFO, ErgoEventMessage(context, window_s),
+                       extra={'event': context, 'duration': window_s})
+        finally:
+            ErgoTagger._tag_stack_var.reset(token)
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            sleep(cls.TICK)
+            try:
+                cls.flush(due_only=True)
+            except Exception:
+                pass
+
+
+@atexit.register
+def _flush_rollups() -> None:
+    try:
+        ErgoRollup.flush()
+    except Exception:
+        pass
 
 
 # --------------------------------------------------------------------------- #
@@ -418,29 +1502,243 @@ class C:
 
 class ErgoTagFilter(logging.Filter):
     def filter(self, record):
-        stack = ErgoTagger._tag_stack_var.get()
-        tag_strings = []
-        tag_list = []
-        for tag in stack:
-            if isinstance(tag, tuple):
-                key, value = tag
-                if isinstance(value, ErgoTimer):
-                    s = f'{key}={value.elapsed:.3f}s'
-                else:
-                    s = f'{key}={value}'
-                tag_strings.append(s)
-                tag_list.append(s)
-            else:
-                tag_strings.append(tag)
-                tag_list.append(tag)
+        # Already tagged by another ergolog handler, or snapshotted by an async output
+        if 'tag_list' in record.__dict__:
+            return True
+        tag_list, tags, tag_dict = ErgoTagger._tag_stack_var.get().render()
         record.tag_list = tag_list  # type: ignore[attr-defined]
-        record.tags = f'[{", ".join(tag_strings)}] ' if tag_strings else ''  # type: ignore[attr-defined]
+        record.tags = tags  # type: ignore[attr-defined]
+        record.tag_dict = tag_dict  # type: ignore[attr-defined]
+        return True
+
+
+class ErgoFlightBuffer:
+    """Records held back by a flight recorder for one tag or event scope."""
+
+    __slots__ = ('parent', 'records')
+
+    def __init__(self, parent: ErgoFlightBuffer | None) -> None:
+        self.parent = parent
+        # (sequence, record), created on the first held record
+        self.records: deque[tuple[int, logging.LogRecord]] | None = None
+
+    def hold(self, seq: int, record: logging.LogRecord, capacity: int) -> None:
+        if self.records is None:
+            self.records = deque(maxlen=capacity)
+        self.records.append((seq, record))
+
+    def flush(self) -> None:
+        """Send the held records of this scope and every enclosing scope to the outputs, in order."""
+        held: list[tuple[int, logging.LogRecord]] = []
+        node: ErgoFlightBuffer | None = self
+        while node is not None:
+            if node.records:
+                held.extend(node.records)
+                node.records.clear()
+            node = node.parent
+        held.sort(key=lambda item: item[0])
+        for _, record in held:
+            # callHandlers skips logger filters, so the recorder does not see these again
+            logging.getLogger(record.name).callHandlers(record)
+
+
+class ErgoFlightRecorder(logging.Filter):
+    """Hold back low-level records inside tag and event scopes until an error happens there.
+
+    Installed as a logger filter by `eg.config.set_flight_recorder()`. Inside
+    an `eg.tag` or `eg.event` scope, records below `level` are snapshotted
+    (tags included) and kept unformatted in a bounded buffer for that scope
+    instead of reaching the outputs. A record at `flush_level` or above sends
+    the held records of the current scope and its enclosing scopes to the
+    outputs first, in order. A scope that exits cleanly discards its records;
+    one that exits with an exception passes them to the enclosing scope, in
+    case the error is logged there. Records outside any scope, and wide
+    events themselves, are never held.
+    """
+
+    # scopes only open buffers while at least one recorder is installed
+    active = 0
+    _buffer_var: ContextVar[ErgoFlightBuffer | None] = ContextVar('flight_buffer', default=None)
+    _seq = count()
+
+    def __init__(self, level: int = logging.WARNING, flush_level: int = logging.ERROR,
+                 capacity: int = 1000) -> None:
+        super().__init__()
+        self.level = level
+        self.flush_level = flush_level
+        self.capacity = capacity
+
+    @classmethod
+    def open_scope(cls) -> tuple[ErgoFlightBuffer, Any]:
+        buffer = ErgoFlightBuffer(cls._buffer_var.get())
+        return buffer, cls._buffer_var.set(buffer)
+
+    @classmethod
+    def close_scope(cls, scope: tuple[ErgoFlightBuffer, Any], failed: bool) -> None:
+        buffer, token = scope
+        cls._buffer_var.reset(token)
+        if failed and buffer.records and buffer.parent is not None:
+            for seq, record in buffer.records:
+                buffer.parent.hold(seq, record, buffer.records.maxlen or 0)
+
+    def filter(self, record):
+        buffer = self._buffer_var.get()
+        if buffer is None:
+            return True
+        # wide events are the summary of a scope, so they are never held back
+        if record.levelno < self.level and not isinstance(record.msg, ErgoEventMessage):
+            if 'tag_list' not in record.__dict__:
+                record.tag_list, record.tags, record.tag_dict = ErgoTagger._tag_stack_var.get().render()
+            buffer.hold(next(self._seq), record, self.capacity)
+            return False
+        if record.levelno >= self.flush_level:
+            buffer.flush()
         return True
 
 
+class ErgoRateLimiter(logging.Filter):
+    """Limit each call site to `rate` records per second, with bursts of up to `burst`.
+
+    A call site is the logger name plus the file and line of the logging
+    call, and each site has its own token bucket, refilled from
+    `record.created` so no clock is read. Records over the limit are only
+    counted, never formatted. Once `window` seconds have passed since the
+    first suppressed record, a summary is written at the same level and
+    location: `suppressed 12345 similar messages in 10s`. Windows are closed
+    by the next record from that site or by a daemon thread, so a burst
+    followed by silence is still reported; `flush()` (at exit and on
+    `eg.config.flush()`) closes them early.
+
+    Used as a handler filter it limits one output, and the summary goes to
+    that output only; used as a logger filter it limits every output.
+    """
+
+    TICK = 1.0
+
+    _instances: WeakSet[ErgoRateLimiter] = WeakSet()
+    _thread: threading.Thread | None = None
+    _thread_lock = threading.Lock()
+
+    def __init__(self, rate: float, burst: int = 10, window: float = 10.0,
+                 handler: logging.Handler | None = None) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.window = window
+        self.handler = handler
+        # site -> [tokens, last refill, suppressed count, first suppressed at, last suppressed record]
+        self._sites: dict[tuple[str, str, int], list] = {}
+        self._lock = threading.Lock()
+        ErgoRateLimiter._instances.add(self)
+
+    def filter(self, record):
+        if 'suppressed' in record.__dict__:  # our own summary
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = record.created
+        summary = None
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                self._sites[key] = [self.burst - 1, now, 0, now, None]
+                return True
+            tokens = min(self.burst, site[0] + (now - site[1]) * self.rate)
+            site[1] = now
+            if site[2] and now - site[3] >= self.window:
+                summary = self._take_summary(site, now)
+            if tokens >= 1:
+                site[0] = tokens - 1
+                allowed = True
+            else:
+                site[0] = tokens
+                if not site[2]:
+                    site[3] = now
+                site[2] += 1
+                site[4] = record
+                allowed = False
+        if summary is not None:
+            self._emit(summary)
+        if not allowed and ErgoRateLimiter._thread is None:
+            self._start_ticker()
+        return allowed
+
+    def flush(self, due_only: bool = False) -> None:
+        """Write a summary for every site with suppressed records (or only those whose window has closed)."""
+        now = time_ns() / 1e9
+        with self._lock:
+            summaries = [
+                self._take_summary(site, now) for site in self._sites.values()
+                if site[2] and (not due_only or now - site[3] >= self.window)
+            ]
+        for summary in summaries:
+            self._emit(summary)
+
+    @classmethod
+    def _start_ticker(cls) -> None:
+        with cls._thread_lock:
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._run, name='ergolog-rate-limit', daemon=True)
+                cls._thread.start()
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            sleep(cls.TICK)
+            for limiter in list(cls._instances):
+                try:
+                    limiter.flush(due_only=True)
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _take_summary(site: list, now: float) -> logging.LogRecord:
+        count, record = site[2], site[4]
+        site[2], site[4] = 0, None
+        summary = logging.LogRecord(
+            record.name, record.levelno, record.pathname, record.lineno,
+            'suppressed %d similar messages in %.0fs', (count, now - site[3]), None, record.funcName,
+        )
+        summary.suppressed = count  # type: ignore[attr-defined]
+        return summary
+
+    def _emit(self, summary: logging.LogRecord) -> None:
+        if self.handler is not None:
+            self.handler.handle(summary)
+        else:
+            logging.getLogger(summary.name).handle(summary)
+
+
+@atexit.register
+def _flush_rate_limiters() -> None:
+    # atexit runs hooks last-in first-out, so this runs before logging.shutdown() closes the outputs
+    for limiter in list(ErgoRateLimiter._instances):
+        try:
+            limiter.flush()
+        except Exception:
+            pass
+
+
+def _reset_after_fork() -> None:
+    # a forked child inherits the parent's open rollup windows and suppressed counts, which the
+    # parent still writes itself, and ticker threads that don't exist in the child
+    ErgoRollup._groups = {}
+    ErgoRollup._lock = threading.Lock()
+    ErgoRollup._thread = None
+    for limiter in list(ErgoRateLimiter._instances):
+        limiter._sites = {}
+        limiter._lock = threading.Lock()
+    ErgoRateLimiter._thread = None
+    ErgoRateLimiter._thread_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):  # not on Windows, which never forks
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 class ErgoFormatter(logging.Formatter):
     _time = '' if NO_TIME else C.dim('%(asctime)s ')
-    _meta = C.dim(' %(name)s') + ' %(tags)s' + C.dim('(%(filename)s:%(lineno)d) ')
+    _location = C.dim('(%(filename)s:%(lineno)d) ')
+    _meta = C.dim(' %(name)s') + ' %(tags)s' + _location
 
     FORMATS = {
         10: _time + C.apply('[DEBUG   ]', C.BLUE) + _meta + '%(message)s',
@@ -450,10 +1748,34 @@ class ErgoFormatter(logging.Formatter):
         50: _time + C.apply('[CRITICAL]', C.MAGENTA) + _meta + '%(message)s',
     }
 
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno, '')
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+    def __init__(self, fmt=None, datefmt=None, style: str = '%', location: bool = True):
+        super().__init__(fmt=fmt, datefmt=datefmt, style=style)  # type: ignore[arg-type]
+        formats = self.FORMATS if location else {
+            level: log_fmt.replace(self._location, '') for level, log_fmt in self.FORMATS.items()
+        }
+        # parse and validate each level's format once, instead of once per record
+        self._styles = {level: logging.PercentStyle(log_fmt) for level, log_fmt in formats.items()}
+        self._styles_default = logging.PercentStyle('%(message)s')
+        self._uses_time = any(style.usesTime() for style in self._styles.values())
+        self._asctime_cache: tuple[int, str] = (-1, '')
+
+    def usesTime(self):
+        return self._uses_time
+
+    def formatMessage(self, record):
+        return self._styles.get(record.levelno, self._styles_default).format(record)
+
+    def formatTime(self, record, datefmt=None):
+        """Format the record time, rendering the date and time at most once per second."""
+        if datefmt or not self.default_msec_format:
+            return super().formatTime(record, datefmt)
+
+        second = int(record.created)
+        cached_second, asctime = self._asctime_cache
+        if second != cached_second:
+            asctime = strftime(self.default_time_format, self.converter(record.created))
+            self._asctime_cache = (second, asctime)
+        return self.default_msec_format % (asctime, record.msecs)
 
 
 class ErgoJSONFormatter(logging.Formatter):
@@ -467,63 +1789,1033 @@ class ErgoJSONFormatter(logging.Formatter):
         - level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         - name (logger name)
         - message
-        - tags (dict of tag key: value)
+        - tags (record.tag_dict: tag key to native value)
+        - fields (keyword fields from eg.infof() and friends)
         - event (wide event context if present)
         - duration (seconds if timed operation)
-        - location (file, line, function)
+        - location (file, line, function), unless created with location=False
+
+    Values JSON can't represent (paths, decimals, user objects) are written as str().
 
     Add via ErgoConfig:
         eg.config.add_output("file", path="app.jsonl", format="json")
     """
 
-    def __init__(self, fmt=None, datefmt=None, style: str = '%'):
+    # bound on each fragment cache, in case tag values or call sites are unbounded
+    CACHE_SIZE = 1024
+
+    def __init__(self, fmt=None, datefmt=None, style: str = '%', location: bool = True):
         super().__init__(fmt=fmt, datefmt=datefmt, style=style)  # type: ignore[arg-type]
+        self.location = location
+        self._timestamp_cache: tuple[int, str] = (-1, '')
+        self._header_cache: dict[tuple[str, str], str] = {}
+        self._location_cache: dict[tuple[str, int, str | None], str] = {}
+
+    def _timestamp(self, created: float) -> str:
+        """ISO 8601 UTC timestamp, identical to datetime.fromtimestamp(created, tz=utc).isoformat()."""
+        second = int(created)
+        # same microsecond rounding as datetime.fromtimestamp (round half to even)
+        micro = round((created - second) * 1e6)
+        if micro >= 1_000_000:
+            second, micro = second + 1, micro - 1_000_000
+        elif micro < 0:
+            second, micro = second - 1, micro + 1_000_000
+
+        cached_second, prefix = self._timestamp_cache
+        if second != cached_second:
+            prefix = strftime('{"timestamp":"%Y-%m-%dT%H:%M:%S', gmtime(second))
+            self._timestamp_cache = (second, prefix)
+
+        if micro:
+            return '%s.%06d+00:00"' % (prefix, micro)
+        return prefix + '+00:00"'
+
+    def _remember(self, cache: dict, key, fragment: str) -> str:
+        if len(cache) >= self.CACHE_SIZE:
+            cache.clear()
+        cache[key] = fragment
+        return fragment
 
     def format(self, record):
-        import json
-        from datetime import datetime, timezone
-
-        obj: dict[str, Any] = {
-            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
-            'level': record.levelname,
-            'name': record.name,
-            'message': record.getMessage(),
-        }
+        attrs = record.__dict__
+
+        # level and logger name only vary per logger, so their encoded fragment is reused
+        key = (record.levelname, record.name)
+        header = self._header_cache.get(key)
+        if header is None:
+            header = self._header_cache[key] = f',"level":{_json_str(key[0])},"name":{_json_str(key[1])}'
+
+        parts = [self._timestamp(record.created), header]
+
+        # a wide event's message line is rendered here, on the first getMessage() call
+        parts.append(',"message":' + _json_str(record.getMessage()))
 
         # Include tags if present
-        tag_list = getattr(record, 'tag_list', None)  # type: ignore[attr-defined]
-        if tag_list:
-            tags_dict = {}
-            for tag in tag_list:
-                if '=' in tag:
-                    key, val = tag.split('=', 1)
-                    tags_dict[key] = val
-                else:
-                    tags_dict[tag] = True
-            obj['tags'] = tags_dict
+        tag_dict = attrs.get('tag_dict')
+        if tag_dict:
+            parts.append(',"tags":' + _json_dumps(tag_dict))
+
+        # Include structured fields from eg.infof() and friends
+        fields = attrs.get('fields')
+        if fields:
+            parts.append(',"fields":' + _json_dumps(fields))
 
         # Include event context if present (wide events)
-        event = getattr(record, 'event', None)  # type: ignore[attr-defined]
+        event = attrs.get('event')
         if event:
-            obj['event'] = event
+            parts.append(',"event":' + _json_dumps(event))
 
         # Include duration if present (timers/events)
-        duration = getattr(record, 'duration', None)  # type: ignore[attr-defined]
+        duration = attrs.get('duration')
         if duration is not None:
-            obj['duration_s'] = round(duration, 6)
+            duration = round(duration, 6)
+            parts.append(',"duration_s":')
+            parts.append(float.__repr__(duration) if type(duration) is float else _json_dumps(duration))
 
         # Include error info if present
-        if record.exc_info:
-            obj['error'] = self.formatException(record.exc_info)
+        # records from worker processes carry only the formatted exc_text
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            parts.append(',"error":' + _json_str(record.exc_text))
 
         # Include location
-        obj['location'] = {
-            'file': record.filename,
-            'line': record.lineno,
-            'function': record.funcName,
-        }
+        if self.location:
+            key = (record.filename, record.lineno, record.funcName)
+            location = self._location_cache.get(key)
+            if location is None:
+                function = _json_str(key[2]) if key[2] is not None else 'null'
+                location = self._remember(self._location_cache, key, (
+                    f',"location":{{"file":{_json_str(key[0])},"line":{key[1]},"function":{function}}}}}'
+                ))
+            parts.append(location)
+        else:
+            parts.append('}')
+
+        return ''.join(parts)
+
+
+class ErgoBufferedHandler(logging.StreamHandler):
+    """Accumulate encoded records in a preallocated buffer and write them in one call.
+
+    Records are encoded into a fixed-size bytearray. The buffer is written to
+    the underlying binary stream with a single write when it fills up, when a
+    record at `flush_level` or above arrives, when `flush_interval` seconds
+    have passed, and on flush/close. A daemon thread enforces the interval
+    while the program is idle.
+    """
+
+    def __init__(self, stream=None, buffer_bytes: int = 64 * 1024, flush_interval: float = 1.0,
+                 flush_level: int = logging.ERROR, owns_stream: bool = False) -> None:
+        super().__init__(stream)
+        self.flush_level = flush_level
+        self.flush_interval = flush_interval
+        self.owns_stream = owns_stream
+        self.encoding = getattr(self.stream, 'encoding', None) or 'utf-8'
+        self.errors = getattr(self.stream, 'errors', None) or 'backslashreplace'
+        self._buffer = bytearray(buffer_bytes)
+        self._view = memoryview(self._buffer)
+        self._used = 0
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        if flush_interval:
+            self._thread = threading.Thread(target=self._run, name='ergolog-flusher', daemon=True)
+            self._thread.start()
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + self.terminator).encode(self.encoding, self.errors)
+        except Exception:
+            self.handleError(record)
+            return
+
+        size = len(data)
+        try:
+            if self._used + size > len(self._buffer):
+                self._write_buffer()
+            if size > len(self._buffer):
+                self._write(data)
+            else:
+                self._buffer[self._used:self._used + size] = data
+                self._used += size
+            if record.levelno >= self.flush_level:
+                self._write_buffer()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        with self.lock:  # type: ignore[union-attr]
+            self._write_buffer()
+
+    def close(self):
+        # the flusher thread may be waiting on our lock, so it is signalled rather than joined
+        self._stop.set()
+        try:
+            self.flush()
+            if self.owns_stream:
+                self.stream.close()
+        finally:
+            super().close()
+
+    def _write_buffer(self):
+        if self._used:
+            used, self._used = self._used, 0
+            self._write(self._view[:used])
+
+    def _write(self, data):
+        stream = self.stream
+        binary = getattr(stream, 'buffer', None)
+        if binary is None:
+            stream.write(bytes(data).decode(self.encoding, self.errors))
+            stream.flush()
+            return
+        # anything already written through the text layer must come first
+        stream.flush()
+        binary.write(data)
+        binary.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+
+# renders tracebacks for handlers that have no formatter of their own
+_EXC_FORMATTER = logging.Formatter()
+
+
+class ErgoAsyncHandler(logging.Handler):
+    """Hand records to a background writer thread through a bounded queue.
+
+    The calling thread only runs the filters (so tags, counters and timers are
+    snapshotted when the record is created) and enqueues the record. The writer
+    thread formats and writes records in batches, using a single write and
+    flush per batch for stream and file outputs.
+
+    When the queue is full, logging calls block until the writer catches up.
+    Queued records are written when the handler is flushed or closed, which
+    `logging.shutdown()` does at interpreter exit; records logged after
+    close() are dropped.
+    """
+
+    def __init__(self, target: logging.Handler, queue_size: int = 10_000, batch_size: int = 512) -> None:
+        super().__init__()
+        self.target = target
+        self.batch_size = batch_size
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='ergolog-writer', daemon=True)
+        self._thread.start()
+
+    # formatting happens on the writer thread, so the formatter lives on the target
+    @property
+    def formatter(self):  # type: ignore[override]
+        return self.target.formatter
+
+    @formatter.setter
+    def formatter(self, fmt):
+        if hasattr(self, 'target'):
+            self.target.formatter = fmt
+
+    def emit(self, record):
+        # handle() holds self.lock around emit(), and close() takes it too, so nothing
+        # is queued behind the writer's stop marker
+        if self._closed:
+            return
+        # args and fields may be mutated by the caller after this returns, so merge them now
+        if record.args or isinstance(record.msg, ErgoFormatMessage):
+            record.msg = record.getMessage()
+            record.args = None
+        # the traceback's frames may change once the caller moves on, so render it here
+        if record.exc_info and not record.exc_text:
+            record.exc_text = (self.formatter or _EXC_FORMATTER).formatException(record.exc_info)
+        self.queue.put(record)
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        if not self._closed:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        with self.lock:  # type: ignore[union-attr]
+            closing = not self._closed
+            if closing:
+                self._closed = True
+                self.queue.put(None)
+        if closing:
+            self._thread.join()
+            self.target.close()
+        super().close()
+
+    def _run(self):
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not None]
+            try:
+                self._write(records)
+            finally:
+                for _ in batch:
+                    q.task_done()
+
+            if len(records) != len(batch):
+                return
+
+    def _write(self, records: list[logging.LogRecord]) -> None:
+        target = self.target
+        plain = type(target) in (logging.StreamHandler, logging.FileHandler)
+        if not plain or target.stream is None:  # type: ignore[attr-defined]
+            for record in records:
+                target.handle(record)
+            return
+
+        lines = []
+        for record in records:
+            if record.levelno < target.level or not target.filter(record):
+                continue
+            try:
+                lines.append(target.format(record) + target.terminator)  # type: ignore[attr-defined]
+            except Exception:
+                target.handleError(record)
+
+        if lines:
+            with target.lock:  # type: ignore[union-attr]
+                try:
+                    target.stream.write(''.join(lines))  # type: ignore[attr-defined]
+                    target.flush()
+                except Exception:
+                    target.handleError(records[-1])
+
+
+class ErgoRotatingFileHandler(logging.FileHandler):
+    """A file output that rotates by size or time and compresses old segments in the background.
+
+    Records are always written to `filename`. When it reaches `max_bytes`, or
+    when the current `rotate_every`-second interval (aligned to the epoch, so
+    3600 rotates on the hour) ends, the file is renamed to
+    `<stem>.<UTC start time><suffix>` and a fresh one is opened. Everything
+    else happens on a background thread: the finished segment is compressed
+    with gzip or lzma, retention (`backup_count` segments and/or
+    `max_total_bytes` across segments) is enforced, and the manifest
+    `<filename>.manifest.json` is rewritten. The manifest lists each retained
+    segment with the times of its first and last record.
+    """
+
+    COMPRESSORS: dict[str, tuple[str, Callable[..., Any]]] = {'gzip': ('.gz', gzip.open)}
+    if lzma is not None:
+        COMPRESSORS['lzma'] = ('.xz', lzma.open)
+
+    def __init__(self, filename: str, mode: str = 'a', encoding: str | None = 'utf-8', *,
+                 max_bytes: int | None = None, rotate_every: float | None = None,
+                 compress: str | None = None, backup_count: int | None = None,
+                 max_total_bytes: int | None = None) -> None:
+        if compress is not None and compress not in self.COMPRESSORS:
+            raise ValueError(f"Invalid compression '{compress}'. Must be one of: {tuple(self.COMPRESSORS)}")
+        super().__init__(filename, mode, encoding)
+        self.max_bytes = max_bytes
+        self.rotate_every = rotate_every
+        self.compress = compress
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self.manifest_path = self.baseFilename + '.manifest.json'
+        self._dir = os.path.dirname(self.baseFilename)
+
+        # segments are appended on the logging thread and compressed/dropped on the worker
+        self._manifest_lock = threading.Lock()
+        self._segments: list[dict[str, Any]] = []
+        self._first: float | None = None
+        self._last: float | None = None
+        self._load_manifest()
+        # the interval of the active segment follows from its first record
+        self._rollover_at = self._next_rollover(self._first) if self._first is not None else float('inf')
+
+        self._tasks: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='ergolog-rotator', daemon=True)
+        self._worker.start()
+        # segments left uncompressed by a previous process
+        for segment in self._segments:
+            if compress and not segment['compressed']:
+                self._tasks.put(segment)
+
+    def _open(self):
+        stream = super()._open()
+        # size of the active file, kept up to date in emit() rather than asking the stream per record
+        self._bytes = stream.seek(0, os.SEEK_END)
+        return stream
+
+    def emit(self, record):
+        try:
+            if self._first is not None and self._should_rollover(record):
+                self._rollover()
+            if self._first is None:
+                self._first = record.created
+                self._rollover_at = self._next_rollover(record.created)
+            self._last = record.created
+            if self.stream is None:
+                self.stream = self._open()
+            msg = self.format(record) + self.terminator
+            self.stream.write(msg)
+            self.flush()
+            self._bytes += len(msg) if msg.isascii() else len(msg.encode(self.encoding or 'utf-8', 'replace'))
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _should_rollover(self, record: logging.LogRecord) -> bool:
+        if record.created >= self._rollover_at:
+            return True
+        if not self.max_bytes:
+            return False
+        return self._bytes >= self.max_bytes
+
+    def _rollover(self) -> None:
+        """Close the active file, hand it to the worker as a segment, and open a new one."""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None  # type: ignore[assignment]
+
+        if self._first is not None and os.path.getsize(self.baseFilename):
+            path = self._segment_path(self._first)
+            os.replace(self.baseFilename, path)
+            segment = {
+                'file': os.path.basename(path),
+                'start': self._first,
+                'end': self._last,
+                'bytes': os.path.getsize(path),
+                'compressed': None,
+            }
+            with self._manifest_lock:
+                self._segments.append(segment)
+            self._tasks.put(segment)
+
+        self._first = self._last = None
+        self._rollover_at = float('inf')
+        self.stream = self._open()
+
+    def close(self):
+        super().close()
+        # finish in-flight compression so no segment is left half-written at exit
+        if self._worker.is_alive():
+            self._tasks.put(None)
+            self._worker.join()
+        self._write_manifest()
+
+    def _next_rollover(self, start: float) -> float:
+        if not self.rotate_every:
+            return float('inf')
+        return (start // self.rotate_every + 1) * self.rotate_every
+
+    def _segment_path(self, start: float) -> str:
+        root, ext = os.path.splitext(self.baseFilename)
+        stamp = strftime('%Y%m%dT%H%M%S', gmtime(start))
+        suffixes = [''] + [suffix for suffix, _ in self.COMPRESSORS.values()]
+
+        # number past the highest kept segment with this stamp rather than the first free name,
+        # which retention may have freed, so segments with one stamp are numbered in write order
+        prefix = f'{os.path.basename(root)}.{stamp}'
+        n = -1
+        with self._manifest_lock:
+            for segment in self._segments:
+                name = segment['file']
+                if not name.startswith(prefix):
+                    continue
+                number = name[len(prefix):].split('.', 1)[0]
+                if number.startswith('-') and number[1:].isdigit():
+                    n = max(n, int(number[1:]))
+                elif not number:
+                    n = max(n, 0)
+        n += 1
+        candidate = f'{root}.{stamp}-{n}{ext}' if n else f'{root}.{stamp}{ext}'
+        while any(os.path.exists(candidate + suffix) for suffix in suffixes):
+            n += 1
+            candidate = f'{root}.{stamp}-{n}{ext}'
+        return candidate
+
+    def _run(self):
+        while True:
+            segment = self._tasks.get()
+            try:
+                if segment is None:
+                    return
+                if self.compress:
+                    self._compress(segment)
+                self._apply_retention()
+                self._write_manifest()
+            except Exception:
+                pass  # the segment stays uncompressed and is retried by the next process
+            finally:
+                self._tasks.task_done()
+
+    def _compress(self, segment: dict[str, Any]) -> None:
+        with self._manifest_lock:
+            if segment not in self._segments:
+                return
+        suffix, opener = self.COMPRESSORS[self.compress]  # type: ignore[index]
+        source = os.path.join(self._dir, segment['file'])
+        partial = source + suffix + '.tmp'
+        with open(source, 'rb') as src, opener(partial, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(partial, source + suffix)
+        os.remove(source)
+        with self._manifest_lock:
+            segment['file'] += suffix
+            segment['bytes'] = os.path.getsize(source + suffix)
+            segment['compressed'] = self.compress
+
+    def _apply_retention(self) -> None:
+        with self._manifest_lock:
+            segments = self._segments
+            dropped = []
+            if self.backup_count is not None:
+                while len(segments) > self.backup_count:
+                    dropped.append(segments.pop(0))
+            if self.max_total_bytes is not None:
+                total = sum(segment['bytes'] for segment in segments)
+                while segments and total > self.max_total_bytes:
+                    segment = segments.pop(0)
+                    total -= segment['bytes']
+                    dropped.append(segment)
+        for segment in dropped:
+            try:
+                os.remove(os.path.join(self._dir, segment['file']))
+            except FileNotFoundError:
+                pass
+
+    def _load_manifest(self) -> None:
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._segments = [
+            segment for segment in manifest.get('segments', [])
+            if os.path.exists(os.path.join(self._dir, segment['file']))
+        ]
+        active = manifest.get('active') or {}
+        if active.get('start') is not None and os.path.exists(self.baseFilename) \
+                and os.path.getsize(self.baseFilename):
+            self._first, self._last = active['start'], active.get('end')
+
+    def _write_manifest(self) -> None:
+        with self._manifest_lock:
+            manifest = {
+                'active': {'file': os.path.basename(self.baseFilename), 'start': self._first, 'end': self._last},
+                'segments': self._segments,
+            }
+            partial = self.manifest_path + '.tmp'
+            with open(partial, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+                f.write('\n')
+            os.replace(partial, self.manifest_path)
+
+
+class ErgoRingHandler(logging.Handler):
+    """Write records into a fixed-size memory-mapped file used as a circular buffer.
+
+    The file is a small header followed by `ring_bytes` of data. Each record
+    is framed as (magic, length, sequence number, crc32) plus its UTF-8 text
+    and copied into the mapping, wrapping around at the end, so after setup a
+    record costs no syscalls and the file never grows. The mapping is shared
+    with the OS page cache, so the newest records survive a crash or SIGKILL
+    of the process (not a power loss). Read them back, oldest first, with
+    `python -m ergolog ring dump <file>` or `ErgoRingHandler.read()`.
+    """
+
+    MAGIC = b'ERGORNG1'
+    HEADER = struct.Struct('<8sQQQ')  # magic, data size, write offset, next sequence number
+    HEADER_SIZE = 64
+    FRAME = struct.Struct('<4sIQI')  # frame magic, payload length, sequence number, crc32 of payload
+    FRAME_MAGIC = b'\x1eERG'
+
+    def __init__(self, filename: str, ring_bytes: int = 16 * 1024 * 1024) -> None:
+        super().__init__()
+        if ring_bytes <= self.FRAME.size:
+            raise ValueError(f'ring_bytes must be larger than {self.FRAME.size}')
+        self.baseFilename = os.path.abspath(filename)
+        self.size = ring_bytes
+
+        fd = os.open(self.baseFilename, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            total = self.HEADER_SIZE + ring_bytes
+            if os.fstat(fd).st_size != total:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, total)
+            self._map = mmap.mmap(fd, total)
+        finally:
+            os.close(fd)
+
+        # an existing ring of the same size is continued, anything else starts over
+        magic, size, offset, seq = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or size != ring_bytes or offset >= ring_bytes:
+            offset, seq = 0, 0
+            self.HEADER.pack_into(self._map, 0, self.MAGIC, ring_bytes, offset, seq)
+        self._offset = offset
+        self._seq = seq
+
+    def emit(self, record):
+        try:
+            payload = self.format(record).encode('utf-8', 'backslashreplace')[:self.size - self.FRAME.size]
+            frame = self.FRAME.pack(self.FRAME_MAGIC, len(payload), self._seq, crc32(payload)) + payload
+            self._put(frame)
+            self._seq += 1
+            # the header is written after the frame, so it never points past a torn record
+            self.HEADER.pack_into(self._map, 0, self.MAGIC, self.size, self._offset, self._seq)
+        except Exception:
+            self.handleError(record)
+
+    def _put(self, frame: bytes) -> None:
+        start = self.HEADER_SIZE + self._offset
+        tail = self.size - self._offset
+        if len(frame) <= tail:
+            self._map[start:start + len(frame)] = frame
+        else:
+            self._map[start:start + tail] = frame[:tail]
+            self._map[self.HEADER_SIZE:self.HEADER_SIZE + len(frame) - tail] = frame[tail:]
+        self._offset = (self._offset + len(frame)) % self.size
+
+    def flush(self):
+        """Write the mapping to disk; only needed to survive a power loss."""
+        with self.lock:  # type: ignore[union-attr]
+            if not self._map.closed:
+                self._map.flush()
+
+    def close(self):
+        with self.lock:  # type: ignore[union-attr]
+            if not self._map.closed:
+                self._map.flush()
+                self._map.close()
+        super().close()
+
+    @classmethod
+    def read(cls, filename: str) -> list[tuple[int, str]]:
+        """Return the intact records in a ring file as `(sequence, text)`, oldest first."""
+        with open(filename, 'rb') as f:
+            data = f.read()
+        if len(data) < cls.HEADER_SIZE:
+            raise ValueError(f'{filename} is not an ergolog ring file')
+        magic, size, offset, next_seq = cls.HEADER.unpack_from(data, 0)
+        if magic != cls.MAGIC or len(data) < cls.HEADER_SIZE + size or offset >= size:
+            raise ValueError(f'{filename} is not an ergolog ring file')
+
+        # rotate the ring so the oldest byte comes first and no frame straddles the end
+        region = data[cls.HEADER_SIZE:cls.HEADER_SIZE + size]
+        ring = region[offset:] + region[:offset]
+
+        records: dict[int, str] = {}
+        frame_size = cls.FRAME.size
+        pos = ring.find(cls.FRAME_MAGIC)
+        while pos != -1 and pos + frame_size <= len(ring):
+            _, length, seq, checksum = cls.FRAME.unpack_from(ring, pos)
+            payload = ring[pos + frame_size:pos + frame_size + length]
+            if len(payload) == length and seq < next_seq and crc32(payload) == checksum:
+                records[seq] = payload.decode('utf-8', 'replace')
+                pos = ring.find(cls.FRAME_MAGIC, pos + frame_size + length)
+            else:
+                # partly overwritten frame, or the magic bytes inside a payload
+                pos = ring.find(cls.FRAME_MAGIC, pos + 1)
+        return sorted(records.items())
+
+
+class ErgoProcessHandler(logging.Handler):
+    """Send records from a worker process to the `ErgoProcessListener` in the writer process.
+
+    Tags are rendered by the tag filter, the message is rendered and any
+    exception formatted in the worker, so the records are plain data. They are
+    pickled in batches, so a worker makes one queue put per batch and never
+    touches the real outputs. A batch is sent when it reaches `batch_size`
+    records, when a record at `flush_level` or above arrives, every
+    `flush_interval` seconds, and on flush/close (including worker exit).
+    """
+
+    def __init__(self, queue: Any, batch_size: int = 256, flush_interval: float = 0.5,
+                 flush_level: int = logging.ERROR) -> None:
+        super().__init__()
+        self.queue = queue
+        self.batch_size = batch_size
+        self.flush_level = flush_level
+        self._batch: list[dict[str, Any]] = []
+        self._closed = False
+        self._exc_formatter = logging.Formatter()
+        if flush_interval:
+            threading.Thread(target=self._run, args=(flush_interval,), name='ergolog-shipper', daemon=True).start()
+
+    def _portable(self, record: logging.LogRecord) -> dict[str, Any]:
+        entry = dict(record.__dict__)
+        # the JSON formatter keys off ErgoEventMessage, which pickles as long as its context does
+        if not isinstance(record.msg, ErgoEventMessage):
+            entry['msg'] = record.getMessage()
+        entry['args'] = None
+        if record.exc_info:
+            entry['exc_text'] = record.exc_text or self._exc_formatter.formatException(record.exc_info)
+            entry['exc_info'] = None
+        entry.pop('message', None)
+        return entry
+
+    def emit(self, record):
+        try:
+            self._batch.append(self._portable(record))
+            if len(self._batch) >= self.batch_size or record.levelno >= self.flush_level:
+                self._send()
+        except Exception:
+            self.handleError(record)
+
+    def _send(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            payload = pickle.dumps(batch, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            for entry in batch:
+                for key, value in entry.items():
+                    try:
+                        pickle.dumps(value)
+                    except Exception:
+                        entry[key] = str(value) if key == 'msg' else repr(value)
+            payload = pickle.dumps(batch, pickle.HIGHEST_PROTOCOL)
+        self.queue.put(payload)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self._closed:
+                self._send()
+        finally:
+            self.release()
+
+    def close(self):
+        self.acquire()
+        try:
+            if not self._closed:
+                self._send()
+                self._closed = True
+        finally:
+            self.release()
+        super().close()
+
+    def _run(self, interval: float) -> None:
+        while not self._closed:
+            sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+
+class ErgoProcessListener:
+    """Write the records that worker processes send through a queue, in this process.
+
+    Records are handled by the logger they were logged to, so they go through
+    this process's outputs, levels and filters as if they had been logged
+    here. Tags were rendered in the worker and are kept as they are.
+    """
+
+    def __init__(self, queue: Any) -> None:
+        self.queue = queue
+        self._drained = 0
+        self._markers = count(1)
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='ergolog-listener', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            payload = self.queue.get()
+            if payload is None:
+                return
+            if isinstance(payload, int):
+                with self._condition:
+                    self._drained = payload
+                    self._condition.notify_all()
+                continue
+            try:
+                for entry in pickle.loads(payload):
+                    record = logging.makeLogRecord(entry)
+                    logging.getLogger(record.name).handle(record)
+            except Exception:
+                import traceback
+
+                traceback.print_exc(file=sys.stderr)
+
+    def drain(self, timeout: float | None = 10.0) -> None:
+        """Wait until every batch already in the queue has been written."""
+        if not self._thread.is_alive():
+            return
+        marker = next(self._markers)
+        self.queue.put(marker)
+        with self._condition:
+            self._condition.wait_for(lambda: self._drained >= marker, timeout)
+
+    def stop(self) -> None:
+        """Write everything already in the queue, then stop."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+
+
+def _capture_tags() -> tuple[tuple, ...]:
+    """Snapshot the current tag stack as plain values, one tuple per scope, to rebuild in another process."""
+    scopes = []
+    for node in ErgoTagger._tag_stack_var.get().nodes():
+        tags: list[str | tuple[str, Any]] = []
+        for tag in node.tags:
+            if isinstance(tag, tuple):
+                key, value = tag
+                hooks = _live(value)
+                if hooks is not None:
+                    value = hooks[0](value)
+                elif not isinstance(value, _JSON_SCALARS):
+                    value = str(value)
+                tags.append((key, value))
+            else:
+                tags.append(tag)
+        scopes.append(tuple(tags))
+    return tuple(scopes)
+
+
+def _call_tagged(scopes: tuple[tuple, ...], fn: Callable, /, *args, **kwargs):
+    """Run `fn` under the tag scopes captured by `_capture_tags()`."""
+    stack = _EMPTY_TAG_STACK
+    for tags in scopes:
+        stack = stack.push(tags)
+    token = ErgoTagger._tag_stack_var.set(stack)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        ErgoTagger._tag_stack_var.reset(token)
+
+
+def _init_worker(queue: Any, logger_name: str, level: int, initializer: Callable | None, initargs: tuple) -> None:
+    eg(logger_name).config.set_worker(queue, level=level)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+class ErgoProcessPool(Executor):
+    """A `ProcessPoolExecutor` whose workers log through the calling process.
 
-        return json.dumps(obj, separators=(',', ':'))
+    Workers send their records to a listener in this process, which owns the
+    real outputs, so lines from different workers never interleave. Tags in
+    effect when a task is submitted are applied while it runs in the worker;
+    live values (counters, timers) are captured at submission.
+
+    Created with `eg.process_pool()`.
+    """
+
+    def __init__(self, config: ErgoConfig, max_workers: int | None = None, *, mp_context: Any = None,
+                 initializer: Callable | None = None, initargs: tuple = (), **options: Any) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._config = config
+        self._queue = queue = config.start_listener(mp_context)
+        self._pool = ProcessPoolExecutor(
+            max_workers, mp_context=mp_context, initializer=_init_worker,
+            initargs=(queue, config._logger_name, config._logger.getEffectiveLevel(), initializer, initargs),
+            **options,
+        )
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self._pool.submit(_call_tagged, _capture_tags(), fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if wait:
+            # workers send their last batch on exit; write it before returning
+            for listener in list(self._config._listeners.values()):
+                if listener.queue is self._queue:
+                    listener.drain()
+
+
+class _ErgoPoolUsage:
+    """Queue-wait and run time of the pool tasks submitted inside one event, resolved to a dict at emit."""
+
+    __slots__ = ('tasks', 'queue_wait_ns', 'max_queue_wait_ns', 'run_ns', '_lock')
+
+    def __init__(self) -> None:
+        self.tasks = 0
+        self.queue_wait_ns = 0
+        self.max_queue_wait_ns = 0
+        self.run_ns = 0
+        self._lock = threading.Lock()
+
+    def add(self, queue_wait_ns: int, run_ns: int) -> None:
+        with self._lock:
+            self.tasks += 1
+            self.queue_wait_ns += queue_wait_ns
+            self.max_queue_wait_ns = max(self.max_queue_wait_ns, queue_wait_ns)
+            self.run_ns += run_ns
+
+    def __ergo_value__(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'tasks': self.tasks,
+                'queue_wait_s': round(self.queue_wait_ns / 1e9, 6),
+                'max_queue_wait_s': round(self.max_queue_wait_ns / 1e9, 6),
+                'run_s': round(self.run_ns / 1e9, 6),
+            }
+
+
+class ErgoExecutor(ThreadPoolExecutor):
+    """A `ThreadPoolExecutor` whose tasks run under the tags in effect when they were submitted.
+
+    The tag stack is immutable, so submitting a task only captures a reference
+    to it; the worker sets it for the duration of the task. Each task's
+    queue wait (submit to start) and run time are recorded in `eg.metrics` as
+    `<metric>.queue_wait` and `<metric>.run`, tagged `pool=<name>`. Tasks
+    submitted inside an `eg.event()` also add up into a field of that event
+    named after the pool. A queue wait that grows with load means the pool is
+    too small.
+
+    Created with `eg.executor()`.
+    """
+
+    def __init__(self, max_workers: int | None = None, thread_name_prefix: str = '',
+                 initializer: Callable | None = None, initargs: tuple = (), *, name: str = 'executor',
+                 metric: str | None = 'executor') -> None:
+        super().__init__(max_workers, thread_name_prefix or name, initializer, initargs)
+        self.name = name
+        # registry keys, built once: the histograms themselves are looked up per task,
+        # since eg.metrics.reset() drops them
+        self._metric_keys = None if metric is None else (
+            (f'{metric}.queue_wait', ('pool', str(name))), (f'{metric}.run', ('pool', str(name))))
+
+    def _histogram(self, key: tuple) -> ErgoHistogram:
+        histogram = _METRICS._histograms.get(key)
+        if histogram is None:
+            histogram = _METRICS.histogram(key[0], pool=self.name)
+        return histogram
+
+    def submit(self, fn, /, *args, **kwargs):
+        event = ErgoEvent._current_var.get()
+        usage = None
+        if event is not None and not event._emitted:
+            if self.name not in event._context:
+                event._context[self.name] = _ErgoPoolUsage()
+            usage = event._context[self.name]
+            if not isinstance(usage, _ErgoPoolUsage):
+                usage = None  # the event has a field of its own under the pool's name: keep it
+        return super().submit(self._run, ErgoTagger._tag_stack_var.get(), event, usage, perf_counter_ns(),
+                              fn, args, kwargs)
+
+    def _run(self, tag_stack: ErgoTagStack, event: ErgoEvent | None, usage: _ErgoPoolUsage | None,
+             submitted_ns: int, fn: Callable, args: tuple, kwargs: dict):
+        started_ns = perf_counter_ns()
+        token = ErgoTagger._tag_stack_var.set(tag_stack)
+        event_token = ErgoEvent._current_var.set(event) if event is not None else None
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            run_ns = perf_counter_ns() - started_ns
+            if event_token is not None:
+                ErgoEvent._current_var.reset(event_token)
+            ErgoTagger._tag_stack_var.reset(token)
+            if usage is not None:
+                usage.add(started_ns - submitted_ns, run_ns)
+            if self._metric_keys is not None:
+                self._histogram(self._metric_keys[0]).record_ns(started_ns - submitted_ns)
+                self._histogram(self._metric_keys[1]).record_ns(run_ns)
+
+
+class ErgoThread(threading.Thread):
+    """A `threading.Thread` that runs under the tags in effect when it was created.
+
+    Created with `eg.thread()`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._ergo_tag_stack = ErgoTagger._tag_stack_var.get()
+        self._ergo_event = ErgoEvent._current_var.get()
+
+    def run(self) -> None:
+        # a new thread starts with an empty context, so there is nothing to reset
+        ErgoTagger._tag_stack_var.set(self._ergo_tag_stack)
+        if self._ergo_event is not None:
+            ErgoEvent._current_var.set(self._ergo_event)
+        super().run()
+
+
+# how much caller information an output needs, from cheapest to most expensive
+LOCATIONS = ('off', 'cached', 'full')
+_UNKNOWN_CALLER = ('(unknown file)', 0, '(unknown function)', None)
+
+# (code object, line) -> findCaller result, for location='cached'
+_caller_cache: dict[tuple[Any, int], tuple[str, int, str, None]] = {}
+# code object -> whether it belongs to the logging module (skipped when looking for the caller)
+_internal_code: dict[Any, bool] = {}
+_CALLER_CACHE_SIZE = 4096
+
+
+def _location_needed(logger: logging.Logger) -> int:
+    """Return the index in LOCATIONS of the most detailed location any output of `logger` needs.
+
+    Handlers that were not created by ErgoConfig (and loggers with no handlers
+    at all, which fall back to logging.lastResort) always get the full location.
+    """
+    needed = 0
+    found = False
+    current: logging.Logger | None = logger
+    while current is not None:
+        for handler in current.handlers:
+            found = True
+            needed = max(needed, getattr(handler, '_ergolog_caller', 2))
+            if needed == 2:
+                return 2
+        current = current.parent if current.propagate else None  # type: ignore[assignment]
+    return needed if found else 2
+
+
+def _cached_caller(frame, stacklevel: int) -> tuple[str, int, str, None]:
+    """Find the caller the way Logger.findCaller does, memoized per code object and line."""
+    while frame is not None:
+        code = frame.f_code
+        internal = _internal_code.get(code)
+        if internal is None:
+            filename = os.path.normcase(code.co_filename)
+            internal = filename == logging._srcfile or ('importlib' in filename and '_bootstrap' in filename)
+            if len(_internal_code) >= _CALLER_CACHE_SIZE:
+                _internal_code.clear()
+            _internal_code[code] = internal
+        if not internal:
+            stacklevel -= 1
+            if stacklevel <= 0:
+                key = (code, frame.f_lineno)
+                caller = _caller_cache.get(key)
+                if caller is None:
+                    if len(_caller_cache) >= _CALLER_CACHE_SIZE:
+                        _caller_cache.clear()
+                    caller = _caller_cache[key] = (code.co_filename, frame.f_lineno, code.co_name, None)
+                return caller
+        frame = frame.f_back
+    return _UNKNOWN_CALLER
+
+
+def _install_find_caller(logger: logging.Logger) -> None:
+    """Replace `logger.findCaller` with one that walks the stack only as far as its outputs need."""
+    def ergo_find_caller(stack_info: bool = False, stacklevel: int = 1):
+        needed = 2 if stack_info else _location_needed(logger)
+        if not needed and any(isinstance(f, ErgoRateLimiter) for f in logger.filters):
+            needed = 1  # rate limits are kept per call site
+        if needed == 2:
+            # this frame sits between _log and findCaller, so look one level further out
+            return type(logger).findCaller(logger, stack_info, stacklevel + 1)
+        if needed == 1:
+            # frame 1 is Logger._log, frame 2 the logging method the caller used
+            return _cached_caller(sys._getframe(2), stacklevel)
+        return _UNKNOWN_CALLER
+
+    logger.findCaller = ergo_find_caller  # type: ignore[method-assign]
 
 
 class ErgoConfig:
@@ -538,41 +2830,102 @@ class ErgoConfig:
     """
 
     VALID_FORMATS = ('default', 'plain', 'json')
-    VALID_OUTPUTS = ('stdout', 'stderr', 'file')
+    VALID_OUTPUTS = ('stdout', 'stderr', 'file', 'rotating', 'ring')
+    VALID_MODES = ('sync', 'async')
+    VALID_LOCATIONS = LOCATIONS
 
     def __init__(self, logger_name: str = DEFAULT_LOGGER):
         self._logger_name = logger_name
         self._logger = logging.getLogger(logger_name)
+        _install_find_caller(self._logger)
         self._tag_filter = ErgoTagFilter()
-
-    def _make_formatter(self, format: str) -> logging.Formatter:
+        self._flight_recorder: ErgoFlightRecorder | None = None
+        self._rate_limiter: ErgoRateLimiter | None = None
+        # one per multiprocessing start method, since a queue only works with processes from its own context
+        self._listeners: dict[str, ErgoProcessListener] = {}
+
+        # logger filters don't see records from child loggers, so they are shared downwards
+        for kind in (ErgoRateLimiter, ErgoFlightRecorder):
+            parent = self._logger.parent
+            while parent is not None:
+                inherited = next((f for f in parent.filters if isinstance(f, kind)), None)
+                if inherited is not None:
+                    self._logger.addFilter(inherited)
+                    break
+                parent = parent.parent
+
+    def _family(self) -> list[logging.Logger]:
+        """This logger and every existing logger below it."""
+        return [self._logger] + [
+            logger for name, logger in logging.Logger.manager.loggerDict.items()
+            if name.startswith(f'{self._logger_name}.') and isinstance(logger, logging.Logger)
+        ]
+
+    def _make_formatter(self, format: str, location: str = 'full') -> logging.Formatter:
         """Create a formatter instance for the given format name."""
         if format == 'json':
-            return ErgoJSONFormatter()
-        return ErgoFormatter()
+            return ErgoJSONFormatter(location=location != 'off')
+        return ErgoFormatter(location=location != 'off')
 
     def _make_handler(self, kind: str, format: str = 'default',
                       path: str | None = None,
-                      level: str | None = None) -> logging.Handler:
+                      level: str | None = None,
+                      mode: str = 'sync',
+                      buffer_bytes: int | None = None,
+                      flush_interval: float | None = None,
+                      flush_level: str = 'ERROR',
+                      rate_limit: float | None = None,
+                      rate_burst: int | None = None,
+                      rate_window: float | None = None,
+                      location: str = 'full',
+                      **options: Any) -> logging.Handler:
         """Create and configure a logging handler."""
         handler: logging.Handler
-        if kind == 'file':
+        if kind == 'rotating':
+            handler = ErgoRotatingFileHandler(path or 'ergolog.jsonl', **options)
+        elif kind == 'ring':
+            handler = ErgoRingHandler(path or 'ergolog.ring', **options)
+        elif buffer_bytes or flush_interval:
+            stream = open(path or 'ergolog.jsonl', 'a', encoding='utf-8') if kind == 'file' else None
+            handler = ErgoBufferedHandler(
+                stream or (sys.stderr if kind == 'stderr' else sys.stdout),
+                buffer_bytes=buffer_bytes or 64 * 1024,
+                flush_interval=1.0 if flush_interval is None else flush_interval,
+                flush_level=_level_number(flush_level),
+                owns_stream=stream is not None,
+            )
+        elif kind == 'file':
             handler = logging.FileHandler(path or 'ergolog.jsonl', mode='a')
         elif kind == 'stderr':
             handler = logging.StreamHandler(sys.stderr)
         else:
             handler = logging.StreamHandler(sys.stdout)
 
-        handler.setFormatter(self._make_formatter(format))
+        if mode == 'async':
+            handler = ErgoAsyncHandler(handler)
+
+        handler.setFormatter(self._make_formatter(format, location))
+        # ahead of the tag filter, so suppressed records skip tag rendering too
+        if rate_limit is not None:
+            handler.addFilter(ErgoRateLimiter(rate_limit, burst=rate_burst or 10,
+                                              window=10.0 if rate_window is None else rate_window, handler=handler))
         handler.addFilter(self._tag_filter)
 
         if level:
-            handler.setLevel(getattr(logging, level.upper()))
+            handler.setLevel(_level_number(level))
 
-        handler._ergolog_name = kind if kind != 'file' else f'file_{path}'  # type: ignore[union-attr]
+        handler._ergolog_name = self._handler_name(kind, path)  # type: ignore[union-attr]
         handler._ergolog_format = format  # type: ignore[union-attr]
+        handler._ergolog_location = location  # type: ignore[union-attr]
+        # rate limits are kept per call site, so a rate-limited output needs the caller even if it doesn't show it
+        needed = LOCATIONS.index(location)
+        handler._ergolog_caller = max(needed, 1) if rate_limit is not None else needed  # type: ignore[union-attr]
         return handler
 
+    @staticmethod
+    def _handler_name(kind: str, path: str | None) -> str:
+        return f'{kind}_{path}' if kind in ('file', 'rotating', 'ring') else kind
+
     def auto_setup(self) -> None:
         """Apply default configuration if not already configured.
 
@@ -589,30 +2942,77 @@ class ErgoConfig:
         self.add_output('stdout', format='default')
 
     def add_output(self, kind: str = 'stdout', *, path: str | None = None,
-                   format: str = 'default', level: str | None = None) -> None:
+                   format: str = 'default', level: str | None = None,
+                   mode: str = 'sync', buffer_bytes: int | None = None,
+                   flush_interval: float | None = None, flush_level: str = 'ERROR',
+                   max_bytes: int | None = None, rotate_every: float | None = None,
+                   compress: str | None = None, backup_count: int | None = None,
+                   max_total_bytes: int | None = None, ring_bytes: int | None = None,
+                   rate_limit: float | None = None, rate_burst: int | None = None,
+                   rate_window: float | None = None, location: str = 'full') -> None:
         """Add a logging output handler.
 
         Args:
-            kind: Output destination — 'stdout', 'stderr', or 'file'.
-            path: File path (required when kind='file').
+            kind: Output destination — 'stdout', 'stderr', 'file', 'rotating', or 'ring'.
+            path: File path (required when kind='file', 'rotating' or 'ring').
             format: Formatter — 'default' (colored), 'plain' (no ANSI), or 'json'.
             level: Optional log level for this handler (e.g. 'WARNING').
                    Defaults to the logger's current level.
+            mode: 'sync' writes on the logging thread; 'async' queues records for a
+                  background writer thread that formats and writes them in batches.
+            buffer_bytes: Buffer encoded output up to this many bytes and write it in one call.
+            flush_interval: Seconds between flushes of a buffered output (default 1.0 when
+                            buffering; 0 disables the timer). Setting either option enables buffering.
+            flush_level: Records at this level or above flush a buffered output immediately.
+            max_bytes: Rotate a 'rotating' output when the file reaches this size.
+            rotate_every: Rotate a 'rotating' output every this many seconds (3600 = on the hour).
+            compress: Compress rotated segments in the background — 'gzip' or 'lzma'.
+            backup_count: Keep at most this many rotated segments.
+            max_total_bytes: Delete the oldest rotated segments beyond this many bytes in total.
+            ring_bytes: Size of a 'ring' output's circular buffer (default 16 MiB).
+            rate_limit: Records per second allowed from each call site to this output.
+            rate_burst: Records a call site may send at once before the limit applies (default 10).
+            rate_window: Seconds between summaries of suppressed records per call site (default 10).
+            location: Caller location in each record — 'full' (the stdlib stack walk), 'cached'
+                      (a short frame walk memoized per code object and line; file, line and
+                      function are the same) or 'off' (no location; the formatter omits it).
+                      The stack is only walked as far as the most detailed output needs.
         """
         if kind not in self.VALID_OUTPUTS:
             raise ValueError(f"Invalid output kind '{kind}'. Must be one of: {self.VALID_OUTPUTS}")
         if format not in self.VALID_FORMATS:
             raise ValueError(f"Invalid format '{format}'. Must be one of: {self.VALID_FORMATS}")
+        if mode not in self.VALID_MODES:
+            raise ValueError(f"Invalid mode '{mode}'. Must be one of: {self.VALID_MODES}")
+        if location not in self.VALID_LOCATIONS:
+            raise ValueError(f"Invalid location '{location}'. Must be one of: {self.VALID_LOCATIONS}")
+        # resolved here so a typo fails before the existing output is replaced
+        _level_number(flush_level)
+        if level:
+            _level_number(level)
+        rotation = {'max_bytes': max_bytes, 'rotate_every': rotate_every, 'compress': compress,
+                    'backup_count': backup_count, 'max_total_bytes': max_total_bytes}
+        if kind in ('rotating', 'ring') and (buffer_bytes or flush_interval):
+            raise ValueError(f"'{kind}' outputs cannot be buffered; use mode='async' instead")
+        if kind != 'rotating' and any(value is not None for value in rotation.values()):
+            raise ValueError("Rotation options are only valid for kind='rotating'")
+        if kind != 'ring' and ring_bytes is not None:
+            raise ValueError("ring_bytes is only valid for kind='ring'")
+        options = rotation if kind == 'rotating' else {'ring_bytes': ring_bytes} if ring_bytes is not None else {}
 
         effective_format = 'default' if format == 'plain' else format
 
-        handler_name = kind if kind != 'file' else f'file_{path}'
+        handler_name = self._handler_name(kind, path)
         for existing_handler in self._logger.handlers[:]:
             if hasattr(existing_handler, '_ergolog_name') and existing_handler._ergolog_name == handler_name:  # type: ignore[attr-defined]
                 existing_handler.close()
                 self._logger.removeHandler(existing_handler)
 
-        handler = self._make_handler(kind, format=effective_format, path=path, level=level)
+        handler = self._make_handler(kind, format=effective_format, path=path, level=level, mode=mode,
+                                     buffer_bytes=buffer_bytes, flush_interval=flush_interval,
+                                     flush_level=flush_level, rate_limit=rate_limit,
+                                     rate_burst=rate_burst, rate_window=rate_window,
+                                     location=location, **options)
         self._logger.addHandler(handler)
 
         if not self._logger.level or self._logger.level == logging.NOTSET:
@@ -622,38 +3022,185 @@ class ErgoConfig:
         """Remove a logging output handler.
 
         Args:
-            kind: Output kind — 'stdout', 'stderr', or 'file'.
-            path: File path (used to identify which file handler when kind='file').
+            kind: Output kind — 'stdout', 'stderr', 'file', 'rotating', or 'ring'.
+            path: File path (used to identify which file handler when kind='file', 'rotating' or 'ring').
         """
-        handler_name = kind if kind != 'file' else f'file_{path}'
+        handler_name = self._handler_name(kind, path)
         for handler in self._logger.handlers[:]:
             if hasattr(handler, '_ergolog_name') and handler._ergolog_name == handler_name:  # type: ignore[attr-defined]
+                for limiter in handler.filters:
+                    if isinstance(limiter, ErgoRateLimiter):
+                        limiter.flush()
                 handler.close()
                 self._logger.removeHandler(handler)
                 return
 
+    def flush(self) -> None:
+        """Flush every output on this logger, waiting for async outputs to drain.
+
+        Pending rate-limit summaries and open rollup windows are written first.
+        """
+        limiters = [f for f in self._logger.filters if isinstance(f, ErgoRateLimiter)]
+        for handler in self._logger.handlers:
+            limiters += [f for f in handler.filters if isinstance(f, ErgoRateLimiter)]
+        for limiter in limiters:
+            limiter.flush()
+        ErgoRollup.flush(self._logger_name)
+        for listener in list(self._listeners.values()):
+            listener.drain()
+        for handler in self._logger.handlers:
+            handler.flush()
+
+    def start_listener(self, mp_context: Any = None) -> Any:
+        """Write records sent by worker processes, in this process. Returns the queue for `set_worker()`.
+
+        The listener runs on a daemon thread and is shared by every pool on this
+        logger that uses the same start method; starting it again returns the
+        same queue. `flush()` waits for the batches already in the queue, and
+        `stop_listener()` (also run at exit) writes whatever is left.
+
+        Args:
+            mp_context: multiprocessing context to create the queue with (default context if None).
+        """
+        import multiprocessing
+
+        context = mp_context or multiprocessing.get_context()
+        method = context.get_start_method()
+        if method not in self._listeners:
+            if not self._listeners:
+                atexit.register(self.stop_listener)
+            self._listeners[method] = ErgoProcessListener(context.Queue())
+        return self._listeners[method].queue
+
+    def stop_listener(self) -> None:
+        """Write every record already sent by worker processes and stop listening."""
+        while self._listeners:
+            self._listeners.popitem()[1].stop()
+
+    def set_worker(self, queue: Any, *, level: int | str | None = None, batch_size: int = 256,
+                   flush_interval: float = 0.5) -> None:
+        """Send this logger's records to the writer process instead of writing them here.
+
+        Call in a worker process with the queue from `start_listener()` in the
+        writer process (`eg.process_pool()` does both). Every output on this
+        logger and its child loggers is removed without being closed (after a
+        fork they belong to the parent) and replaced by one `ErgoProcessHandler`,
+        and the logger stops propagating: the writer process does that.
+
+        Args:
+            queue: The queue returned by `start_listener()`.
+            level: Logger level in the worker, e.g. the writer's effective level.
+            batch_size: Records per batch sent to the writer.
+            flush_interval: Seconds between sends of a partly filled batch.
+        """
+        for logger in self._family():
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+
+        handler = ErgoProcessHandler(queue, batch_size=batch_size, flush_interval=flush_interval)
+        handler.addFilter(self._tag_filter)
+        handler._ergolog_name = 'process'  # type: ignore[attr-defined]
+        self._logger.addHandler(handler)
+        # the writer process propagates the records it receives to its own parent loggers
+        self._logger.propagate = False
+        if level is not None:
+            self._logger.setLevel(level)
+        elif not self._logger.level:
+            self._logger.setLevel(logging.DEBUG)
+
+        # multiprocessing workers leave through os._exit, which skips atexit but runs these finalizers,
+        # highest exitpriority first: open rollup windows and rate-limit summaries before the handler ships
+        from multiprocessing import util
+
+        util.Finalize(None, _flush_rollups, exitpriority=20)
+        util.Finalize(None, _flush_rate_limiters, exitpriority=20)
+        util.Finalize(handler, handler.close, exitpriority=10)
+        atexit.register(handler.close)
+
+    async def aflush(self) -> None:
+        """`flush()` from a coroutine: waits in a worker thread so the event loop keeps running."""
+        import asyncio
+
+        await asyncio.to_thread(self.flush)
+
+    def set_rate_limit(self, rate: float | None, *, burst: int = 10, window: float = 10.0) -> None:
+        """Limit every call site on this logger and its child loggers to `rate` records per second.
+
+        Suppressed records are counted without being formatted, and each call
+        site writes `suppressed N similar messages in Ns` once `window` seconds
+        have passed since its first suppressed record.
+
+        Args:
+            rate: Records per second per call site. None removes the limit.
+            burst: Records a call site may send at once before the limit applies.
+            window: Seconds between summaries of suppressed records per call site.
+        """
+        family = self._family()
+        if self._rate_limiter is not None:
+            self._rate_limiter.flush()
+            for logger in family:
+                logger.removeFilter(self._rate_limiter)
+            self._rate_limiter = None
+        if rate is None:
+            return
+
+        self._rate_limiter = ErgoRateLimiter(rate, burst=burst, window=window)
+        for logger in family:
+            logger.addFilter(self._rate_limiter)
+
+    def set_flight_recorder(self, level: str | None = 'WARNING', *, flush_level: str = 'ERROR',
+                            capacity: int = 1000) -> None:
+        """Hold back records below `level` inside tag and event scopes until an error happens there.
+
+        Held records are only formatted and written if a record at `flush_level`
+        or above is logged in the same scope (or an enclosing one), or an event
+        ends at ERROR; otherwise they are discarded when the scope ends. Applies
+        to this logger and its child loggers.
+
+        Args:
+            level: Records below this level are held. None turns the recorder off.
+            flush_level: Records at this level or above write the held records first.
+            capacity: Maximum records held per scope; the oldest are dropped first.
+        """
+        levels = None if level is None else (_level_number(level), _level_number(flush_level))
+        family = self._family()
+        if self._flight_recorder is not None:
+            for logger in family:
+                logger.removeFilter(self._flight_recorder)
+            self._flight_recorder = None
+            ErgoFlightRecorder.active -= 1
+        if levels is None:
+            return
+
+        self._flight_recorder = ErgoFlightRecorder(*levels, capacity)
+        ErgoFlightRecorder.active += 1
+        for logger in family:
+            logger.addFilter(self._flight_recorder)
+
     def set_format(self, format: str, kind: str = 'stdout', path: str | None = None) -> None:
         """Change the formatter on an existing handler.
 
         Args:
             format: Formatter — 'default' (colored), 'plain' (no ANSI), or 'json'.
-            kind: Which output to change — 'stdout', 'stderr', or 'file'.
-            path: File path (required when kind='file' to identify which file handler).
+            kind: Which output to change — 'stdout', 'stderr', 'file', 'rotating', or 'ring'.
+            path: File path (required when kind='file', 'rotating' or 'ring' to identify which file handler).
         """
         if format not in self.VALID_FORMATS:
             raise ValueError(f"Invalid format '{format}'. Must be one of: {self.VALID_FORMATS}")
 
         effective_format = 'default' if format == 'plain' else format
-        handler_name = kind if kind != 'file' else f'file_{path}'
+        handler_name = self._handler_name(kind, path)
         for handler in self._logger.handlers:
             if hasattr(handler, '_ergolog_name') and handler._ergolog_name == handler_name:  # type: ignore[attr-defined]
-                handler.setFormatter(self._make_formatter(effective_format))
+                location = getattr(handler, '_ergolog_location', 'full')
+                handler.setFormatter(self._make_formatter(effective_format, location))
                 handler._ergolog_format = effective_format  # type: ignore[attr-defined]
                 return
 
 
 class ErgoLog:
     _loggers: dict[str, 'ErgoLog'] = {}
+    metrics = _METRICS
 
     def __init__(self, name=DEFAULT_LOGGER) -> None:
         self._name = name
@@ -677,6 +3224,35 @@ class ErgoLog:
         self.critical = self._logger.critical # type: ignore[assignment]
         self.log = self._logger.log           # type: ignore[assignment]
 
+    def _logf(self, level: int, msg: str | Callable[[], str], fields: dict[str, Any]) -> None:
+        if _will_handle(self._logger, level):
+            # stacklevel=3 reports the caller of debugf() and friends, not this module
+            self._logger.log(level, ErgoFormatMessage(msg, fields), extra={'fields': fields}, stacklevel=3)
+
+    def debugf(self, msg: str | Callable[[], str], /, **fields: Any) -> None:
+        """Log at DEBUG with a deferred message: `eg.debugf('x={x}', x=val)` or `eg.debugf(lambda: ...)`.
+
+        The message is only rendered if an output accepts the record. `fields`
+        are also attached as `record.fields` (`"fields"` in JSON output).
+        """
+        self._logf(logging.DEBUG, msg, fields)
+
+    def infof(self, msg: str | Callable[[], str], /, **fields: Any) -> None:
+        """Log at INFO with a deferred message, see `debugf()`."""
+        self._logf(logging.INFO, msg, fields)
+
+    def warningf(self, msg: str | Callable[[], str], /, **fields: Any) -> None:
+        """Log at WARNING with a deferred message, see `debugf()`."""
+        self._logf(logging.WARNING, msg, fields)
+
+    def errorf(self, msg: str | Callable[[], str], /, **fields: Any) -> None:
+        """Log at ERROR with a deferred message, see `debugf()`."""
+        self._logf(logging.ERROR, msg, fields)
+
+    def criticalf(self, msg: str | Callable[[], str], /, **fields: Any) -> None:
+        """Log at CRITICAL with a deferred message, see `debugf()`."""
+        self._logf(logging.CRITICAL, msg, fields)
+
     def __getattr__(self, name: str):
         try:
             return self._logger.__getattribute__(name)
@@ -699,22 +3275,51 @@ class ErgoLog:
 
         return ErgoLog._loggers[name]
 
+    async def aflush(self) -> None:
+        """Flush this logger's outputs without blocking the event loop."""
+        await self.config.aflush()
+
     def tag(self, *tags: str, **kwargs: str | Callable[[], str] | ErgoCounter | ErgoTimer):
         """apply ergolog tags"""
         return ErgoTagger(*tags, **kwargs)
 
-    def timer(self, cb: Callable[[str], None] | None = None):
+    def timer(self, cb: Callable[[str], None] | None = None, clock: str | None = None, metric: str | None = None):
         """Create a timer"""
-        return ErgoTimer(cb)
+        return ErgoTimer(cb, clock=clock, metric=metric)
 
-    def event(self, **initial_context) -> ErgoEvent:
+    @staticmethod
+    def set_clock(clock: str) -> None:
+        """Set the default duration clock for timers and events: 'perf', 'monotonic' or 'coarse'."""
+        if clock not in CLOCKS:
+            raise ValueError(f"Invalid clock '{clock}'. Must be one of: {tuple(CLOCKS)}")
+        ErgoTimer.default_clock = clock
+
+    def event(self, *, sample_rate: float | None = None, sample_key: Any = None,
+              keep_slower_than: float | None = None, rollup: str | None = None, window: float = 10.0,
+              histogram: str | None = None, **initial_context) -> ErgoEvent:
         """Create a wide event accumulator.
 
         Accumulates context throughout a scope and emits a single log line.
         Can be used as a context manager (auto-emit on exit) or directly.
 
         Args:
-            **initial_context: Initial context to include in the event.
+            sample_rate: Keep only this fraction of events (head sampling). Events at
+                         WARNING or above, or slower than `keep_slower_than`, are always
+                         kept. Emitted events carry the rate as `sample_rate`.
+            sample_key: Sample deterministically by this value (e.g. a request id), so
+                        every event with the same key is either kept or dropped.
+            keep_slower_than: Always keep events that take longer than this many seconds.
+            rollup: Merge this event into a per-window summary instead of logging it. Events
+                    with the same rollup name and initial context share a summary with
+                    count, errors and duration min/mean/p50/p95/max. Only the initial
+                    context is kept: fields added with set() are discarded, and the
+                    summary carries no tags.
+            window: Seconds covered by each rollup summary.
+            histogram: Record the event's duration in `eg.metrics` under this name.
+            **initial_context: Initial context to include in the event. The option names
+                               above (`sample_rate`, `sample_key`, `keep_slower_than`,
+                               `rollup`, `window`, `histogram`) are reserved here; add
+                               context with those keys through `e.set()` instead.
 
         Returns:
             ErgoEvent instance.
@@ -729,7 +3334,9 @@ class ErgoLog:
             e.set(cart={'items': 3})
             e.emit()
         """
-        return ErgoEvent(self, **initial_context)
+        return ErgoEvent(self, sample_rate=sample_rate, sample_key=sample_key,
+                         keep_slower_than=keep_slower_than, rollup=rollup, window=window,
+                         histogram=histogram, **initial_context)
 
     @staticmethod
     def uid():
@@ -737,39 +3344,206 @@ class ErgoLog:
         return uuid4().hex[:6]
 
     @staticmethod
-    def counter():
-        """Create a mutable counter/accumulator for use as a tag value"""
-        return ErgoCounter()
+    def counter(sharded: bool = False):
+        """Create a mutable counter/accumulator for use as a tag value
 
-    def trace(self, func=None, *, log_args=False):
+        Pass `sharded=True` for a counter shared between threads.
+        """
+        return ErgoShardedCounter() if sharded else ErgoCounter()
+
+    def process_pool(self, max_workers: int | None = None, **options: Any) -> ErgoProcessPool:
+        """Create a process pool whose workers log through this process.
+
+        Takes the arguments of `concurrent.futures.ProcessPoolExecutor`. See
+        `ErgoProcessPool`.
+        """
+        return ErgoProcessPool(self.config, max_workers, **options)
+
+    def executor(self, max_workers: int | None = None, *, name: str = 'executor', metric: str | None = 'executor',
+                 **options: Any) -> ErgoExecutor:
+        """Create a thread pool whose tasks keep the tags in effect when they were submitted.
+
+        Takes the arguments of `concurrent.futures.ThreadPoolExecutor`. `name`
+        tags the pool's metrics and names its field in the active event;
+        `metric=None` turns the metrics off. See `ErgoExecutor`.
+        """
+        return ErgoExecutor(max_workers, name=name, metric=metric, **options)
+
+    @staticmethod
+    def thread(*args: Any, **kwargs: Any) -> ErgoThread:
+        """Create a thread that keeps the tags in effect now. Takes the arguments of `threading.Thread`."""
+        return ErgoThread(*args, **kwargs)
+
+    def trace(self, func=None, *, log_args=False, sample_rate: float = 1.0, max_repr: int = 80,
+              production: bool = False):
         """Trace a function — logs entry, timing, and optionally args/return values.
 
-        Intended for local debugging only. A WARNING is emitted at decoration time
-        as a reminder not to leave it in production code.
+        A WARNING is emitted at decoration time as a reminder not to leave it in
+        production code; pass `production=True` to keep a trace deliberately.
+
+        Every call is timed into `eg.metrics` (see `trace_stats()`), but tags and
+        DEBUG lines are only produced when DEBUG is enabled, and then only for a
+        `sample_rate` fraction of calls.
 
-        Use log_args=True to log arguments and return values.
+        Use log_args=True to log arguments and return values; each repr is cut
+        to at most `max_repr` characters.
         """
         if func is None:
-            return lambda f: self.trace(f, log_args=log_args)
+            return lambda f: self.trace(f, log_args=log_args, sample_rate=sample_rate, max_repr=max_repr,
+                                        production=production)
 
-        with self.tag(trace=func.__name__):
-            self.warning('registering trace')
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f'sample_rate must be between 0 and 1, got {sample_rate}')
 
-        def wrapper(*args, **kwargs):
+        if not production:
             with self.tag(trace=func.__name__):
-                if log_args:
-                    self.debug(f'executing {args} {kwargs}')
-                with self.timer() as t:
+                self.warning('registering trace')
+
+        # the module keeps same-named functions (handler, main, ...) in separate histograms
+        metric = f'trace.{func.__module__}.{func.__qualname__}'
+        # resolved on the first call and again after eg.metrics.reset(), not looked up per call
+        histogram: ErgoHistogram | None = None
+        resets = -1
+
+        def record(elapsed_ns: int) -> None:
+            nonlocal histogram, resets
+            if resets != _METRICS._resets:
+                resets = _METRICS._resets
+                histogram = _METRICS.histogram(metric)
+            histogram.record_ns(elapsed_ns)  # type: ignore[union-attr]
+
+        logger = self._logger
+        tagger = ErgoTagger(trace=func.__name__)
+        shorten = reprlib.Repr()
+        shorten.maxstring = shorten.maxother = max_repr
+
+        def clip(value: Any) -> str:
+            text = shorten.repr(value)
+            return text if len(text) <= max_repr else f'{text[:max_repr - 3]}...'
+
+        def traced() -> bool:
+            return logger.isEnabledFor(logging.DEBUG) and (sample_rate >= 1.0 or random() < sample_rate)
+
+        def begin(args, kwargs):
+            scope = tagger._push()
+            if log_args:
+                self.debug('executing %s %s', clip(args), clip(kwargs))
+            return scope
+
+        def done(elapsed_ns: int, result: Any) -> None:
+            if log_args:
+                self.debug('done in %.3fS returned: %s', elapsed_ns / 1e9, clip(result))
+            else:
+                self.debug('done in %.3fS', elapsed_ns / 1e9)
+
+        if inspect.isasyncgenfunction(func):
+            # a generator has no single return value: time it from first step to exhaustion, and
+            # decide once per call whether its steps are tagged and its end is logged
+            now = CLOCKS[ErgoTimer.default_clock]
+
+            def start_call() -> tuple[bool, int]:
+                return traced(), now()
+
+            def push_step(call: tuple[bool, int]):
+                return tagger._push() if call[0] else None
+
+            def pop_step(scope, failed: bool) -> None:
+                if scope is not None:
+                    tagger._pop(scope, failed)
+
+            def end_call(call: tuple[bool, int], failed: bool) -> None:
+                logged, start = call
+                elapsed_ns = now() - start
+                record(elapsed_ns)
+                if logged and not failed:
+                    scope = tagger._push()
+                    try:
+                        self.debug('done in %.3fS', elapsed_ns / 1e9)
+                    finally:
+                        tagger._pop(scope, False)
+
+            return _scoped(func, push_step, pop_step, prepare=start_call, finish=end_call)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                now = CLOCKS[ErgoTimer.default_clock]
+                if not traced():
+                    start = now()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        record(now() - start)
+
+                scope = begin(args, kwargs)
+                failed = True
+                try:
+                    start = now()
+                    try:
+                        result = await func(*args, **kwargs)
+                    finally:
+                        elapsed_ns = now() - start
+                        record(elapsed_ns)
+                    done(elapsed_ns, result)
+                    failed = False
+                    return result
+                finally:
+                    tagger._pop(scope, failed)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            now = CLOCKS[ErgoTimer.default_clock]
+            if not traced():
+                start = now()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(now() - start)
+
+            scope = begin(args, kwargs)
+            failed = True
+            try:
+                start = now()
+                try:
                     result = func(*args, **kwargs)
-                if log_args:
-                    self.debug(f'done in {t}S returned: {result}')
-                else:
-                    self.debug(f'done in {t}S')
-
-            return result
+                finally:
+                    elapsed_ns = now() - start
+                    record(elapsed_ns)
+                done(elapsed_ns, result)
+                failed = False
+                return result
+            finally:
+                tagger._pop(scope, failed)
 
         return wrapper
 
+    @staticmethod
+    def trace_stats() -> dict[str, dict[str, Any]]:
+        """Return call counts and latency totals for every traced function, by module and qualified name.
+
+        Calls are counted whether or not they were logged.
+        """
+        with _METRICS._lock:
+            traced = [(key[0][len('trace.'):], histogram) for key, histogram in _METRICS._histograms.items()
+                      if len(key) == 1 and key[0].startswith('trace.')]
+        stats = {}
+        for name, histogram in sorted(traced):
+            summary = histogram.summary((50, 99))
+            stats[name] = {'calls': summary.pop('count'), 'total_s': histogram.total / 1e9, **summary}
+        return stats
+
+    def trace_report(self, level: str = 'INFO') -> dict[str, dict[str, Any]]:
+        """Log one line of `trace_stats()` per traced function and return the stats."""
+        stats = self.trace_stats()
+        for name, s in stats.items():
+            self.log(_level_number(level),
+                     '%s calls=%d total=%.3fs mean=%.6fs p50=%.6fs p99=%.6fs max=%.6fs',
+                     name, s['calls'], s['total_s'], s['mean_s'], s['p50_s'], s['p99_s'], s['max_s'])
+        return stats
+
 
 eg = ErgoLog()
 
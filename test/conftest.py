@@ -22,4 +22,35 @@ def _restore_ergolog():
     for handler in original_handlers:
         logger.addHandler(handler)
     logger.setLevel(original_level)
-    logger.propagate = original_propagate
\ No newline at end of file
+    logger.propagate = original_propagate
+
+
+class CaptureHandler(logging.Handler):
+    """A handler that keeps every record it is handed and counts format calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.formatted = 0
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def format(self, record):
+        self.formatted += 1
+        return super().format(record)
+
+    @property
+    def messages(self):
+        return [record.getMessage() for record in self.records]
+
+
+@pytest.fixture
+def recorder():
+    """Capture every record logged to the ergo logger at DEBUG and above."""
+    handler = CaptureHandler()
+    logger = logging.getLogger('ergo')
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
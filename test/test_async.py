@@ -0,0 +1,254 @@
+"""Tests for asyncio support — coroutine/async-generator decorators and `async with`."""
+
+import asyncio
+
+from pytest import LogCaptureFixture
+
+from ergolog import eg
+
+
+def test_tag_decorates_coroutine(caplog: LogCaptureFixture):
+    @eg.tag('job')
+    async def job():
+        await asyncio.sleep(0)
+        eg.info('inside')
+
+    asyncio.run(job())
+
+    assert caplog.records[0].tags == '[job] '  # type: ignore
+
+
+def test_tag_decorator_keeps_coroutine_function():
+    async def job():
+        pass
+
+    wrapped = eg.tag('job')(job)
+
+    assert asyncio.iscoroutinefunction(wrapped)
+    assert wrapped.__name__ == 'job'
+
+
+def test_tags_isolated_between_tasks(caplog: LogCaptureFixture):
+    @eg.tag('worker', id=lambda: 'x')
+    async def worker(n):
+        async with eg.tag(n=n):
+            await asyncio.sleep(0.01 * (3 - n))
+            eg.info('done')
+
+    async def main():
+        await asyncio.gather(*(worker(n) for n in range(3)))
+        eg.info('after')
+
+    asyncio.run(main())
+
+    tags = sorted(r.tags for r in caplog.records[:-1])  # type: ignore
+    assert tags == ['[worker, id=x, n=0] ', '[worker, id=x, n=1] ', '[worker, id=x, n=2] ']
+    assert caplog.records[-1].tags == ''  # type: ignore
+
+
+def test_tag_decorates_async_generator(caplog: LogCaptureFixture):
+    @eg.tag('stream')
+    async def stream():
+        for i in range(2):
+            eg.info(f'yield {i}')
+            yield i
+
+    async def main():
+        async for _ in stream():
+            eg.info('consumer')
+
+    asyncio.run(main())
+
+    assert [r.tags for r in caplog.records] == ['[stream] ', '', '[stream] ', '']  # type: ignore
+
+
+def test_async_generator_tag_values_evaluated_once_per_call(caplog: LogCaptureFixture):
+    @eg.tag(job=eg.uid)
+    async def stream():
+        for i in range(3):
+            eg.info(f'yield {i}')
+            yield i
+
+    async def main():
+        async for _ in stream():
+            pass
+        async for _ in stream():
+            pass
+
+    asyncio.run(main())
+
+    ids = [r.tag_dict['job'] for r in caplog.records]  # type: ignore
+    assert len(set(ids[:3])) == 1
+    assert len(set(ids[3:])) == 1
+    assert ids[0] != ids[3]
+
+
+def test_async_generator_closed_early_cleans_up_in_scope(caplog: LogCaptureFixture):
+    @eg.tag('stream')
+    async def stream():
+        try:
+            yield 1
+            yield 2
+        finally:
+            eg.info('cleanup')
+
+    async def main():
+        gen = stream()
+        await gen.__anext__()
+        await gen.aclose()
+
+    asyncio.run(main())
+
+    assert [r.tags for r in caplog.records] == ['[stream] ']  # type: ignore
+
+
+def test_timer_decorates_coroutine():
+    results = []
+
+    @eg.timer(lambda t: results.append(float(t)))
+    async def job(delay):
+        await asyncio.sleep(delay)
+
+    async def main():
+        await asyncio.gather(job(0.05), job(0.01))
+
+    asyncio.run(main())
+
+    # each concurrent call reports its own duration
+    assert len(results) == 2
+    assert results[0] < 0.04 <= results[1]
+
+
+def test_timer_spans_async_generator():
+    results = []
+
+    @eg.timer(lambda t: results.append(float(t)))
+    async def stream():
+        for _ in range(3):
+            await asyncio.sleep(0.01)
+            yield
+
+    async def main():
+        async for _ in stream():
+            pass
+
+    asyncio.run(main())
+
+    assert len(results) == 1
+    assert results[0] >= 0.03
+
+
+def test_async_with_timer():
+    async def main():
+        async with eg.timer() as t:
+            await asyncio.sleep(0.01)
+        return t.elapsed
+
+    assert asyncio.run(main()) >= 0.01
+
+
+def test_shared_instances_entered_by_concurrent_tasks(caplog: LogCaptureFixture):
+    shared_tag = eg.tag('shared')
+    durations = []
+    shared_timer = eg.timer(lambda t: durations.append(float(t)))
+    shared_event = eg.event(action='fan-out')
+
+    async def task(delay):
+        async with shared_tag, shared_timer:
+            await asyncio.sleep(delay)
+            eg.info('inside')
+
+    async def main():
+        # the first task to enter is the first to exit
+        await asyncio.gather(task(0.01), task(0.03))
+        async with shared_event:
+            await asyncio.gather(task(0.01), task(0.02))
+        eg.info('after')
+
+    asyncio.run(main())
+
+    assert [r.tags for r in caplog.records[:2]] == ['[shared] ', '[shared] ']  # type: ignore
+    assert caplog.records[-1].tags == ''  # type: ignore
+    assert durations[0] < 0.025 <= durations[1]
+    assert caplog.records[-2].event['action'] == 'fan-out'  # type: ignore
+
+
+def test_async_with_event(caplog: LogCaptureFixture):
+    async def main():
+        async with eg.event(action='fetch') as e:
+            await asyncio.sleep(0)
+            e.set(items=2)
+
+    asyncio.run(main())
+
+    assert caplog.records[0].event['action'] == 'fetch'  # type: ignore
+    assert caplog.records[0].event['items'] == 2  # type: ignore
+
+
+def test_async_with_event_error(caplog: LogCaptureFixture):
+    async def main():
+        async with eg.event(action='fetch'):
+            raise ValueError('boom')
+
+    try:
+        asyncio.run(main())
+    except ValueError:
+        pass
+
+    assert caplog.records[0].levelname == 'ERROR'
+
+
+def test_trace_coroutine(caplog: LogCaptureFixture):
+    eg.setLevel('DEBUG')
+
+    @eg.trace
+    async def handler():
+        await asyncio.sleep(0)
+        return 1
+
+    assert asyncio.run(handler()) == 1
+    assert caplog.records[-1].message.startswith('done in')
+    assert caplog.records[-1].tags == '[trace=handler] '  # type: ignore
+
+
+def test_trace_async_generator_sampled(caplog: LogCaptureFixture):
+    eg.setLevel('DEBUG')
+    eg.metrics.reset()
+
+    @eg.trace(production=True, sample_rate=0.0)
+    async def quiet():
+        eg.info('step')
+        yield 1
+
+    @eg.trace(production=True)
+    async def loud():
+        eg.info('step')
+        yield 1
+
+    async def main():
+        for stream in (quiet, quiet, loud):
+            async for _ in stream():
+                pass
+
+    asyncio.run(main())
+
+    assert [(r.message, r.tags) for r in caplog.records[:2]] == [('step', ''), ('step', '')]  # type: ignore
+    assert caplog.records[2].tags == '[trace=loud] '  # type: ignore
+    assert caplog.records[3].message.startswith('done in')
+    assert caplog.records[3].tags == '[trace=loud] '  # type: ignore
+    assert len(caplog.records) == 4
+    assert eg.trace_stats()[f'{__name__}.{quiet.__qualname__}']['calls'] == 2
+
+
+def test_aflush(tmp_path):
+    log_file = tmp_path / 'async.log'
+    eg.config.add_output('file', path=str(log_file), format='plain', mode='async')
+    try:
+        async def main():
+            eg.info('queued')
+            await eg.aflush()
+
+        asyncio.run(main())
+        assert 'queued' in log_file.read_text()
+    finally:
+        eg.config.remove_output('file', path=str(log_file))
@@ -287,3 +287,335 @@ def test_uid_helper(caplog: LogCaptureFixture):
     assert len(outer) == 10  # 'job=' + 6 chars
     assert len(inner) == 10
     assert outer != inner  # unique per entry
+
+
+def test_deep_tag_stack_is_shared(caplog: LogCaptureFixture):
+    from contextlib import ExitStack
+    from ergolog.ergolog import ErgoTagger
+
+    with ExitStack() as stack:
+        for depth in range(200):
+            stack.enter_context(eg.tag(f't{depth}'))
+        outer = ErgoTagger._tag_stack_var.get()
+        with eg.tag('leaf'):
+            inner = ErgoTagger._tag_stack_var.get()
+            eg.info('deep')
+
+    # entering a scope pushes one node on top of the existing stack, it never copies it
+    assert inner.parent is outer
+    assert len(inner) == 201
+    assert caplog.records[0].tag_list == [f't{depth}' for depth in range(200)] + ['leaf']  # type: ignore
+
+
+def test_rendering_cached_only_where_logged(caplog: LogCaptureFixture):
+    from contextlib import ExitStack
+    from ergolog.ergolog import ErgoTagger
+
+    with ExitStack() as stack:
+        nodes = []
+        for depth in range(50):
+            stack.enter_context(eg.tag(f't{depth}'))
+            nodes.append(ErgoTagger._tag_stack_var.get())
+        eg.info('leaf')
+        with eg.tag('sibling'):
+            eg.info('sibling')
+
+    # only the logging node holds a full rendering; the nodes beneath it stay empty
+    assert nodes[-1]._prefix is not None
+    assert all(node._prefix is None for node in nodes[:-1])
+    assert caplog.records[1].tags == f'[{", ".join(f"t{depth}" for depth in range(50))}, sibling] '  # type: ignore
+
+
+def test_rendering_linear_when_logging_at_every_level(caplog: LogCaptureFixture):
+    from ergolog.ergolog import ErgoTagger, ErgoTagStack
+
+    counter = eg.counter()
+    nodes = []
+
+    @eg.tag(step=counter)
+    def recurse(depth):
+        nodes.append(ErgoTagger._tag_stack_var.get())
+        eg.info('level')
+        if depth:
+            with eg.tag(f'd{depth}', step='static'):
+                recurse(depth - 1)
+
+    recurse(100)
+
+    # past the flat size each node renders only its own tags and points at the node below
+    deep = nodes[-1]._prefix
+    assert deep[0] is not None
+    assert len(deep[1]) <= 3
+    assert all(len(node._prefix[1]) <= ErgoTagStack.FLAT_PREFIX_SIZE for node in nodes)
+
+    last = caplog.records[-1]
+    assert len(last.tag_list) == 301  # type: ignore
+    assert last.tag_list[:4] == ['step=0', 'd100', 'step=static', 'step=0']  # type: ignore
+    assert last.tag_dict['step'] == 0  # type: ignore
+    assert last.tags == f'[{", ".join(last.tag_list)}] '  # type: ignore
+
+
+def test_tag_exited_across_generator_yield(caplog: LogCaptureFixture):
+    def gen():
+        with eg.tag('g'):
+            yield
+            eg.info('in gen')
+
+    steps = gen()
+    with eg.tag('outer'):
+        next(steps)
+    eg.info('after outer')
+    next(steps, None)
+    eg.info('after gen')
+
+    assert [r.tags for r in caplog.records] == ['[g] ', '[g] ', '']  # type: ignore
+
+
+def test_tags_exited_out_of_order(caplog: LogCaptureFixture):
+    first, second = eg.tag('first'), eg.tag('second')
+    first.__enter__()
+    second.__enter__()
+    first.__exit__(None, None, None)
+    eg.info('second open')
+    second.__exit__(None, None, None)
+    eg.info('none open')
+
+    assert [r.tags for r in caplog.records] == ['[second] ', '']  # type: ignore
+
+
+def test_recursive_tag_decorator(caplog: LogCaptureFixture):
+    @eg.tag('level')
+    def recurse(n):
+        eg.info(f'{n}')
+        if n:
+            recurse(n - 1)
+
+    recurse(2)
+
+    assert [r.tags for r in caplog.records] == ['[level] ', '[level, level] ', '[level, level, level] ']  # type: ignore
+    eg.info('after')
+    assert caplog.records[-1].tags == ''  # type: ignore
+
+
+def test_rendered_prefix_is_cached(caplog: LogCaptureFixture):
+    from ergolog.ergolog import ErgoTagger
+
+    counter = eg.counter()
+    with eg.tag('svc', region='eu'):
+        with eg.tag(step=counter):
+            stack = ErgoTagger._tag_stack_var.get()
+            eg.info('one')
+            prefix = stack._prefix
+            counter += 1
+            eg.info('two')
+            # the static part is rendered once per node, only the live slot changes
+            assert stack._prefix is prefix
+
+    assert caplog.records[0].tags == '[svc, region=eu, step=0] '  # type: ignore
+    assert caplog.records[1].tags == '[svc, region=eu, step=1] '  # type: ignore
+
+    # each record gets its own list, so mutating one never leaks into the cache
+    caplog.records[0].tag_list.append('mutated')  # type: ignore
+    assert caplog.records[1].tag_list == ['svc', 'region=eu', 'step=1']  # type: ignore
+
+
+def test_formatter_matches_stdlib():
+    import logging
+    from ergolog import ErgoFormatter
+
+    formatter = ErgoFormatter()
+    for level in (10, 20, 30, 40, 50):
+        for created in (1700000000.0, 1700000000.999, 1700000001.5):
+            record = logging.LogRecord('ergo', level, __file__, 1, 'msg %d', (level,), None)
+            record.created, record.msecs = created, (created - int(created)) * 1000
+            record.tags = '[a] '  # type: ignore[attr-defined]
+            expected = logging.Formatter(ErgoFormatter.FORMATS[level]).format(record)
+            assert formatter.format(record) == expected
+
+
+def test_tag_dict_typed(caplog: LogCaptureFixture):
+    counter = eg.counter()
+    timer = eg.timer()
+    with eg.tag('positional', count=counter, elapsed=timer, ratio=0.5, expr='a=b', job=lambda: 7):
+        counter += 3
+        eg.info('typed')
+
+    tag_dict = caplog.records[0].tag_dict  # type: ignore
+    assert tag_dict['positional'] is True
+    assert tag_dict['count'] == 3 and isinstance(tag_dict['count'], int)
+    assert isinstance(tag_dict['elapsed'], float)
+    assert tag_dict['ratio'] == 0.5
+    assert tag_dict['expr'] == 'a=b'  # values containing '=' survive intact
+    assert tag_dict['job'] == 7
+    assert 'expr=a=b' in caplog.records[0].tag_list  # type: ignore
+
+
+def test_tag_dict_inner_key_wins(caplog: LogCaptureFixture):
+    counter = eg.counter()
+    with eg.tag(step=counter):
+        with eg.tag(step='inner'):
+            counter += 1
+            eg.info('shadowed')
+        eg.info('live')
+
+    assert caplog.records[0].tag_dict == {'step': 'inner'}  # type: ignore
+    assert caplog.records[0].tags == '[step=1, step=inner] '  # type: ignore
+    assert caplog.records[1].tag_dict == {'step': 1}  # type: ignore
+
+
+def test_mutable_tag_value_rendered_at_entry(caplog: LogCaptureFixture):
+    config = {'a': 1}
+    with eg.tag(cfg=config):
+        config['a'] = 2
+        eg.info('first')
+        config['a'] = 3
+        eg.info('second')
+
+    assert caplog.records[0].tags == "[cfg={'a': 1}] "  # type: ignore
+    assert caplog.records[0].tag_dict == {'cfg': "{'a': 1}"}  # type: ignore
+    assert caplog.records[1].tags == "[cfg={'a': 1}] "  # type: ignore
+
+
+def test_mutable_tag_value_rendered_per_scope(caplog: LogCaptureFixture):
+    items = []
+
+    @eg.tag(items=items)
+    def work():
+        eg.info('work')
+
+    # the tagger is built before the value changes: each call shows the value at its own entry
+    items.append(1)
+    work()
+    items.append(2)
+    work()
+
+    assert caplog.records[0].tags == '[items=[1]] '  # type: ignore
+    assert caplog.records[1].tags == '[items=[1, 2]] '  # type: ignore
+
+
+def test_trace_keeps_function_metadata():
+    @eg.trace(production=True)
+    def trace_me(a, b):
+        """adds"""
+        return a + b
+
+    assert trace_me.__name__ == 'trace_me'
+    assert trace_me.__doc__ == 'adds'
+
+
+def test_trace_production_skips_warning(caplog: LogCaptureFixture):
+    @eg.trace(production=True)
+    def trace_me():
+        pass
+
+    trace_me()
+
+    assert [r.levelname for r in caplog.records] == ['DEBUG']
+
+
+def test_trace_skips_logging_when_debug_disabled(caplog: LogCaptureFixture):
+    eg.setLevel('INFO')
+
+    @eg.trace(production=True, log_args=True)
+    def trace_me():
+        pass
+
+    trace_me()
+
+    assert caplog.records == []
+    assert eg.trace_stats()[f'{__name__}.{trace_me.__qualname__}']['calls'] == 1
+
+
+def test_trace_sample_rate(caplog: LogCaptureFixture):
+    @eg.trace(production=True, sample_rate=0.0)
+    def trace_me():
+        pass
+
+    for _ in range(5):
+        trace_me()
+
+    assert caplog.records == []
+    assert eg.trace_stats()[f'{__name__}.{trace_me.__qualname__}']['calls'] == 5
+
+
+def test_trace_truncates_reprs(caplog: LogCaptureFixture):
+    @eg.trace(production=True, log_args=True, max_repr=20)
+    def trace_me(data):
+        return data
+
+    trace_me('x' * 1000)
+
+    assert all(len(arg) <= 20 for arg in caplog.records[0].args)  # type: ignore
+    assert len(caplog.records[1].message.split('returned: ')[1]) <= 20
+
+
+def test_trace_report(caplog: LogCaptureFixture):
+    @eg.trace(production=True)
+    def trace_me():
+        pass
+
+    trace_me()
+    trace_me()
+    caplog.clear()
+
+    stats = eg.trace_report()
+
+    name = f'{__name__}.{trace_me.__qualname__}'
+    assert stats[name]['calls'] == 2
+    assert stats[name]['total_s'] >= 0
+    assert any(r.message.startswith(f'{name} calls=2 ') for r in caplog.records)
+
+
+def test_infof_formats_fields(caplog: LogCaptureFixture):
+    eg.infof('user={user} items={items}', user='alice', items=3)
+
+    assert caplog.records[0].message == 'user=alice items=3'
+    assert caplog.records[0].fields == {'user': 'alice', 'items': 3}  # type: ignore
+
+
+def test_infof_template_without_fields(caplog: LogCaptureFixture):
+    eg.infof('a {{b}}')
+    eg.infof('a {{b}} {x}', x=1)
+
+    # the template is formatted whether or not fields are passed
+    assert caplog.records[0].message == 'a {b}'
+    assert caplog.records[1].message == 'a {b} 1'
+
+
+def test_debugf_callable_message(caplog: LogCaptureFixture):
+    eg.debugf(lambda: 'computed')
+
+    assert caplog.records[0].message == 'computed'
+    assert caplog.records[0].levelname == 'DEBUG'
+
+
+def test_debugf_skips_rendering_when_disabled(caplog: LogCaptureFixture):
+    eg.setLevel('INFO')
+    calls = []
+
+    eg.debugf(lambda: calls.append(1) or 'never')
+
+    class Expensive:
+        def __format__(self, spec):
+            calls.append(2)
+            return 'never'
+
+    eg.debugf('{value}', value=Expensive())
+
+    assert calls == []
+    assert caplog.records == []
+
+
+def test_logf_reports_caller_location(caplog: LogCaptureFixture):
+    eg.warningf('here')
+
+    assert caplog.records[0].filename == 'test_basic.py'
+    assert caplog.records[0].funcName == 'test_logf_reports_caller_location'
+
+
+def test_logf_levels(caplog: LogCaptureFixture):
+    eg.errorf('e')
+    eg('sub').criticalf('c')
+
+    assert [r.levelname for r in caplog.records] == ['ERROR', 'CRITICAL']
+    assert caplog.records[1].name == 'ergo.sub'
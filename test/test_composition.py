@@ -1,11 +1,14 @@
 """Tests for composability: timer laps, timer/counter as tag/event values, events with counters/timers."""
 
 import logging
-from time import sleep
+import sys
+from time import monotonic_ns, sleep, time
+
+import pytest
 from pytest import LogCaptureFixture
 
 from ergolog import eg
-from ergolog.ergolog import ErgoCounter, ErgoTimer
+from ergolog.ergolog import CLOCKS, ErgoCounter, ErgoTimer
 
 
 # ---------------------------------------------------------------------------
@@ -118,6 +121,76 @@ def test_timer_lap_resets_on_reenter():
         assert len(t.laps) == 0
 
 
+def test_timer_sub_millisecond_laps():
+    """Laps are stored in integer nanoseconds, so sub-millisecond splits are not lost."""
+    t = eg.timer()
+    first = t.lap('a')
+    second = t.lap('b')
+
+    assert 0 <= first <= second < 0.001
+    assert isinstance(t.laps_ns['a'], int)
+    assert t.laps_ns['a'] <= t.laps_ns['b']
+    assert t.laps['b'] == t.laps_ns['b'] / 1e9
+    assert isinstance(t.elapsed_ns, int)
+
+
+def test_timer_start_is_wall_clock():
+    """`start` is an epoch timestamp even though durations use a monotonic clock."""
+    before = time()
+    t = eg.timer()
+    after = time()
+
+    assert before - 0.01 <= t.start <= after + 0.01
+
+
+def test_timer_start_is_writable():
+    """Setting `start` (epoch seconds) moves the start of the timer, as it did before nanosecond timing."""
+    t = eg.timer()
+    t.start = time() - 2.5
+
+    assert 2.5 <= t.elapsed < 3.0
+    assert abs(t.start - (time() - t.elapsed)) < 0.01
+
+
+def test_timer_display_sub_millisecond():
+    """Sub-millisecond tag values are shown in microseconds instead of 0.000s."""
+    t = eg.timer()
+    assert t.__ergo_display__(0.000153) == '153us'
+    assert t.__ergo_display__(0.0) == '0us'
+    assert t.__ergo_display__(0.0153) == '0.015s'
+
+
+def test_timer_clock_selection():
+    """Each clock name is accepted and elapsed time never goes backwards."""
+    for clock in ('perf', 'monotonic', 'coarse'):
+        t = eg.timer(clock=clock)
+        assert t.clock == clock
+        first = t.elapsed_ns
+        sleep(0.02)
+        assert t.elapsed_ns >= first
+        assert t.elapsed > 0
+
+    with pytest.raises(ValueError, match='Invalid clock'):
+        eg.timer(clock='sundial')
+
+    # on Linux 'coarse' reads CLOCK_MONOTONIC_COARSE rather than falling back to monotonic_ns
+    if sys.platform == 'linux':
+        assert CLOCKS['coarse'] is not monotonic_ns
+        assert abs(CLOCKS['coarse']() - monotonic_ns()) < 100_000_000
+
+
+def test_set_clock_changes_default():
+    """`eg.set_clock` sets the clock used by new timers."""
+    try:
+        eg.set_clock('monotonic')
+        assert eg.timer().clock == 'monotonic'
+    finally:
+        eg.set_clock('perf')
+
+    with pytest.raises(ValueError, match='Invalid clock'):
+        eg.set_clock('sundial')
+
+
 # ---------------------------------------------------------------------------
 # Timer as tag value
 # ---------------------------------------------------------------------------
@@ -133,7 +206,7 @@ def test_timer_as_tag_value(caplog: LogCaptureFixture):
         eg.info('step 2')
 
     assert len(caplog.records) == 2
-    # Tag should contain 'elapsed=' and end with 's'
+    # Tag should contain 'elapsed=' and end with 's' (over a millisecond, so shown in seconds)
     tag1 = caplog.records[0].tag_list[0]  # type: ignore
     tag2 = caplog.records[1].tag_list[0]  # type: ignore
 
@@ -454,4 +527,52 @@ def test_event_warn_no_message():
         assert record.levelname == 'WARNING'
         assert 'warning' not in record.event
     finally:
-        eg._logger.removeHandler(handler)
\ No newline at end of file
+        eg._logger.removeHandler(handler)
+
+# ---------------------------------------------------------------------------
+# Custom live values (__ergo_value__)
+# ---------------------------------------------------------------------------
+
+
+class QueueDepth:
+    """A user-defined gauge: reports the current length of a list."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def __ergo_value__(self):
+        return len(self.items)
+
+
+class PoolUsage(QueueDepth):
+    def __ergo_display__(self, value):
+        return f'{value}/4'
+
+    def __call__(self):
+        raise AssertionError('live values are never called as tag factories')
+
+
+def test_custom_live_value_as_tag(caplog: LogCaptureFixture):
+    """Objects defining __ergo_value__ are evaluated per record, like counters."""
+    items = []
+    with eg.tag(depth=QueueDepth(items), pool=PoolUsage(items)):
+        eg.info('empty')
+        items.extend([1, 2])
+        eg.info('two')
+
+    assert caplog.records[0].tags == '[depth=0, pool=0/4] '  # type: ignore
+    assert caplog.records[1].tags == '[depth=2, pool=2/4] '  # type: ignore
+    assert caplog.records[1].tag_dict == {'depth': 2, 'pool': 2}  # type: ignore
+
+
+def test_custom_live_value_as_event_value():
+    """Objects defining __ergo_value__ resolve at emit time in events."""
+    items = [1]
+    e = eg.event(op='drain', depth=QueueDepth(items))
+    e.set(pool=PoolUsage(items))
+    items.append(2)
+
+    resolved = e._resolve_context()
+    assert resolved['depth'] == 2
+    assert resolved['pool'] == 2
+    assert e._resolve_value(QueueDepth(items)) == 2
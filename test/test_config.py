@@ -1,6 +1,7 @@
 """Tests for ErgoConfig — the runtime configuration API."""
 
 import logging
+import time
 import pytest
 from ergolog import eg, ErgoConfig
 
@@ -192,4 +193,593 @@ class TestAutoSetup:
         config.auto_setup()
 
         # Should still only have the one handler we added
-        assert len(logger.handlers) == 1
\ No newline at end of file
+        assert len(logger.handlers) == 1
+
+
+class TestAsyncOutput:
+    """Test queue-backed outputs written by a background thread."""
+
+    def test_async_file_output(self, clean_logger, tmp_path):
+        import threading
+        from ergolog.ergolog import ErgoAsyncHandler
+
+        log_file = tmp_path / 'async.log'
+        eg.config.add_output('file', path=str(log_file), format='plain', mode='async')
+
+        handler = logging.getLogger('ergo').handlers[0]
+        assert isinstance(handler, ErgoAsyncHandler)
+        assert isinstance(handler.target, logging.FileHandler)
+
+        writer_threads = set()
+        original_write = handler._write
+
+        def recording_write(records):
+            writer_threads.add(threading.current_thread().name)
+            original_write(records)
+
+        handler._write = recording_write  # type: ignore[method-assign]
+
+        for i in range(100):
+            eg.info(f'line {i}')
+        eg.config.flush()
+
+        lines = log_file.read_text().splitlines()
+        assert len(lines) == 100
+        assert lines[-1].endswith('line 99')
+        assert writer_threads == {'ergolog-writer'}
+        eg.config.remove_output('file', path=str(log_file))
+
+    def test_async_snapshots_live_tags(self, clean_logger, tmp_path):
+        log_file = tmp_path / 'async.jsonl'
+        eg.config.add_output('file', path=str(log_file), format='json', mode='async')
+        handler = logging.getLogger('ergo').handlers[0]
+
+        # hold the writer back so the record is formatted after the values change
+        import threading
+        gate = threading.Event()
+        original_write = handler._write
+
+        def gated_write(records):
+            gate.wait(timeout=5)
+            original_write(records)
+
+        handler._write = gated_write  # type: ignore[method-assign]
+
+        counter = eg.counter()
+        items = ['a']
+        with eg.tag(step=counter):
+            eg.info('items %s', items)
+            counter += 1
+            items.append('b')
+        gate.set()
+        eg.config.flush()
+
+        assert '"step":0' in log_file.read_text()
+        assert "items ['a']" in log_file.read_text()
+        eg.config.remove_output('file', path=str(log_file))
+
+    def test_async_renders_traceback_on_calling_thread(self, clean_logger):
+        from ergolog.ergolog import ErgoAsyncHandler
+
+        written = []
+        target = logging.Handler()
+        target.emit = written.append  # type: ignore[method-assign]
+        handler = ErgoAsyncHandler(target)
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            import sys
+            record = logging.LogRecord('ergo', logging.ERROR, __file__, 1, 'failed', None, sys.exc_info())
+        handler.handle(record)
+
+        # rendered before the record was queued, not later on the writer thread
+        assert 'ValueError: boom' in record.exc_text
+        handler.close()
+        assert written == [record]
+
+    def test_async_drops_records_after_close(self, clean_logger):
+        from ergolog.ergolog import ErgoAsyncHandler
+
+        written = []
+        target = logging.Handler()
+        target.emit = written.append  # type: ignore[method-assign]
+        handler = ErgoAsyncHandler(target, queue_size=1)
+        handler.close()
+
+        # with a full queue and no writer left, this used to block forever
+        for _ in range(3):
+            handler.handle(logging.LogRecord('ergo', logging.INFO, __file__, 1, 'late', None, None))
+        assert written == []
+        assert handler.queue.empty()
+
+    def test_async_set_format(self, clean_logger):
+        from ergolog import ErgoJSONFormatter
+
+        eg.config.add_output('stdout', mode='async')
+        eg.config.set_format('json', kind='stdout')
+
+        handler = logging.getLogger('ergo').handlers[0]
+        assert isinstance(handler.formatter, ErgoJSONFormatter)
+        assert isinstance(handler.target.formatter, ErgoJSONFormatter)
+        eg.config.remove_output('stdout')
+
+    def test_invalid_mode_raises(self, clean_logger):
+        with pytest.raises(ValueError, match="Invalid mode"):
+            eg.config.add_output('stdout', mode='threaded')
+
+    def test_invalid_level_raises(self, clean_logger):
+        eg.config.add_output('stdout')
+        with pytest.raises(ValueError, match="Invalid level 'EROR'"):
+            eg.config.add_output('stdout', buffer_bytes=100, flush_level='EROR')
+        with pytest.raises(ValueError, match="Invalid level 'LOUD'"):
+            eg.config.add_output('stdout', level='LOUD')
+        # the existing output is kept when the new one is rejected
+        assert len(logging.getLogger('ergo').handlers) == 1
+        eg.config.remove_output('stdout')
+
+
+class TestBufferedOutput:
+    """Test outputs that coalesce records into one write."""
+
+    def test_buffered_file_coalesces_writes(self, clean_logger, tmp_path):
+        from ergolog.ergolog import ErgoBufferedHandler
+
+        log_file = tmp_path / 'buffered.log'
+        eg.config.add_output('file', path=str(log_file), format='plain', buffer_bytes=4096, flush_interval=0)
+        handler = logging.getLogger('ergo').handlers[0]
+        assert isinstance(handler, ErgoBufferedHandler)
+
+        writes = []
+        original_write = handler._write
+        handler._write = lambda data: (writes.append(len(data)), original_write(data))  # type: ignore
+
+        for i in range(10):
+            eg.info(f'line {i}')
+        assert log_file.read_text() == ''
+
+        eg.config.flush()
+        assert len(log_file.read_text().splitlines()) == 10
+        assert len(writes) == 1
+        eg.config.remove_output('file', path=str(log_file))
+
+    def test_buffer_flushes_when_full(self, clean_logger, tmp_path):
+        log_file = tmp_path / 'buffered.log'
+        eg.config.add_output('file', path=str(log_file), format='plain', buffer_bytes=256, flush_interval=0)
+
+        for i in range(20):
+            eg.info(f'line {i}')
+
+        # everything that no longer fit in the buffer has been written
+        written = log_file.read_text().splitlines()
+        assert 0 < len(written) < 20
+        assert written == [line for line in written if 'line' in line]
+        eg.config.remove_output('file', path=str(log_file))
+        assert len(log_file.read_text().splitlines()) == 20
+
+    def test_error_flushes_immediately(self, clean_logger, tmp_path):
+        log_file = tmp_path / 'buffered.log'
+        eg.config.add_output('file', path=str(log_file), format='plain', buffer_bytes=4096, flush_interval=0)
+
+        eg.info('queued')
+        assert log_file.read_text() == ''
+        eg.error('boom')
+        assert log_file.read_text().splitlines()[-1].endswith('boom')
+        eg.config.remove_output('file', path=str(log_file))
+
+    def test_flush_interval(self, clean_logger, tmp_path):
+        from time import sleep
+
+        log_file = tmp_path / 'buffered.log'
+        eg.config.add_output('file', path=str(log_file), format='plain', flush_interval=0.05)
+
+        eg.info('eventually')
+        for _ in range(100):
+            if log_file.read_text():
+                break
+            sleep(0.01)
+        assert log_file.read_text().endswith('eventually\n')
+        eg.config.remove_output('file', path=str(log_file))
+
+    def test_buffered_stdout(self, clean_logger, capfd):
+        eg.config.add_output('stdout', format='plain', buffer_bytes=4096, flush_interval=0)
+        print('before', flush=True)
+        eg.info('buffered')
+        eg.config.flush()
+
+        out = capfd.readouterr().out
+        assert out.index('before') < out.index('buffered')
+        eg.config.remove_output('stdout')
+
+
+class TestRotatingOutput:
+    """Test outputs that rotate, compress and prune their segments."""
+
+    @staticmethod
+    def record(message: str, created: float) -> logging.LogRecord:
+        record = logging.LogRecord('ergo', logging.INFO, __file__, 1, message, None, None)
+        record.created = created
+        return record
+
+    def test_rotates_by_size_and_compresses(self, clean_logger, tmp_path):
+        import gzip
+        import json
+
+        log_file = tmp_path / 'app.log'
+        eg.config.add_output('rotating', path=str(log_file), format='plain', max_bytes=500, compress='gzip')
+        handler = logging.getLogger('ergo').handlers[0]
+
+        for i in range(40):
+            eg.info(f'line {i:02d} ' + 'x' * 40)
+        handler._tasks.join()  # type: ignore[attr-defined]
+
+        manifest = json.loads((tmp_path / 'app.log.manifest.json').read_text())
+        segments = manifest['segments']
+        assert len(segments) > 1
+        assert all(segment['file'].endswith('.log.gz') and segment['compressed'] == 'gzip' for segment in segments)
+        assert all(segment['start'] <= segment['end'] for segment in segments)
+        assert not [p for p in tmp_path.iterdir() if p.suffix == '.log' and p.name != 'app.log']
+
+        eg.config.remove_output('rotating', path=str(log_file))
+        lines = []
+        for segment in segments:
+            lines += gzip.decompress((tmp_path / segment['file']).read_bytes()).decode().splitlines()
+        lines += log_file.read_text().splitlines()
+        assert [line.split('line ')[1][:2] for line in lines] == [f'{i:02d}' for i in range(40)]
+
+    def test_size_counts_existing_and_encoded_bytes(self, tmp_path):
+        from ergolog.ergolog import ErgoRotatingFileHandler
+
+        log_file = tmp_path / 'app.log'
+        handler = ErgoRotatingFileHandler(str(log_file), max_bytes=100)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.handle(self.record('ü' * 30, 100.0))  # 61 bytes, 31 characters
+        handler.close()
+
+        reopened = ErgoRotatingFileHandler(str(log_file), max_bytes=100)
+        reopened.setFormatter(logging.Formatter('%(message)s'))
+        assert reopened._bytes == 61
+        reopened.handle(self.record('ü' * 30, 101.0))
+        reopened.handle(self.record('next', 102.0))
+        reopened.close()
+
+        assert len(reopened._segments) == 1
+        assert log_file.read_text(encoding='utf-8') == 'next\n'
+
+    def test_rotates_on_interval_boundaries(self, tmp_path):
+        import json
+        from ergolog.ergolog import ErgoRotatingFileHandler
+
+        handler = ErgoRotatingFileHandler(str(tmp_path / 'app.log'), rotate_every=60)
+        for created in (120.0, 150.0, 181.0, 250.0, 260.0):
+            handler.handle(self.record('tick', created))
+        handler.close()
+
+        manifest = json.loads((tmp_path / 'app.log.manifest.json').read_text())
+        assert [(s['file'], s['start'], s['end']) for s in manifest['segments']] == [
+            ('app.19700101T000200.log', 120.0, 150.0),
+            ('app.19700101T000301.log', 181.0, 181.0),
+        ]
+        assert manifest['active'] == {'file': 'app.log', 'start': 250.0, 'end': 260.0}
+
+    def test_retention_by_count_and_bytes(self, tmp_path):
+        from ergolog.ergolog import ErgoRotatingFileHandler
+
+        handler = ErgoRotatingFileHandler(str(tmp_path / 'app.log'), rotate_every=1, backup_count=3)
+        for second in range(10):
+            handler.handle(self.record('x' * 100, 1000.0 + second))
+        handler._tasks.join()
+        assert len(handler._segments) == 3
+        assert len(list(tmp_path.glob('app.*.log'))) == 3
+        handler.close()
+
+        budget = ErgoRotatingFileHandler(str(tmp_path / 'budget.log'), rotate_every=1, max_total_bytes=250)
+        for second in range(10):
+            budget.handle(self.record('x' * 100, 1000.0 + second))
+        budget._tasks.join()
+        assert sum(segment['bytes'] for segment in budget._segments) <= 250
+        assert len(list(tmp_path.glob('budget.*.log'))) == len(budget._segments) == 2
+        budget.close()
+
+    def test_same_stamp_segments_numbered_in_write_order(self, tmp_path):
+        from ergolog.ergolog import ErgoRotatingFileHandler
+
+        handler = ErgoRotatingFileHandler(str(tmp_path / 'app.log'), max_bytes=150, backup_count=3)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        for i in range(12):
+            handler.handle(self.record('x' * 100, 1000.0 + i / 100))
+            handler._tasks.join()
+        handler.close()
+
+        # retention frees the oldest names, but new segments never reuse them
+        assert [segment['file'] for segment in handler._segments] == [
+            'app.19700101T001640-2.log', 'app.19700101T001640-3.log', 'app.19700101T001640-4.log',
+        ]
+
+    def test_resumes_from_manifest(self, tmp_path):
+        from ergolog.ergolog import ErgoRotatingFileHandler
+
+        handler = ErgoRotatingFileHandler(str(tmp_path / 'app.log'), rotate_every=60, compress='lzma')
+        handler.handle(self.record('one', 100.0))
+        handler.handle(self.record('two', 200.0))
+        handler.close()
+
+        reopened = ErgoRotatingFileHandler(str(tmp_path / 'app.log'), rotate_every=60, compress='lzma')
+        assert [segment['file'] for segment in reopened._segments] == ['app.19700101T000140.log.xz']
+        assert reopened._first == 200.0
+        reopened.handle(self.record('three', 300.0))
+        reopened.close()
+        assert len(reopened._segments) == 2
+
+    def test_rotation_options_validated(self, clean_logger, tmp_path):
+        with pytest.raises(ValueError, match='only valid'):
+            eg.config.add_output('file', path=str(tmp_path / 'a.log'), max_bytes=100)
+        with pytest.raises(ValueError, match='cannot be buffered'):
+            eg.config.add_output('rotating', path=str(tmp_path / 'a.log'), buffer_bytes=100)
+        with pytest.raises(ValueError, match='Invalid compression'):
+            eg.config.add_output('rotating', path=str(tmp_path / 'a.log'), compress='zip')
+
+
+class TestRingOutput:
+    """Test the memory-mapped circular buffer output."""
+
+    def test_keeps_newest_records_in_order(self, clean_logger, tmp_path):
+        from ergolog.ergolog import ErgoRingHandler
+
+        ring_file = tmp_path / 'app.ring'
+        eg.config.add_output('ring', path=str(ring_file), format='json', ring_bytes=4096)
+        for i in range(500):
+            eg.debug(f'record {i}')
+
+        records = ErgoRingHandler.read(str(ring_file))
+        assert ring_file.stat().st_size == ErgoRingHandler.HEADER_SIZE + 4096
+        assert 10 < len(records) < 500
+        assert [seq for seq, _ in records] == list(range(500 - len(records), 500))
+        assert '"message":"record 499"' in records[-1][1]
+        eg.config.remove_output('ring', path=str(ring_file))
+
+    def test_resumes_existing_ring(self, tmp_path):
+        from ergolog.ergolog import ErgoRingHandler
+
+        ring_file = str(tmp_path / 'app.ring')
+        for run in range(2):
+            handler = ErgoRingHandler(ring_file, ring_bytes=1024)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            handler.handle(logging.LogRecord('ergo', logging.INFO, __file__, 1, f'run {run}', None, None))
+            handler.close()
+
+        assert ErgoRingHandler.read(ring_file) == [(0, 'run 0'), (1, 'run 1')]
+
+    def test_zero_ring_bytes_rejected(self, clean_logger, tmp_path):
+        with pytest.raises(ValueError, match='ring_bytes must be larger'):
+            eg.config.add_output('ring', path=str(tmp_path / 'app.ring'), ring_bytes=0)
+
+    def test_survives_sigkill(self, tmp_path):
+        import os
+        import subprocess
+        import sys
+        from ergolog.ergolog import ErgoRingHandler
+
+        ring_file = tmp_path / 'crash.ring'
+        script = (
+            'import os, signal\n'
+            'from ergolog import eg\n'
+            f'eg.config.add_output("ring", path={str(ring_file)!r}, ring_bytes=8192)\n'
+            'for i in range(100):\n'
+            '    eg.debug(f"step {i}")\n'
+            'os.kill(os.getpid(), signal.SIGKILL)\n'
+        )
+        env = {**os.environ, 'ERGOLOG_NO_AUTO_SETUP': '1', 'ERGOLOG_NO_COLORS': '1'}
+        subprocess.run([sys.executable, '-c', script], env=env)
+
+        records = ErgoRingHandler.read(str(ring_file))
+        assert records[-1][0] == 99
+        assert records[-1][1].endswith('step 99')
+
+    def test_dump_command(self, tmp_path, capsys):
+        from ergolog.__main__ import main
+        from ergolog.ergolog import ErgoRingHandler
+
+        ring_file = str(tmp_path / 'app.ring')
+        handler = ErgoRingHandler(ring_file, ring_bytes=1024)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        for message in ('first', 'second'):
+            handler.handle(logging.LogRecord('ergo', logging.INFO, __file__, 1, message, None, None))
+        handler.close()
+
+        assert main(['ring', 'dump', ring_file]) == 0
+        assert capsys.readouterr().out == 'first\nsecond\n'
+        assert main(['ring', 'dump', '--seq', ring_file]) == 0
+        assert capsys.readouterr().out == '0\tfirst\n1\tsecond\n'
+
+        (tmp_path / 'other.log').write_text('not a ring')
+        assert main(['ring', 'dump', str(tmp_path / 'other.log')]) == 1
+        assert 'not an ergolog ring file' in capsys.readouterr().err
+
+
+class TestRateLimit:
+    """Test per-call-site rate limiting on outputs and loggers."""
+
+    def test_output_rate_limit_suppresses_and_summarizes(self, clean_logger, tmp_path):
+        log_file = tmp_path / 'limited.log'
+        eg.config.add_output('file', path=str(log_file), format='plain', rate_limit=1, rate_burst=3)
+
+        for i in range(1000):
+            eg.warning(f'retrying {i}')
+        eg.info('other site')
+        eg.config.flush()
+
+        lines = log_file.read_text().splitlines()
+        assert [line.split(') ')[-1].rsplit('\x1b[0m', 1)[-1] for line in lines] == [
+            'retrying 0', 'retrying 1', 'retrying 2', 'other site', 'suppressed 997 similar messages in 0s',
+        ]
+        assert '[WARNING ]' in lines[-1]
+        eg.config.remove_output('file', path=str(log_file))
+
+    def test_summary_when_window_closes(self):
+        from ergolog.ergolog import ErgoRateLimiter
+
+        summaries = []
+        target = logging.Handler()
+        target.emit = summaries.append  # type: ignore[method-assign]
+        limiter = ErgoRateLimiter(rate=1, burst=1, window=10, handler=target)
+
+        def record(created):
+            r = logging.LogRecord('ergo', logging.WARNING, 'app.py', 7, 'tick', None, None)
+            r.created = created
+            return r
+
+        assert [limiter.filter(record(100 + i / 10)) for i in range(5)] == [True, False, False, False, False]
+        assert limiter.filter(record(112)) is True  # bucket refilled, and the window has closed
+        assert len(summaries) == 1
+        assert summaries[0].getMessage() == 'suppressed 4 similar messages in 12s'
+        assert summaries[0].suppressed == 4
+        assert (summaries[0].pathname, summaries[0].lineno) == ('app.py', 7)
+
+        limiter.flush()
+        assert len(summaries) == 1
+
+    def test_summary_after_burst_then_silence(self, monkeypatch):
+        from ergolog.ergolog import ErgoRateLimiter
+
+        monkeypatch.setattr(ErgoRateLimiter, 'TICK', 0.01)
+        summaries = []
+        target = logging.Handler()
+        target.emit = summaries.append  # type: ignore[method-assign]
+        limiter = ErgoRateLimiter(rate=1, burst=1, window=0.05, handler=target)
+
+        for _ in range(5):
+            limiter.filter(logging.LogRecord('ergo', logging.WARNING, 'app.py', 7, 'burst', None, None))
+
+        # the site never logs again: the ticker closes its window
+        deadline = time.monotonic() + 5
+        while not summaries and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(summaries) == 1
+        assert summaries[0].getMessage().startswith('suppressed 4 similar messages in ')
+
+    def test_logger_rate_limit_covers_child_loggers(self, clean_logger):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append  # type: ignore[method-assign]
+        logger = logging.getLogger('ergo')
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        child = eg('rate_child')
+
+        eg.config.set_rate_limit(1, burst=2)
+        try:
+            for _ in range(10):
+                child.info('spam')
+            for _ in range(10):
+                eg.info('spam')
+        finally:
+            eg.config.set_rate_limit(None)
+
+        assert [r.getMessage() for r in records] == ['spam'] * 4 + [
+            'suppressed 8 similar messages in 0s', 'suppressed 8 similar messages in 0s',
+        ]
+        assert not child._logger.filters
+
+
+class TestLocation:
+    """Test the per-output location option and the caller lookup it controls."""
+
+    @staticmethod
+    def isolated(name):
+        # a logger created inside the test body, so pytest's capture handlers (which need the
+        # full location) are not attached to it
+        log = eg(f'location_{name}')
+        log._logger.propagate = False
+        return log
+
+    @staticmethod
+    def json_lines(path):
+        import json
+
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    def test_cached_matches_full(self, tmp_path):
+        import inspect
+
+        log = self.isolated('cached')
+        child = log('child')
+        lines = {}
+        for location in ('full', 'cached'):
+            log_file = tmp_path / f'{location}.jsonl'
+            log.config.add_output('file', path=str(log_file), format='json', location=location)
+            for _ in range(2):  # the second pass is served from the cache
+                log.info('info')
+                log.log(logging.WARNING, 'log')
+                child.infof('infof {n}', n=1)
+                try:
+                    raise ValueError('boom')
+                except ValueError:
+                    log.exception('exception')
+                with log.event(action='x'):
+                    pass
+            log.config.remove_output('file', path=str(log_file))
+            lines[location] = [entry['location'] for entry in self.json_lines(log_file)]
+
+        assert lines['cached'] == lines['full']
+        assert lines['full'][0]['file'] == 'test_config.py'
+        assert lines['full'][0]['function'] == inspect.currentframe().f_code.co_name  # type: ignore[union-attr]
+
+    def test_off_skips_caller_lookup(self, tmp_path, monkeypatch):
+        log = self.isolated('off')
+        calls = []
+        monkeypatch.setattr(logging.Logger, 'findCaller', lambda *args, **kwargs: calls.append(1))
+        log_file = tmp_path / 'off.jsonl'
+        log.config.add_output('file', path=str(log_file), format='json', location='off')
+
+        log.info('hello')
+        log.config.remove_output('file', path=str(log_file))
+
+        assert calls == []
+        assert 'location' not in self.json_lines(log_file)[0]
+
+    def test_off_text_output_omits_location(self, tmp_path):
+        log = self.isolated('text')
+        log_file = tmp_path / 'off.log'
+        log.config.add_output('file', path=str(log_file), format='plain', location='off')
+
+        log.info('hello')
+        log.config.set_format('json', kind='file', path=str(log_file))
+        log.info('json')
+        log.config.remove_output('file', path=str(log_file))
+
+        text, json_line = log_file.read_text().splitlines()
+        assert 'test_config.py' not in text
+        assert text.endswith('hello')
+        assert '"location"' not in json_line
+
+    def test_most_detailed_output_wins(self, tmp_path):
+        log = self.isolated('mixed')
+        full_file, off_file = tmp_path / 'full.jsonl', tmp_path / 'off.jsonl'
+        log.config.add_output('file', path=str(full_file), format='json')
+        log.config.add_output('file', path=str(off_file), format='json', location='off')
+
+        log.info('hello')
+        log.config.remove_output('file', path=str(full_file))
+        log.config.remove_output('file', path=str(off_file))
+
+        assert self.json_lines(full_file)[0]['location']['file'] == 'test_config.py'
+        assert 'location' not in self.json_lines(off_file)[0]
+
+    def test_rate_limited_output_still_tells_sites_apart(self, tmp_path):
+        log = self.isolated('limited')
+        log_file = tmp_path / 'limited.log'
+        log.config.add_output('file', path=str(log_file), format='plain', location='off',
+                              rate_limit=1, rate_burst=1)
+
+        for _ in range(3):
+            log.info('first site')
+        for _ in range(3):
+            log.info('second site')
+        log.config.remove_output('file', path=str(log_file))
+
+        messages = [line.rsplit('\x1b[0m', 1)[-1].strip() for line in log_file.read_text().splitlines()]
+        assert messages[:2] == ['first site', 'second site']
+
+    def test_invalid_location(self, clean_logger):
+        with pytest.raises(ValueError, match='location'):
+            eg.config.add_output('stdout', location='partial')
@@ -1,8 +1,11 @@
 """Tests for ErgoCounter — counter/accumulator tag values."""
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from pytest import LogCaptureFixture
 
-from ergolog import eg
+from ergolog import ErgoShardedCounter, eg
 
 
 def test_counter_starts_at_zero(caplog: LogCaptureFixture):
@@ -104,4 +107,66 @@ def test_counter_repr_and_str():
     assert str(counter) == '0'
     counter += 42
     assert repr(counter) == '42'
-    assert str(counter) == '42'
\ No newline at end of file
+    assert str(counter) == '42'
+
+
+def test_sharded_counter_exact_across_threads(caplog: LogCaptureFixture):
+    """Increments from many threads are summed exactly on read."""
+    counter = eg.counter(sharded=True)
+    assert isinstance(counter, ErgoShardedCounter)
+
+    def work():
+        nonlocal counter
+        for _ in range(10_000):
+            counter += 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter == 80_000
+    with eg.tag(step=counter):
+        eg.info('done')
+    assert caplog.records[0].tags == '[step=80000] '  # type: ignore
+
+
+def test_sharded_counter_in_executor_and_event():
+    """A sharded counter shared with a thread pool resolves to the total in an event."""
+    counter = eg.counter(sharded=True)
+    with eg.event(op='batch') as e:
+        e.set(processed=counter)
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda n: counter.__iadd__(n), range(100)))
+        counter -= 50
+        assert e._resolve_context()['processed'] == sum(range(100)) - 50
+
+
+def test_sharded_counter_folds_finished_threads():
+    """Shards of exited threads are folded into the total, so short-lived threads don't pile up."""
+    counter = eg.counter(sharded=True)
+
+    def work():
+        nonlocal counter
+        counter += 2
+
+    for _ in range(200):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    assert counter == 400
+    assert len(counter._state[1]) <= 1
+    counter += 1
+    assert counter == 401
+
+
+def test_sharded_counter_count_loop(caplog: LogCaptureFixture):
+    loops = eg.counter(sharded=True)
+    with eg.tag(i=loops):
+        for item in loops.count(['a', 'b']):
+            eg.info(item)
+
+    assert [r.tags for r in caplog.records] == ['[i=1] ', '[i=2] ']  # type: ignore
+    assert repr(loops) == '2'
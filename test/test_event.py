@@ -289,4 +289,261 @@ def test_event_with_override_context():
         assert len(messages) == 1
         assert messages[0].event['user'] == 'overridden'
     finally:
-        eg._logger.removeHandler(handler)
\ No newline at end of file
+        eg._logger.removeHandler(handler)
+
+
+def test_event_skipped_when_level_disabled(caplog):
+    """A disabled event level skips resolution and logs nothing."""
+    resolved = []
+
+    class Gauge:
+        def __str__(self):
+            resolved.append(True)
+            return 'gauge'
+
+    caplog.set_level(logging.WARNING, logger='ergo')
+    with eg.event(gauge=Gauge()) as e:
+        pass
+
+    assert caplog.records == []
+    assert resolved == []
+    e.emit()  # sealed, still a no-op
+    assert caplog.records == []
+
+    with eg.event(gauge=Gauge()) as e:
+        e.warn('slow')
+    assert len(caplog.records) == 1
+
+
+def test_event_message_is_lazy(recorder):
+    """The human-readable message is only built when a formatter asks for it."""
+    import json
+    from ergolog.ergolog import ErgoEventMessage
+
+    # only the capturing handler, which never formats; pytest's own capture would
+    eg._logger.handlers[:] = [recorder]
+    eg._logger.propagate = False
+
+    with eg.event(user='alice'):
+        pass
+
+    msg = recorder.records[0].msg
+    assert isinstance(msg, ErgoEventMessage)
+
+    # nothing has formatted the record yet, so the message line is not rendered
+    assert msg._message is None
+
+    obj = json.loads(ErgoJSONFormatter().format(recorder.records[0]))
+    assert obj['message'].startswith('user=alice | duration=')
+    assert obj['event']['user'] == 'alice'
+
+    message = recorder.records[0].getMessage()
+    assert message == obj['message']
+    assert str(msg) is message  # rendered once, then cached
+
+
+def test_event_tags_are_typed(caplog):
+    """Events capture tags with their native values."""
+    counter = eg.counter()
+    with eg.tag('svc', count=counter, retries=2):
+        counter += 5
+        with eg.event(op='typed'):
+            pass
+
+    assert caplog.records[-1].event['tags'] == {'svc': True, 'count': 5, 'retries': 2}
+
+
+def test_event_head_sampling(caplog):
+    """A sample rate of 0 drops ordinary events; 1 keeps them and records the rate."""
+    with eg.event(sample_rate=0.0, op='dropped'):
+        pass
+    assert caplog.records == []
+
+    with eg.event(sample_rate=1.0, op='kept'):
+        pass
+    assert caplog.records[0].event['sample_rate'] == 1.0
+    assert caplog.records[0].sample_rate == 1.0
+
+
+def test_event_sampling_skips_resolution(caplog):
+    """Dropped events never resolve their context."""
+    resolved = []
+
+    class Gauge:
+        def __str__(self):
+            resolved.append(True)
+            return 'gauge'
+
+    for _ in range(20):
+        with eg.event(sample_rate=0.0, gauge=Gauge()):
+            pass
+    assert resolved == []
+    assert caplog.records == []
+
+
+def test_event_sample_key_is_deterministic(caplog):
+    """Every event with the same sample key gets the same decision."""
+    keys = [f'req-{i}' for i in range(200)]
+    first = {key: eg.event(sample_rate=0.3, sample_key=key).sampled for key in keys}
+    second = {key: eg.event(sample_rate=0.3, sample_key=key).sampled for key in keys}
+
+    assert first == second
+    assert 20 < sum(first.values()) < 100  # roughly 30% of keys
+
+
+def test_event_tail_rules_keep_warnings_errors_and_slow(caplog):
+    """Warnings, errors and slow events are kept regardless of the head sample."""
+    import time
+
+    with eg.event(sample_rate=0.0) as e:
+        e.warn('degraded')
+
+    with pytest.raises(ValueError):
+        with eg.event(sample_rate=0.0):
+            raise ValueError('boom')
+
+    with eg.event(sample_rate=0.0, keep_slower_than=0.01):
+        time.sleep(0.02)
+
+    with eg.event(sample_rate=0.0, keep_slower_than=10):
+        pass
+
+    assert [r.levelname for r in caplog.records] == ['WARNING', 'ERROR', 'INFO']
+    # kept by a tail rule, so each stands for exactly one event
+    assert all(r.event['sample_rate'] == 1.0 for r in caplog.records)
+
+
+def test_event_sample_rate_recorded(caplog):
+    """Head-sampled events carry their rate for re-weighting."""
+    for i in range(50):
+        with eg.event(sample_rate=0.5, sample_key=i):
+            pass
+
+    assert 0 < len(caplog.records) < 50
+    assert all(r.event['sample_rate'] == 0.5 for r in caplog.records)
+
+
+def test_event_rollup_merges_groups(caplog):
+    """Rolled-up events are merged per rollup name and initial context into one summary."""
+    from ergolog.ergolog import ErgoRollup
+
+    for i in range(100):
+        with eg.event(rollup='cache_get', window=60, cache='users'):
+            pass
+    for i in range(10):
+        with pytest.raises(KeyError):
+            with eg.event(rollup='cache_get', window=60, cache='orders') as e:
+                e.set(key=i)  # not part of the group key
+                raise KeyError(i)
+
+    assert caplog.records == []
+    ErgoRollup.flush()
+
+    summaries = {r.event['cache']: r.event for r in caplog.records}
+    assert set(summaries) == {'users', 'orders'}
+    users, orders = summaries['users'], summaries['orders']
+    assert users['rollup'] == 'cache_get'
+    assert (users['count'], users['errors']) == (100, 0)
+    assert (orders['count'], orders['errors']) == (10, 10)
+    assert 'key' not in orders
+    assert users['duration_min'] <= users['duration_p50'] <= users['duration_p95'] <= users['duration_max']
+    assert users['duration_min'] <= users['duration_mean'] <= users['duration_max']
+    assert all(r.levelname == 'INFO' for r in caplog.records)
+
+
+def test_event_rollup_window_closes(caplog, monkeypatch):
+    """The next event after a window has passed emits the finished window's summary."""
+    from ergolog import ergolog
+
+    now = [1000.0]
+    monkeypatch.setattr(ergolog, 'monotonic_ns', lambda: int(now[0] * 1e9))
+    for _ in range(3):
+        eg.event(rollup='tick', window=10).emit()
+    now[0] += 11
+    eg.event(rollup='tick', window=10).emit()
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].event['count'] == 3
+    assert caplog.records[0].event['window_s'] == 11.0
+
+    ergolog.ErgoRollup.flush()
+    assert caplog.records[1].event['count'] == 1
+
+
+def test_event_rollup_ignores_wall_clock_steps(caplog, monkeypatch):
+    """A wall-clock step neither closes a window early nor makes window_s negative."""
+    from ergolog import ergolog
+
+    wall = [1000.0]
+    monkeypatch.setattr(ergolog, 'time_ns', lambda: int(wall[0] * 1e9))
+    eg.event(rollup='stepped', window=10).emit()
+    wall[0] += 3600  # NTP step forward
+    eg.event(rollup='stepped', window=10).emit()
+    assert caplog.records == []
+
+    wall[0] -= 7200  # and back
+    ergolog.ErgoRollup.flush()
+    assert caplog.records[0].event['count'] == 2
+    assert caplog.records[0].event['window_s'] >= 0
+
+
+def test_event_rollup_summary_has_no_caller_tags(caplog, monkeypatch):
+    """The summary is not tagged with the scope of the event that happened to close the window."""
+    from ergolog import ergolog
+
+    now = [1000.0]
+    monkeypatch.setattr(ergolog, 'monotonic_ns', lambda: int(now[0] * 1e9))
+    with eg.tag(request_id='r1'):
+        eg.event(rollup='tagged', window=10).emit()
+    now[0] += 11
+    with eg.tag(request_id='r2'):
+        eg.event(rollup='tagged', window=10).emit()
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].tags == ''
+    assert 'tags' not in caplog.records[0].event
+    ergolog.ErgoRollup.flush()
+
+
+def test_event_rollup_memory_is_bounded(caplog, monkeypatch):
+    """Groups beyond the limit are merged into one overflow group."""
+    from ergolog.ergolog import ErgoRollup
+
+    monkeypatch.setattr(ErgoRollup, 'MAX_GROUPS', 5)
+    monkeypatch.setattr(ErgoRollup, 'RESERVOIR_SIZE', 8)
+    for i in range(50):
+        eg.event(rollup='lookup', user=i).emit()
+    assert len(ErgoRollup._groups) == 6
+    assert all(len(group.samples) <= 8 for group in ErgoRollup._groups.values())
+
+    ErgoRollup.flush()
+    overflow = [r.event for r in caplog.records if r.event.get('overflow')]
+    assert len(overflow) == 1 and overflow[0]['count'] == 45
+
+
+@pytest.mark.parametrize('rate', [-0.1, 1.5])
+def test_event_rejects_sample_rate_outside_0_1(rate):
+    with pytest.raises(ValueError, match='sample_rate must be between 0 and 1'):
+        eg.event(sample_rate=rate)
+
+
+def test_event_rollup_rejects_sampling():
+    with pytest.raises(ValueError, match='cannot also be sampled'):
+        eg.event(rollup='x', sample_rate=0.5)
+
+
+def test_event_rollup_flushes_at_exit():
+    """Open windows are written when the interpreter exits."""
+    import os
+    import subprocess
+    import sys
+
+    script = (
+        'from ergolog import eg\n'
+        'for _ in range(5):\n'
+        '    eg.event(rollup="cache_get", window=3600).emit()\n'
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            env={**os.environ, 'ERGOLOG_NO_COLORS': '1'})
+    assert 'rollup=cache_get' in result.stdout
+    assert 'count=5' in result.stdout
@@ -0,0 +1,116 @@
+"""Tests for eg.executor() and eg.thread(): tag propagation and per-task queue-wait/run time."""
+
+import threading
+from time import sleep
+
+import pytest
+
+from ergolog import eg
+from ergolog.ergolog import ErgoEvent, ErgoTagger
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics():
+    eg.metrics.reset()
+    yield
+    eg.metrics.reset()
+
+
+def tags_now():
+    return ErgoTagger._tag_stack_var.get().render()[1]
+
+
+def test_tasks_run_under_submitting_tags():
+    with eg.executor(2) as pool:
+        with eg.tag('request', id=7):
+            inside = pool.submit(tags_now)
+        outside = pool.submit(tags_now)
+        # map() goes through submit() too
+        with eg.tag('batch'):
+            mapped = list(pool.map(lambda _: tags_now(), range(4)))
+
+    assert inside.result() == '[request, id=7] '
+    assert outside.result() == ''
+    assert mapped == ['[batch] '] * 4
+
+
+def test_tags_do_not_leak_between_tasks(recorder):
+    def work(i):
+        with eg.tag(f'task{i}'):
+            eg.info('step')
+
+    with eg.executor(1) as pool:
+        with eg.tag('outer'):
+            list(pool.map(work, range(3)))
+        pool.submit(eg.info, 'after').result()
+
+    assert [r.tags for r in recorder.records] == [
+        '[outer, task0] ', '[outer, task1] ', '[outer, task2] ', '',
+    ]
+
+
+def test_queue_wait_and_run_recorded_as_metrics():
+    with eg.executor(1, name='io') as pool:
+        for _ in range(3):
+            pool.submit(sleep, 0.02)
+
+    snapshot = eg.metrics.snapshot()
+    assert snapshot['executor.run[pool=io]']['count'] == 3
+    assert snapshot['executor.run[pool=io]']['min_s'] >= 0.015
+    # one worker: the last task waited for the two before it
+    assert snapshot['executor.queue_wait[pool=io]']['max_s'] >= 0.03
+
+
+def test_metrics_can_be_turned_off():
+    with eg.executor(1, metric=None) as pool:
+        pool.submit(sleep, 0).result()
+    assert eg.metrics.snapshot() == {}
+
+
+def test_active_event_collects_pool_usage(recorder):
+    with eg.executor(1, name='db') as pool:
+        with eg.event(op='report'):
+            for _ in range(2):
+                pool.submit(sleep, 0.02)
+            pool.submit(sleep, 0).result()
+
+    event = recorder.records[-1].event
+    assert event['op'] == 'report'
+    usage = event['db']
+    assert usage['tasks'] == 3
+    assert usage['run_s'] >= 0.035
+    assert usage['max_queue_wait_s'] >= 0.035
+    assert usage['queue_wait_s'] >= usage['max_queue_wait_s']
+
+
+def test_event_is_current_inside_tasks():
+    with eg.executor(1) as pool:
+        with eg.event() as e:
+            seen = pool.submit(ErgoEvent._current_var.get).result()
+        after = pool.submit(ErgoEvent._current_var.get).result()
+
+    assert seen is e
+    assert after is None
+    assert ErgoEvent._current_var.get() is None
+
+
+def test_thread_keeps_creation_tags():
+    seen = []
+    with eg.tag('job', n=1):
+        thread = eg.thread(target=lambda: seen.append(tags_now()))
+    plain = threading.Thread(target=lambda: seen.append(tags_now()))
+    thread.start()
+    thread.join()
+    plain.start()
+    plain.join()
+
+    assert seen[0] == '[job, n=1] '
+    assert seen[1] == ''
+
+
+def test_event_field_named_like_pool_is_kept(recorder):
+    with eg.executor(1) as pool:
+        with eg.event(executor='celery'):
+            pool.submit(sleep, 0).result()
+
+    assert recorder.records[-1].event['executor'] == 'celery'
@@ -0,0 +1,130 @@
+"""Tests for the flight recorder — low-level records held per scope until an error."""
+
+import logging
+
+import pytest
+
+from ergolog import eg
+from ergolog.ergolog import ErgoFlightRecorder
+
+
+@pytest.fixture
+def recorder(recorder):
+    """Install a flight recorder on the ergo logger, capturing what it lets through."""
+    eg.config.set_flight_recorder('WARNING', capacity=100)
+    try:
+        yield recorder
+    finally:
+        eg.config.set_flight_recorder(None)
+
+
+def test_clean_scope_discards_held_records(recorder):
+    with eg.tag('request'):
+        eg.debug('step 1')
+        eg.info('step 2')
+        eg.warning('slow')
+
+    assert recorder.messages == ['slow']
+    assert ErgoFlightRecorder.active == 1
+
+
+def test_error_flushes_held_records_in_order(recorder):
+    with eg.tag('request', user='alice'):
+        eg.debug('step 1')
+        eg.info('step 2')
+        eg.error('boom')
+
+    assert recorder.messages == ['step 1', 'step 2', 'boom']
+    # tags are captured when the record is held, not when it is flushed
+    assert recorder.records[0].tags == '[request, user=alice] '
+
+
+def test_error_flushes_enclosing_scopes(recorder):
+    with eg.tag('outer'):
+        eg.debug('outer 1')
+        with eg.tag('inner'):
+            eg.debug('inner 1')
+            eg.error('boom')
+        eg.debug('outer 2')
+
+    assert recorder.messages == ['outer 1', 'inner 1', 'boom']
+
+
+def test_failed_scope_hands_records_to_parent(recorder):
+    @eg.tag('job')
+    def job():
+        eg.debug('working')
+        raise ValueError('bad input')
+
+    with eg.tag('request'):
+        try:
+            job()
+        except ValueError:
+            eg.exception('job failed')
+
+    assert recorder.messages == ['working', 'job failed']
+
+
+def test_event_ending_at_error_flushes(recorder):
+    with pytest.raises(RuntimeError):
+        with eg.event(op='checkout'):
+            eg.debug('loaded cart')
+            raise RuntimeError('payment declined')
+
+    assert recorder.messages[0] == 'loaded cart'
+    assert recorder.records[1].event['op'] == 'checkout'
+
+    with eg.event(op='checkout'):
+        eg.debug('loaded cart')
+    assert len(recorder.records) == 3  # only the second event itself
+
+
+def test_outside_scope_and_child_loggers(recorder):
+    eg.debug('top level')
+    child = eg('flight_child')
+    with eg.tag('request'):
+        child.debug('from child')
+    assert recorder.messages == ['top level']
+
+    with eg.tag('request'):
+        child.debug('from child')
+        child.error('child failed')
+    assert recorder.messages[1:] == ['from child', 'child failed']
+
+
+def test_held_records_are_not_formatted(recorder):
+    recorder.setFormatter(logging.Formatter('%(message)s'))
+    with eg.tag('request'):
+        for i in range(50):
+            eg.debug('step %d', i)
+
+    assert recorder.formatted == 0
+    assert recorder.records == []
+
+
+def test_capacity_drops_oldest(recorder):
+    with eg.tag('request'):
+        for i in range(150):
+            eg.debug(f'step {i}')
+        eg.error('boom')
+
+    assert len(recorder.records) == 101
+    assert recorder.messages[0] == 'step 50'
+
+
+def test_disabled_recorder_removes_filters():
+    eg.config.set_flight_recorder('INFO')
+    child = eg('flight_child_off')
+    assert any(isinstance(f, ErgoFlightRecorder) for f in child._logger.filters)
+    eg.config.set_flight_recorder(None)
+    assert not any(isinstance(f, ErgoFlightRecorder) for f in child._logger.filters)
+    assert not any(isinstance(f, ErgoFlightRecorder) for f in eg._logger.filters)
+    assert ErgoFlightRecorder.active == 0
+
+
+def test_invalid_level_keeps_current_recorder(recorder):
+    current = eg.config._flight_recorder
+    with pytest.raises(ValueError, match="Invalid level 'EROR'"):
+        eg.config.set_flight_recorder('DEBUG', flush_level='EROR')
+    assert eg.config._flight_recorder is current
+    assert ErgoFlightRecorder.active == 1
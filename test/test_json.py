@@ -0,0 +1,157 @@
+"""Tests for ErgoJSONFormatter output."""
+
+import json
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from ergolog import ErgoJSONFormatter, eg
+from ergolog import ergolog as ergolog_module
+
+
+def reference_format(record: logging.LogRecord) -> str:
+    """The JSON line as built with json.dumps, for byte-for-byte comparison."""
+    obj = {
+        'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+        'level': record.levelname,
+        'name': record.name,
+        'message': record.getMessage(),
+    }
+    tag_dict = getattr(record, 'tag_dict', None)
+    if tag_dict:
+        obj['tags'] = tag_dict
+    event = getattr(record, 'event', None)
+    if event:
+        obj['event'] = event
+        obj['duration_s'] = round(record.duration, 6)  # type: ignore[attr-defined]
+    obj['location'] = {'file': record.filename, 'line': record.lineno, 'function': record.funcName}
+    return json.dumps(obj, separators=(',', ':'))
+
+
+@pytest.fixture
+def stdlib_encoder(monkeypatch):
+    monkeypatch.setattr(ergolog_module, '_json_dumps', ergolog_module._stdlib_json_dumps)
+
+
+@pytest.mark.parametrize('created', [
+    1700000000.0,           # no fractional part: isoformat omits microseconds
+    1700000000.5,
+    1700000000.123456,
+    1700000000.9999996,     # rounds up into the next second
+    1700000001.0000004,
+])
+def test_timestamp_matches_isoformat(created):
+    formatter = ErgoJSONFormatter()
+    record = logging.LogRecord('ergo', logging.INFO, __file__, 1, 'msg', None, None)
+    record.created = created
+
+    timestamp = json.loads(formatter.format(record))['timestamp']
+    assert timestamp == datetime.fromtimestamp(created, tz=timezone.utc).isoformat()
+
+
+def test_output_is_byte_compatible(stdlib_encoder):
+    formatter = ErgoJSONFormatter()
+    messages = ['plain', 'quotes " and \\ backslash', 'unicode ✓ ünïcode', 'new\nline']
+    for i, message in enumerate(messages):
+        record = logging.LogRecord('ergo.sub', logging.WARNING, __file__, 10 + i, message, None, None)
+        record.created += i * 0.37
+        record.tag_dict = {'svc': True, 'n': i, 'expr': 'a=b', 'ratio': i / 3}  # type: ignore[attr-defined]
+        # the second pass hits the fragment caches
+        assert formatter.format(record) == reference_format(record)
+        assert formatter.format(record) == reference_format(record)
+
+
+def test_event_output_is_byte_compatible(stdlib_encoder):
+    from ergolog.ergolog import ErgoEventMessage
+
+    formatter = ErgoJSONFormatter()
+    context = {'user': 'alice', 'items': 3, 'duration_s': 0.25}
+    record = logging.LogRecord('ergo', logging.INFO, __file__, 1, ErgoEventMessage(context, 0.25, None), None, None)
+    record.event = context  # type: ignore[attr-defined]
+    record.duration = 0.25  # type: ignore[attr-defined]
+
+    assert formatter.format(record) == reference_format(record)
+    assert json.loads(formatter.format(record))['message'] == 'user=alice items=3 | duration=0.250s'
+
+
+@pytest.mark.parametrize('value', [
+    {'s': 'ünïcode "q"', 'i': -7, 'f': 0.1, 'b': False, 'n': None},
+    {'nested': {'deep': {'x': [1, 2.5, 'three']}}, 'list': [True, None]},
+    {'nan': float('nan'), 'inf': float('inf'), 'big': 2**70},
+    {1: 'int key', None: 'none key', 'mixed': True},
+    {'path': Path('/tmp/data.csv'), 'amount': Decimal('9.99')},
+    {},
+])
+def test_stdlib_dumps_matches_json_dumps(value):
+    expected = json.dumps(value, separators=(',', ':'), default=str)
+    assert ergolog_module._stdlib_json_dumps(value) == expected
+    # the second pass hits the key fragment cache
+    assert ergolog_module._stdlib_json_dumps(value) == expected
+
+
+def test_fragment_caches_are_bounded(monkeypatch):
+    formatter = ErgoJSONFormatter()
+    monkeypatch.setattr(formatter, 'CACHE_SIZE', 8)
+    for i in range(50):
+        record = logging.LogRecord('ergo', logging.INFO, __file__, i, 'msg', None, None)
+        assert json.loads(formatter.format(record))['location']['line'] == i
+
+    assert len(formatter._location_cache) <= 8
+
+
+def test_exception_and_duration():
+    formatter = ErgoJSONFormatter()
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        import sys
+        record = logging.LogRecord('ergo', logging.ERROR, __file__, 1, 'failed', None, sys.exc_info())
+    record.duration = 0.1234567  # type: ignore[attr-defined]
+
+    obj = json.loads(formatter.format(record))
+    assert obj['duration_s'] == 0.123457
+    assert 'ValueError: boom' in obj['error']
+
+
+def test_fields_included():
+    formatter = ErgoJSONFormatter()
+    record = logging.LogRecord('ergo', logging.INFO, __file__, 1, 'msg', None, None)
+    record.fields = {'user': 'alice', 'items': 3}  # type: ignore[attr-defined]
+
+    assert json.loads(formatter.format(record))['fields'] == {'user': 'alice', 'items': 3}
+
+
+@pytest.mark.parametrize('encoder', ['_stdlib_json_dumps', '_orjson_dumps'])
+def test_non_json_values_written_as_str(monkeypatch, encoder):
+    if encoder == '_orjson_dumps':
+        pytest.importorskip('orjson')
+    monkeypatch.setattr(ergolog_module, '_json_dumps', getattr(ergolog_module, encoder))
+    formatter = ErgoJSONFormatter()
+    record = logging.LogRecord('ergo', logging.INFO, __file__, 1, 'msg', None, None)
+    with eg.tag('job', path=Path('/tmp/data.csv'), n=3):
+        ergolog_module.ErgoTagFilter().filter(record)
+    record.fields = {'amount': Decimal('9.99')}  # type: ignore[attr-defined]
+
+    obj = json.loads(formatter.format(record))
+    assert obj['tags'] == {'job': True, 'path': str(Path('/tmp/data.csv')), 'n': 3}
+    assert obj['fields'] == {'amount': '9.99'}
+
+
+@pytest.mark.parametrize('encoder', ['_stdlib_json_dumps', '_orjson_dumps'])
+def test_ints_beyond_64_bits_are_kept(monkeypatch, encoder):
+    if encoder == '_orjson_dumps':
+        pytest.importorskip('orjson')
+    monkeypatch.setattr(ergolog_module, '_json_dumps', getattr(ergolog_module, encoder))
+    record = logging.LogRecord('ergo', logging.INFO, __file__, 1, 'msg', None, None)
+    record.fields = {'big': 2**70}  # type: ignore[attr-defined]
+
+    assert json.loads(ErgoJSONFormatter().format(record))['fields'] == {'big': 2**70}
+
+
+@pytest.mark.skipif(bool(ergolog_module.NO_ORJSON), reason='ERGOLOG_NO_ORJSON is set')
+def test_orjson_used_when_installed():
+    expected = ergolog_module._stdlib_json_dumps if ergolog_module.orjson is None else ergolog_module._orjson_dumps
+    assert ergolog_module._json_dumps is expected
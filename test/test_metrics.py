@@ -0,0 +1,204 @@
+"""Tests for ErgoHistogram and the eg.metrics registry."""
+
+import json
+import threading
+
+from ergolog import ErgoHistogram, ErgoMetrics, eg
+
+
+def test_histogram_small_values_are_exact():
+    histogram = ErgoHistogram()
+    for value in range(1, 11):
+        histogram.record_ns(value)
+
+    assert histogram.count == 10
+    assert histogram.percentile_ns(50) == 5
+    assert histogram.percentile_ns(100) == 10
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = ErgoHistogram()
+    for i in range(1, 10_001):
+        histogram.record_ns(i * 1000)
+
+    for q in (50, 90, 99, 99.9):
+        exact = ceil_rank(10_000, q) * 1000
+        assert abs(histogram.percentile_ns(q) - exact) / exact < 0.02
+
+
+def ceil_rank(n: int, q: float) -> int:
+    return -(-n * q // 100)
+
+
+def test_histogram_percentiles_clipped_to_min_max():
+    histogram = ErgoHistogram()
+    histogram.record_ns(1_000_000)
+
+    assert histogram.percentile_ns(0) == 1_000_000
+    assert histogram.percentile_ns(100) == 1_000_000
+
+
+def test_histogram_bucket_bounds_cover_value():
+    for value in (0, 1, 63, 64, 65, 1000, 123_456_789, 2**40 + 12345):
+        low, high = ErgoHistogram._bounds(ErgoHistogram._bucket(value))
+        assert low <= value <= high
+
+
+def test_histogram_merge():
+    a, b = ErgoHistogram(), ErgoHistogram()
+    for i in range(100):
+        a.record_ns(i)
+        b.record_ns(1000 + i)
+
+    a.merge(b)
+
+    assert a.count == 200
+    assert a.min == 0
+    assert a.max == 1099
+
+
+def test_histogram_round_trips_through_json():
+    histogram = ErgoHistogram()
+    for i in range(500):
+        histogram.record(i / 1000)
+
+    copy = ErgoHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+
+    assert copy.summary() == histogram.summary()
+
+
+def test_metrics_keyed_by_name_and_tags():
+    metrics = ErgoMetrics()
+    metrics.record('db.query', 0.01, table='users')
+    metrics.record('db.query', 0.02, table='orders')
+    metrics.record('db.query', 0.03, table='users')
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot['db.query[table=users]']['count'] == 2
+    assert snapshot['db.query[table=orders]']['count'] == 1
+    assert snapshot['db.query[table=users]']['max_s'] == 0.03
+
+
+def test_metrics_snapshot_percentiles():
+    metrics = ErgoMetrics()
+    metrics.record('request', 0.5)
+
+    summary = metrics.snapshot(percentiles=(50, 99))['request']
+
+    assert set(summary) == {'count', 'min_s', 'mean_s', 'max_s', 'p50_s', 'p99_s'}
+
+
+def test_metrics_merge_export():
+    worker, parent = ErgoMetrics(), ErgoMetrics()
+    worker.record('job', 0.1, kind='a')
+    parent.record('job', 0.2, kind='a')
+
+    parent.merge(json.loads(json.dumps(worker.export())))
+
+    assert parent.snapshot()['job[kind=a]']['count'] == 2
+
+
+def test_record_ns_accepts_floats():
+    metrics = ErgoMetrics()
+    metrics.record_ns('x', 1.5e6)
+
+    assert metrics.snapshot()['x']['count'] == 1
+    assert metrics.histogram('x').max == 1_500_000
+
+
+def test_metrics_threaded_records():
+    metrics = ErgoMetrics()
+
+    def work():
+        for i in range(1000):
+            metrics.record_ns('work', i)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.snapshot()['work']['count'] == 8000
+
+
+def test_timer_records_total_and_laps():
+    eg.metrics.reset()
+    with eg.timer(metric='pipeline') as t:
+        t.lap('fetch')
+        t.lap('save')
+        t.lap()  # unnamed laps are not recorded
+
+    snapshot = eg.metrics.snapshot()
+
+    assert snapshot['pipeline']['count'] == 1
+    assert snapshot['pipeline[lap=fetch]']['count'] == 1
+    assert snapshot['pipeline[lap=save]']['count'] == 1
+    assert len(snapshot) == 3
+
+
+def test_event_records_duration_even_when_sampled_out():
+    eg.metrics.reset()
+    for _ in range(5):
+        with eg.event(histogram='checkout', sample_rate=0.0):
+            pass
+
+    assert eg.metrics.snapshot()['checkout']['count'] == 5
+
+
+def test_event_metric_is_plain_context(caplog):
+    eg.metrics.reset()
+    eg.event(metric='cpu', value=0.5).emit()
+
+    assert caplog.records[0].event['metric'] == 'cpu'  # type: ignore
+    assert eg.metrics.snapshot() == {}
+
+
+def test_trace_records_per_function():
+    eg.metrics.reset()
+
+    @eg.trace
+    def handler():
+        return 1
+
+    handler()
+    handler()
+
+    key = f'trace.{__name__}.test_trace_records_per_function.<locals>.handler'
+    assert eg.metrics.snapshot()[key]['count'] == 2
+
+
+def test_trace_records_again_after_reset():
+    eg.metrics.reset()
+
+    @eg.trace(production=True)
+    def handler():
+        return 1
+
+    handler()
+    eg.metrics.reset()
+    handler()
+
+    key = f'trace.{__name__}.test_trace_records_again_after_reset.<locals>.handler'
+    assert eg.metrics.snapshot()[key]['count'] == 1
+    assert eg.metrics.histogram(key).count == 1
+
+
+def test_trace_keeps_same_named_functions_apart():
+    eg.metrics.reset()
+
+    def make(module):
+        def process():
+            pass
+        process.__module__ = module
+        return eg.trace(production=True)(process)
+
+    first, second = make('app.jobs'), make('app.web')
+    first()
+    for _ in range(2):
+        second()
+
+    stats = eg.trace_stats()
+    assert stats['app.jobs.test_trace_keeps_same_named_functions_apart.<locals>.make.<locals>.process']['calls'] == 1
+    assert stats['app.web.test_trace_keeps_same_named_functions_apart.<locals>.make.<locals>.process']['calls'] == 2
@@ -0,0 +1,155 @@
+"""Tests for logging from worker processes through a single writer."""
+
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+
+import pytest
+
+from ergolog import eg
+from ergolog.ergolog import ErgoProcessHandler, _call_tagged, _capture_tags
+
+
+def work(i):
+    eg.info('work %d', i)
+    return os.getpid()
+
+
+def fail():
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        eg.exception('failed')
+
+
+def limit_rate():
+    eg.config.set_rate_limit(1, burst=1, window=60)
+
+
+def rollup_and_spam(i):
+    eg.event(rollup='cache_get', window=60).emit()
+    for _ in range(5):
+        eg.info('spam')
+
+
+def inherited_state(i):
+    from ergolog.ergolog import ErgoRollup
+
+    return len(ErgoRollup._groups), ErgoRollup._thread
+
+
+def standalone_worker(q):
+    eg.config.set_worker(q)
+    with eg.tag('standalone'):
+        eg.warning('from a plain Process')
+
+
+@pytest.fixture
+def json_output(tmp_path):
+    log_file = tmp_path / 'out.jsonl'
+    eg.config.add_output('file', path=str(log_file), format='json')
+
+    def read():
+        return [json.loads(line) for line in log_file.read_text().splitlines()]
+
+    yield read
+    eg.config.remove_output('file', path=str(log_file))
+    eg.config.stop_listener()
+
+
+def test_pool_workers_write_through_parent(json_output):
+    counter = eg.counter()
+    counter += 3
+    with eg.tag('batch', n=counter):
+        with eg.process_pool(3) as pool:
+            pids = set(pool.map(work, range(30)))
+    counter += 1  # captured at submission, so workers keep seeing 3
+
+    lines = json_output()
+    assert os.getpid() not in pids
+    assert sorted(line['message'] for line in lines) == sorted(f'work {i}' for i in range(30))
+    assert all(line['tags'] == {'batch': True, 'n': 3} for line in lines)
+
+
+def test_pool_ships_formatted_exceptions(json_output):
+    with eg.process_pool(1) as pool:
+        pool.submit(fail).result()
+
+    (line,) = json_output()
+    assert line['level'] == 'ERROR'
+    assert 'ZeroDivisionError' in line['error']
+
+
+def test_pool_workers_flush_rollups_and_rate_limits(json_output):
+    # nothing closes these windows before the workers exit, so only the exit finalizers write them
+    with eg.process_pool(2, initializer=limit_rate) as pool:
+        list(pool.map(rollup_and_spam, range(12)))
+
+    lines = json_output()
+    rollups = [line['event'] for line in lines if line.get('event', {}).get('rollup') == 'cache_get']
+    assert sum(rollup['count'] for rollup in rollups) == 12
+    suppressed = [line for line in lines if line['message'].startswith('suppressed')]
+    spam = [line for line in lines if line['message'] == 'spam']
+    assert suppressed and len(spam) < 60
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs fork')
+def test_forked_workers_drop_inherited_rollups(json_output):
+    from ergolog.ergolog import ErgoRollup
+
+    eg.event(rollup='parent', window=60).emit()
+    with eg.process_pool(2, mp_context=multiprocessing.get_context('fork')) as pool:
+        states = list(pool.map(inherited_state, range(4)))
+    ErgoRollup.flush()
+
+    # the parent's open window is written once, by the parent, not again by each worker at exit
+    assert states == [(0, None)] * 4
+    rollups = [line['event'] for line in json_output() if line.get('event', {}).get('rollup') == 'parent']
+    assert [rollup['count'] for rollup in rollups] == [1]
+
+
+def test_set_worker_in_plain_process(json_output):
+    q = eg.config.start_listener()
+    process = multiprocessing.Process(target=standalone_worker, args=(q,))
+    process.start()
+    process.join()
+    eg.config.flush()
+
+    (line,) = json_output()
+    assert line['message'] == 'from a plain Process'
+    assert line['tags'] == {'standalone': True}
+
+
+def test_capture_and_restore_tags(caplog):
+    with eg.tag('outer', timer=eg.timer()), eg.tag(user=object()):
+        scopes = pickle.loads(pickle.dumps(_capture_tags()))
+
+    def inner():
+        eg.info('inside')
+
+    _call_tagged(scopes, inner)
+    eg.info('outside')
+
+    assert caplog.records[0].tag_dict['outer'] is True  # type: ignore
+    assert isinstance(caplog.records[0].tag_dict['timer'], float)  # type: ignore
+    assert caplog.records[0].tag_dict['user'].startswith('<object')  # type: ignore
+    assert caplog.records[1].tags == ''  # type: ignore
+
+
+def test_handler_batches_and_survives_unpicklable_values():
+    q: queue.Queue = queue.Queue()
+    handler = ErgoProcessHandler(q, batch_size=2, flush_interval=0)
+
+    for i in range(3):
+        record = eg._logger.makeRecord('ergo', 20, __file__, 1, 'msg %d', (i,), None)
+        record.fields = {'lock': threading.Lock()}  # type: ignore[attr-defined]
+        handler.handle(record)
+    assert q.qsize() == 1
+    handler.close()
+
+    batches = [pickle.loads(q.get()) for _ in range(q.qsize())]
+    assert [entry['msg'] for batch in batches for entry in batch] == ['msg 0', 'msg 1', 'msg 2']
+    assert batches[0][0]['fields'].startswith('{')